@@ -1,8 +1,12 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from app.api.routers import auth, answers, questions, statistics, profile
+from app.api.routers import auth, answers, questions, statistics, profile, admin
 from app.core.database import create_tables
+from app.services.model_registry import get_model_manager, MODEL_VERSION_HEADER
+from app.services.question_catalog import get_question_catalog
+from app.services.question_search import ensure_question_search
+from app.services.test_batches import get_batch_prefetcher
 import os
 
 app = FastAPI()
@@ -10,6 +14,25 @@ app = FastAPI()
 @app.on_event("startup")
 async def startup_event():
     create_tables()
+    # Arama dizini yoksa veya soru tablosuyla uyuşmuyorsa kurulur
+    ensure_question_search()
+    # Soru kataloğu ilk istekten önce yüklensin
+    get_question_catalog()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    # Sırada bekleyen parti hazırlıkları iptal edilir (çalışan hazırlık modelleri bırakana kadar beklenir)
+    get_batch_prefetcher().shutdown()
+    # Write-behind modunda bekleyen model güncellemelerini diske yaz
+    get_model_manager().shutdown()
+
+@app.middleware("http")
+async def model_version_header(request: Request, call_next):
+    response = await call_next(request)
+    # Modelleri kullanan istekler kendi sürümünü yazar; diğerleri etkin sürümü görür
+    if MODEL_VERSION_HEADER not in response.headers:
+        response.headers[MODEL_VERSION_HEADER] = get_model_manager().version
+    return response
 
 frontend_img_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "..", "frontend", "src", "img")
 if os.path.exists(frontend_img_path):
@@ -21,10 +44,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[MODEL_VERSION_HEADER],
 )
 
 app.include_router(auth.router)
 app.include_router(answers.router)
 app.include_router(questions.router)
 app.include_router(statistics.router)
-app.include_router(profile.router)
\ No newline at end of file
+app.include_router(profile.router)
+app.include_router(admin.router)
\ No newline at end of file
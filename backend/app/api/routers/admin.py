@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.orm import Session
+from jose import JWTError
+
+from app.core.database import get_db
+from app.core.models import User
+from app.services.auth_def import decode_token
+from app.services.model_registry import ModelRegistry, get_model_manager, get_model_registry
+
+router = APIRouter(prefix="/admin/models", tags=["admin"])
+bearer = HTTPBearer()
+
+def require_admin(creds: HTTPAuthorizationCredentials = Depends(bearer), db: Session = Depends(get_db)):
+    """Sadece role = 'admin' olan kullanıcılar"""
+    try:
+        user_id = int(decode_token(creds.credentials).get("sub"))
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Geçersiz token.")
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=401, detail="Geçersiz token formatı.")
+    
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is None or user.role != "admin":
+        raise HTTPException(status_code=403, detail="Bu işlem için yönetici yetkisi gerekli.")
+    return user
+
+@router.get("")
+def get_model_status(admin: User = Depends(require_admin)):
+    """Etkin model sürümü, yükleme durumu ve anlık görüntüler"""
+    manager = get_model_manager()
+    return {**manager.status(), "snapshots": manager.snapshots.list()}
+
+@router.get("/metrics")
+def get_model_metrics(admin: User = Depends(require_admin), models: ModelRegistry = Depends(get_model_registry)):
+    """AI modellerinin kayıt (write-behind), önbellek ve tahmin tablosu metriklerini getir"""
+    return {
+        "model_version": models.version,
+        "simple_model": models.simple.get_persistence_metrics(),
+        "enhanced_model": {"cache": models.enhanced.get_cache_metrics()},
+        "prediction_tables": models.predictions.metrics(),
+        "update_queue": models.get_update_metrics()
+    }
+
+@router.post("/snapshots")
+def create_snapshot(version: str | None = None, note: str | None = None, admin: User = Depends(require_admin)):
+    """Etkin modellerin güncel durumunu yeni bir sürüm olarak kaydet"""
+    try:
+        version = get_model_manager().snapshot(version, note)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileExistsError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"message": f"{version} anlık görüntüsü oluşturuldu", "version": version}
+
+@router.post("/reload", status_code=202)
+def reload_models(version: str, wait: bool = False, admin: User = Depends(require_admin)):
+    """Sürümü arka planda yükleyip etkinleştir; süren istekler eski sürümle tamamlanır"""
+    manager = get_model_manager()
+    try:
+        manager.activate(version, wait=wait)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if not wait:
+        message = f"{version} sürümü arka planda yükleniyor"
+    elif manager.version == version:
+        message = f"{version} sürümü etkin"
+    else:
+        message = f"{version} sürümü yüklenemedi, {manager.version} ile devam ediliyor"
+    
+    return {
+        "message": message,
+        "requested_version": version,
+        "active_version": manager.version,
+        "last_error": manager.last_error
+    }
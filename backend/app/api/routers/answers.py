@@ -7,17 +7,19 @@ from jose import JWTError
 from app.services.auth_def import decode_token
 from app.core.database import get_db
 from app.core.models import Submission
-from app.services.simple_ai_model import SimpleAIModel
-from app.services.enhanced_ml_model import EnhancedPracticeModel
-from app.core.schemas import AnswerIn, PredictIn
+from app.services.model_registry import ModelRegistry, get_model_registry
+from app.services.question_catalog import get_question_catalog
+from app.services.test_batches import get_batch_prefetcher
+from app.services.user_stats import EMPTY_USER_STATS, TOPIC, DIFFICULTY
+from app.core.schemas import AnswerIn, PredictIn, PredictBatchIn, PredictQuestionIn
 
 router = APIRouter(prefix="/answers", tags=["answers"])
 bearer = HTTPBearer()
-simple_model = SimpleAIModel()
-enhanced_model = EnhancedPracticeModel()
+
+MAX_PREDICT_BATCH = 200  # /predict-batch isteği başına en fazla soru
 
 @router.post("/predict")
-def predict_answer(predict_data: PredictIn, creds: HTTPAuthorizationCredentials = Depends(bearer), db: Session = Depends(get_db)):
+def predict_answer(predict_data: PredictIn, creds: HTTPAuthorizationCredentials = Depends(bearer), db: Session = Depends(get_db), models: ModelRegistry = Depends(get_model_registry)):
     print(f"DEBUG: Starting predict answer for user {predict_data.user_id}")
     
     try:
@@ -30,33 +32,40 @@ def predict_answer(predict_data: PredictIn, creds: HTTPAuthorizationCredentials
         print(f"Token decode error: {e}")
         raise HTTPException(status_code=401, detail="Geçersiz token formatı.")
     
+    question = None
+    if predict_data.soru_id is not None:
+        question = get_question_catalog().get(predict_data.soru_id)
+        if question is None:
+            raise HTTPException(status_code=404, detail=f"Soru bulunamadı: {predict_data.soru_id}")
+    elif predict_data.ders_id is None or predict_data.konu_id is None or predict_data.zorluk is None:
+        raise HTTPException(status_code=400, detail="soru_id veya ders_id, konu_id ve zorluk verilmelidir.")
+    
     try:
         X = {
-            "ders_id": predict_data.ders_id,
-            "konu_id": predict_data.konu_id,
-            "altbaslik_id": predict_data.altbaslik_id,
-            "zorluk": predict_data.zorluk,
-            "user_id": user_id
+            name: getattr(predict_data, name) if getattr(predict_data, name) is not None or question is None else getattr(question, name)
+            for name in ("ders_id", "konu_id", "altbaslik_id", "zorluk")
         }
+        X["user_id"] = user_id
+        if question is not None:
+            # Katalogdaki zorluk kalibre seviyedir (varsa); /submit ve /predict-batch ile aynı hücre okunur/yazılır
+            X["zorluk"] = question.zorluk
         
         print(f"DEBUG: Making prediction with data: {X}")
         
-        # Her iki modelden tahmin al
-        simple_prediction = get_simple_model_prediction(user_id, X)
-        enhanced_prediction = get_enhanced_model_prediction(user_id, X)
+        # Kuyrukta bu kullanıcının güncellemesi varsa önce onlar uygulanır (read-your-writes)
+        models.wait_for_updates(user_id)
         
-        # Tahminleri birleştir (ağırlıklı ortalama)
-        prediction_percentage = combine_predictions(simple_prediction, enhanced_prediction, user_id, X)
+        # İki modelin ve birleşik tahminin önceden hesaplanmış değerleri (tablo her güncellemede yenilenir)
+        simple_prediction, enhanced_prediction, prediction_percentage = models.predictions.predict(user_id, X)
         
         is_correct = getattr(predict_data, 'is_correct', None)
 
         if is_correct is not None:
             print(f"DEBUG: Updating both AI models with result: {is_correct}")
             try:
-                # Her iki modeli güncelle
-                simple_model.update(X, is_correct)
-                enhanced_model.update(X, is_correct)
-                print(f"DEBUG: Both AI models updated successfully")
+                # Güncelleme kuyruğa bırakılır; bu kullanıcının sonraki tahmini onu bekler
+                models.record_answer(X, is_correct)
+                print(f"DEBUG: AI model update queued")
             except Exception as e:
                 print(f"AI model update error: {e}")
                 print(f"Traceback: {traceback.format_exc()}")
@@ -78,105 +87,74 @@ def predict_answer(predict_data: PredictIn, creds: HTTPAuthorizationCredentials
         print(f"Traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail="Tahmin yapılırken bir hata oluştu.")
 
-def get_simple_model_prediction(user_id, X):
-    """Simple AI Model'den tahmin al"""
-    try:
-        # Simple AI Model'in predict metodunu kullan
-        prediction = simple_model.predict(X)
-        # prediction zaten 0-1 arası, 100 ile çarp
-        return round(prediction * 100)  # Yüzdeye çevir
-    except Exception as e:
-        print(f"Simple model prediction error: {e}")
-        return 50  # Varsayılan değer
-
-def get_enhanced_model_prediction(user_id, X):
-    """Enhanced ML Model'den tahmin al"""
+@router.post("/predict-batch")
+def predict_batch(batch: PredictBatchIn, creds: HTTPAuthorizationCredentials = Depends(bearer), db: Session = Depends(get_db), models: ModelRegistry = Depends(get_model_registry)):
+    """Birden çok soru için tahminler tek istekte; kullanıcı bir kez çözülür, sorular tek geçişte skorlanır"""
     try:
-        # Enhanced model için veri formatını hazırla
-        enhanced_X = {
-            'ders_id': X['ders_id'],
-            'konu_id': X['konu_id'],
-            'altbaslik_id': X['altbaslik_id'],
-            'zorluk': X['zorluk'],
-            'user_id': X['user_id']
+        user_id = int(decode_token(creds.credentials).get("sub"))
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Geçersiz token.")
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=401, detail="Geçersiz token formatı.")
+    
+    items = list(batch.questions) + [PredictQuestionIn(soru_id=soru_id) for soru_id in batch.soru_ids]
+    if len(items) > MAX_PREDICT_BATCH:
+        raise HTTPException(status_code=400, detail=f"Tek istekte en fazla {MAX_PREDICT_BATCH} soru için tahmin yapılabilir.")
+    
+    # Sadece soru_id ile gelen soruların ders/konu/zorluk bilgileri katalogdan okunur
+    catalog = get_question_catalog()
+    lookup_ids = {
+        q.soru_id for q in items
+        if q.soru_id is not None and (q.ders_id is None or q.konu_id is None or q.zorluk is None)
+    }
+    missing = sorted(soru_id for soru_id in lookup_ids if catalog.get(soru_id) is None)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Soru bulunamadı: {missing}")
+    
+    questions = []
+    for q in items:
+        row = catalog.get(q.soru_id) if q.soru_id is not None else None
+        question = {
+            name: getattr(q, name) if getattr(q, name) is not None or row is None else getattr(row, name)
+            for name in ("soru_id", "ders_id", "konu_id", "altbaslik_id", "zorluk")
         }
-        
-        # Enhanced model tahmin yap
-        prediction = enhanced_model.predict(enhanced_X)
-        return round(prediction * 100)  # Yüzdeye çevir
-    except Exception as e:
-        print(f"Enhanced model prediction error: {e}")
-        return 50  # Varsayılan değer
-
-def combine_predictions(simple_pred, enhanced_pred, user_id, X):
-    """Gelişmiş tahmin birleştirme algoritması"""
+        if question["ders_id"] is None or question["konu_id"] is None or question["zorluk"] is None:
+            raise HTTPException(status_code=400, detail="Her soru için soru_id veya ders_id, konu_id ve zorluk verilmelidir.")
+        if row is not None:
+            # Katalogdaki zorluk kalibre seviyedir (varsa); modellerin kaydettiği seviyeyle aynı olsun
+            question["zorluk"] = row.zorluk
+        questions.append(question)
+    
+    if not questions:
+        return []
+    
     try:
-        # Kullanıcının soru sayısına göre dinamik ağırlık
-        user_data = simple_model.user_stats.get(user_id, {})
-        total_questions = user_data.get('total_questions', 0)
-        
-        # Zorluk seviyesine göre ağırlık ayarlama
-        zorluk = X.get('zorluk', 3)
-        
-        if total_questions < 10:
-            # İlk 10 soruda Simple model daha güvenilir
-            simple_weight = 0.7
-            enhanced_weight = 0.3
-        elif total_questions < 30:
-            # 10-30 arası eşit ağırlık
-            simple_weight = 0.5
-            enhanced_weight = 0.5
-        else:
-            # 30+ soruda Enhanced model daha güvenilir
-            simple_weight = 0.3
-            enhanced_weight = 0.7
-        
-        # Zorluk bazlı ek düzeltme
-        if zorluk <= 2:  # Kolay sorular
-            simple_weight += 0.1
-            enhanced_weight -= 0.1
-        elif zorluk >= 5:  # Zor sorular
-            simple_weight -= 0.1
-            enhanced_weight += 0.1
-        
-        # Ağırlıkları normalize et
-        total_weight = simple_weight + enhanced_weight
-        simple_weight /= total_weight
-        enhanced_weight /= total_weight
-        
-        # Birleştirilmiş tahmin (simple_pred ve enhanced_pred zaten yüzde değeri)
-        combined_pred = (simple_pred * simple_weight) + (enhanced_pred * enhanced_weight)
-        
-        # Konu bazlı düzeltme faktörü
-        konu_id = X.get('konu_id', 1)
-        konu_factor = 1.0
-        
-        # Konu bazlı performans düzeltmesi (opsiyonel)
-        if user_id in simple_model.user_stats:
-            user_data = simple_model.user_stats[user_id]
-            topic_key = (X.get('ders_id', 1), konu_id)
-            topic_data = user_data.get('topic_performance', {}).get(topic_key, {})
-            
-            if topic_data.get('total', 0) > 5:
-                topic_accuracy = topic_data.get('correct', 0) / topic_data.get('total', 1)
-                # Konu performansına göre küçük düzeltme
-                if topic_accuracy < 0.3:
-                    konu_factor = 0.95  # Zayıf konularda %5 azalış
-                elif topic_accuracy > 0.7:
-                    konu_factor = 1.05  # Güçlü konularda %5 artış
-        
-        # Final tahmin (yüzde değeri olarak)
-        final_pred = combined_pred * konu_factor
-        
-        # 0-100 arasında sınırla
-        final_pred = max(0, min(100, final_pred))
-        
-        return round(final_pred)
+        models.wait_for_updates(user_id)
+        
+        # Tüm soruların (simple, enhanced, birleşik) yüzdeleri tek tablo okumasıyla
+        predictions = models.predictions.predict_many(user_id, questions).T.tolist()
+        
+        # Mesaj sadece yüzdeye bağlı; aynı yüzdeler için bir kez üretilir
+        messages = {}
+        results = []
+        for question, (simple_prediction, enhanced_prediction, prediction_percentage) in zip(questions, predictions):
+            if prediction_percentage not in messages:
+                messages[prediction_percentage] = generate_motivational_message(prediction_percentage)
+            results.append({
+                **question,
+                "prediction_percentage": prediction_percentage,
+                "simple_prediction": simple_prediction,
+                "enhanced_prediction": enhanced_prediction,
+                "motivational_message": messages[prediction_percentage],
+                "confidence_level": get_confidence_level(prediction_percentage)
+            })
+        
+        return results
         
     except Exception as e:
-        print(f"Tahmin birleştirme hatası: {e}")
-        # Hata durumunda basit ortalama
-        return round((simple_pred + enhanced_pred) / 2)
+        print(f"Unexpected error in predict batch: {e}")
+        print(f"Traceback: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Tahmin yapılırken bir hata oluştu.")
 
 def calculate_prediction_based_on_weak_topics(user_data, X):
     
@@ -185,26 +163,20 @@ def calculate_prediction_based_on_weak_topics(user_data, X):
     zorluk = X['zorluk']
     
     topic_key = (ders_id, konu_id)
-    topic_data = user_data['topic_performance'].get(topic_key, {'total': 0, 'correct': 0})
+    topic_total, topic_correct = user_data.get_counts(TOPIC, topic_key)
     
-    if topic_data['total'] == 0:
+    if topic_total == 0:
         return 50
     
-    topic_accuracy = topic_data['correct'] / topic_data['total']
+    topic_accuracy = topic_correct / topic_total
     
-    difficulty_data = user_data['difficulty_performance'].get(zorluk, {'total': 0, 'correct': 0})
-    if difficulty_data['total'] == 0:
-        difficulty_accuracy = 0.5
-    else:
-        difficulty_accuracy = difficulty_data['correct'] / difficulty_data['total']
+    difficulty_accuracy = user_data.accuracy(DIFFICULTY, zorluk)
     
-    overall_accuracy = 0.5
-    if user_data['total_questions'] > 0:
-        overall_accuracy = user_data['correct_answers'] / user_data['total_questions']
+    overall_accuracy = user_data.overall_accuracy()
     
     recent_accuracy = 0.5
-    if len(user_data['recent_performance']) > 0:
-        recent_accuracy = sum(user_data['recent_performance']) / len(user_data['recent_performance'])
+    if len(user_data.recent_performance) > 0:
+        recent_accuracy = sum(user_data.recent_performance) / len(user_data.recent_performance)
     
     weights = {
         'topic': 0.5,
@@ -360,7 +332,7 @@ def get_confidence_level(prediction_percentage):
         return "low"
 
 @router.post("/submit")
-def submit(answer: AnswerIn, creds: HTTPAuthorizationCredentials = Depends(bearer), db: Session = Depends(get_db)):
+def submit(answer: AnswerIn, creds: HTTPAuthorizationCredentials = Depends(bearer), db: Session = Depends(get_db), models: ModelRegistry = Depends(get_model_registry)):
     try:
         user_id = int(decode_token(creds.credentials).get("sub"))
     except JWTError:
@@ -382,20 +354,24 @@ def submit(answer: AnswerIn, creds: HTTPAuthorizationCredentials = Depends(beare
         db.commit()
         db.refresh(submission)
         
-        # AI model güncellemesi
+        # AI model güncellemesi: istek beklemez, güncellemeler arka plandaki kuyruğa bırakılır
         try:
+            # Zorluk katalogdan (kalibre seviye varsa o); soru katalogda yoksa istemcinin gönderdiği
+            question = get_question_catalog().get(answer.soru_id)
             X = {
                 "ders_id": answer.ders_id,
                 "konu_id": answer.konu_id,
                 "altbaslik_id": answer.altbaslik_id,
-                "zorluk": answer.zorluk,
+                "zorluk": question.zorluk if question is not None else answer.zorluk,
                 "user_id": user_id
             }
-            simple_model.update(X, answer.is_correct)
-            enhanced_model.update(X, answer.is_correct)
+            models.record_answer(X, answer.is_correct)
         except Exception as e:
             print(f"AI model güncelleme hatası: {e}")
         
+        # Hazır parti bu cevabı bilmeden seçildi: geçersiz; partinin son sorusuysa sonraki hazırlanır
+        get_batch_prefetcher().record_submission(user_id, answer.soru_id)
+        
         return {"message": "Cevap başarıyla kaydedildi", "submission_id": submission.id}
         
     except Exception as e:
@@ -404,7 +380,7 @@ def submit(answer: AnswerIn, creds: HTTPAuthorizationCredentials = Depends(beare
         raise HTTPException(status_code=500, detail="Cevap kaydedilirken bir hata oluştu.")
 
 @router.get("/user-stats")
-def get_user_stats(creds: HTTPAuthorizationCredentials = Depends(bearer)):
+def get_user_stats(creds: HTTPAuthorizationCredentials = Depends(bearer), models: ModelRegistry = Depends(get_model_registry)):
     """Kullanıcının AI model istatistiklerini getir"""
     try:
         user_id = int(decode_token(creds.credentials).get("sub"))
@@ -414,28 +390,20 @@ def get_user_stats(creds: HTTPAuthorizationCredentials = Depends(bearer)):
         raise HTTPException(status_code=401, detail="Geçersiz token formatı.")
     
     try:
-        user_data = simple_model.user_stats[user_id]
-        
-        # Veri temizleme durumunu hesapla
-        total_questions = user_data['total_questions']
-        cleanup_threshold = simple_model.data_cleanup_threshold
-        cleanup_percentage = simple_model.data_cleanup_percentage
-        next_cleanup_at = ((total_questions // cleanup_threshold) + 1) * cleanup_threshold
-        questions_until_cleanup = max(0, next_cleanup_at - total_questions)
+        user_data = models.simple.user_stats.get(user_id, EMPTY_USER_STATS)
+        total_questions = user_data.total_questions
         
         stats = {
             "total_questions": total_questions,
-            "correct_answers": user_data['correct_answers'],
-            "overall_accuracy": user_data['correct_answers'] / total_questions if total_questions > 0 else 0,
-            "cleanup_threshold": cleanup_threshold,
-            "cleanup_percentage": cleanup_percentage * 100,  # Yüzde olarak
-            "questions_until_cleanup": questions_until_cleanup,
-            "next_cleanup_at": next_cleanup_at,
-            "will_cleanup_soon": questions_until_cleanup <= 50,  # 50 soru kala uyarı
-            "last_activity": user_data['last_activity'].isoformat() if user_data['last_activity'] else None,
-            "recent_performance_count": len(user_data['recent_performance']),
-            "recent_accuracy": sum(user_data['recent_performance']) / len(user_data['recent_performance']) if user_data['recent_performance'] else 0,
-            "last_cleanup_at": user_data.get('last_cleanup_at', 0)
+            "correct_answers": user_data.correct_answers,
+            "overall_accuracy": user_data.correct_answers / total_questions if total_questions > 0 else 0,
+            # Tahminlerde kullanılan sönümlü değerler: eski cevaplar yarı ömürle sürekli azalır
+            "decayed_accuracy": user_data.overall_accuracy(default=0),
+            "effective_questions": user_data.effective_questions(),
+            **models.simple.decay_parameters(),
+            "last_activity": user_data.last_activity.isoformat() if user_data.last_activity else None,
+            "recent_performance_count": len(user_data.recent_performance),
+            "recent_accuracy": sum(user_data.recent_performance) / len(user_data.recent_performance) if user_data.recent_performance else 0
         }
         
         return stats
@@ -445,8 +413,8 @@ def get_user_stats(creds: HTTPAuthorizationCredentials = Depends(bearer)):
         raise HTTPException(status_code=500, detail="İstatistikler alınırken bir hata oluştu.")
 
 @router.post("/manual-cleanup")
-def manual_cleanup(creds: HTTPAuthorizationCredentials = Depends(bearer)):
-    """Manuel veri temizleme (sadece test amaçlı)"""
+def manual_cleanup(creds: HTTPAuthorizationCredentials = Depends(bearer), models: ModelRegistry = Depends(get_model_registry)):
+    """Manuel veri temizleme (sönümlü sayaçlarla gerek kalmadı; ayarları raporlar)"""
     try:
         user_id = int(decode_token(creds.credentials).get("sub"))
     except JWTError:
@@ -455,15 +423,15 @@ def manual_cleanup(creds: HTTPAuthorizationCredentials = Depends(bearer)):
         raise HTTPException(status_code=401, detail="Geçersiz token formatı.")
     
     try:
-        # Veri temizleme işlemini manuel olarak tetikle
-        simple_model.cleanup_old_data(user_id)
-        
-        user_data = simple_model.user_stats[user_id]
+        # Sayaçlar her cevapta sönümlendiği için silinecek veri yok; sadece güncel durum raporlanır
+        user_data = models.simple.user_stats.get(user_id, EMPTY_USER_STATS)
         
         return {
-            "message": "Veri temizleme işlemi tamamlandı",
-            "remaining_questions": user_data['total_questions'],
-            "overall_accuracy": user_data['correct_answers'] / user_data['total_questions'] if user_data['total_questions'] > 0 else 0
+            "message": "Veri temizleme gerekmiyor: eski cevapların ağırlığı her cevapta azalıyor",
+            "remaining_questions": user_data.total_questions,
+            "effective_questions": user_data.effective_questions(),
+            "overall_accuracy": user_data.overall_accuracy(default=0),
+            **models.simple.decay_parameters()
         }
         
     except Exception as e:
@@ -1,22 +1,26 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone, timedelta
-from random import shuffle, sample
-import json
 import traceback
 from jose import JWTError
 from app.core.database import get_db
 from app.services.auth_def import decode_token
-from app.core.models import Questions, Submission, TestSession
-from app.services.enhanced_ml_model import EnhancedPracticeModel
+from app.core.models import Submission, TestSession
+from app.services.model_registry import MODEL_VERSION_HEADER, ModelRegistry, get_model_registry
+from app.services.question_catalog import get_question_catalog
+from app.services.question_search import MAX_SEARCH_PAGE_SIZE, SEARCH_PAGE_SIZE, search_questions
+from app.services.question_tags import format_tag_query, parse_tag_query
+from app.services.test_batches import (
+    NotEnoughQuestions, batch_events, get_batch_prefetcher, ndjson_lines, next_batch, sse_messages
+)
 
 
 router = APIRouter(prefix="/questions", tags=["questions"])
 bearer = HTTPBearer()
 
 TURKEY_TIMEZONE = timezone(timedelta(hours=3))
-model = EnhancedPracticeModel()
 
 @router.post("/start-test")
 def start_test(
@@ -31,10 +35,11 @@ def start_test(
         raise HTTPException(status_code=401, detail="Geçersiz token.")
     
     try:
+        # Etiket sorgusu normal biçimde saklanır (Türkçe küçük harf, sıralı etiketler)
         test_session = TestSession(
             user_id=user_id,
             ders_id=ders_id,
-            etiket=etiket,
+            etiket=format_tag_query(parse_tag_query(etiket)) or None,
             started_at=datetime.now(TURKEY_TIMEZONE),
             is_completed=False
         )
@@ -84,6 +89,9 @@ def end_test(
         
         db.commit()
         
+        # Sonraki parti arka planda hazırlanır; kullanıcı yeni teste başlarken /batch önbellekten okur
+        get_batch_prefetcher().schedule(user_id, test_session.ders_id, test_session.etiket)
+        
         return {
             "message": "Test oturumu tamamlandı",
             "total_questions": test_session.total_questions,
@@ -95,12 +103,53 @@ def end_test(
         print(f"Test bitirme hatası: {e}")
         raise HTTPException(status_code=500, detail="Test bitirilirken hata oluştu")
 
+@router.get("/tags")
+def list_tags(
+    ders_id: int = None,
+    creds: HTTPAuthorizationCredentials = Depends(bearer)
+):
+    """Etiketler ve soru sayıları (verilirse sadece dersin soruları), çoktan aza"""
+    try:
+        decode_token(creds.credentials)
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Geçersiz token.")
+    
+    counts = get_question_catalog().tag_counts(ders_id)
+    return [
+        {"etiket": etiket, "soru_sayisi": count}
+        for etiket, count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+    ]
+
+@router.get("/search")
+def search(
+    q: str,
+    ders_id: int = None,
+    sayfa: int = 1,
+    boyut: int = SEARCH_PAGE_SIZE,
+    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    db: Session = Depends(get_db)
+):
+    """Soru metni, açıklama ve etiketlerde tam metin arama; bm25 sıralı, sayfalı, özetli"""
+    try:
+        decode_token(creds.credentials)
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Geçersiz token.")
+    
+    if sayfa < 1 or not 1 <= boyut <= MAX_SEARCH_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"Sayfa 1 veya büyük, boyut 1-{MAX_SEARCH_PAGE_SIZE} arasında olmalı.")
+    
+    try:
+        return search_questions(db, get_question_catalog(), q, ders_id, sayfa, boyut)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/batch")
 def get_batch_questions(
     ders_id: int,
     etiket: str = None,
     creds: HTTPAuthorizationCredentials = Depends(bearer),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    models: ModelRegistry = Depends(get_model_registry)
 ):
     print(f"DEBUG: Starting get_batch_questions with ders_id={ders_id}, etiket={etiket}")
     
@@ -115,156 +164,51 @@ def get_batch_questions(
         raise HTTPException(status_code=401, detail="Geçersiz token formatı.")
     
     try:
-        print(f"DEBUG: Querying database for user {user_id}")
-        
-        # Sadece gerekli sütunları seç
-        answered_questions = db.query(Submission.question_id).filter(
-            Submission.user_id == user_id
-        ).subquery()
-        
-        print(f"DEBUG: Found answered questions subquery")
-
-        # Sadece gerekli sütunları kullan
-        total = db.query(Submission.id).filter(Submission.user_id == user_id).count()
-        wrong = db.query(Submission.id).filter(
-            Submission.user_id == user_id, 
-            Submission.is_correct == False
-        ).count()
-        ratio = wrong / total if total else 0
-        targeted_percent = 0.8 if ratio >= 0.6 else 0.6 if ratio >= 0.3 else 0.4
-        
-        print(f"DEBUG: Performance analysis - total: {total}, wrong: {wrong}, ratio: {ratio}")
-
-        all_questions = db.query(Questions).filter(Questions.ders_id == ders_id).all()
-        print(f"DEBUG: Total questions for ders_id={ders_id}: {len(all_questions)}")
-        
-        if etiket:
-            filtered_questions = [q for q in all_questions if etiket.lower() in q.etiket.lower()]
-            print(f"DEBUG: Questions with etiket '{etiket}': {len(filtered_questions)}")
-        else:
-            filtered_questions = all_questions
-            print(f"DEBUG: No etiket filter applied")
-        
-        # Sadece question_id sütununu seç
-        answered_ids = db.query(Submission.question_id).filter(Submission.user_id == user_id).all()
-        answered_ids = [id[0] for id in answered_ids]
-        print(f"DEBUG: Answered question IDs: {answered_ids}")
-        
-        unanswered_questions = [q for q in filtered_questions if q.soru_id not in answered_ids]
-        print(f"DEBUG: Unanswered questions: {len(unanswered_questions)}")
-        
-        if len(unanswered_questions) < 30:
-            print(f"DEBUG: Not enough unanswered questions ({len(unanswered_questions)}), showing all questions")
-            qs = filtered_questions
-        else:
-            qs = unanswered_questions
-            
-        if len(qs) < 30:
-            print(f"ERROR: Not enough questions found. Total: {len(qs)}")
-            raise HTTPException(status_code=400, detail=f"Ders ID {ders_id} için yeterli soru bulunamadı. Toplam {len(qs)} soru mevcut.")
-
-        # AI model her zaman çalışır, sadece 30 soru sonrası kullanıcıya gösterilir
-        print(f"DEBUG: Processing {len(qs)} questions with AI model")
-        scored = []
-        for q in qs:
-            try:
-                X = {
-                    "ders_id": q.ders_id,
-                    "konu_id": q.konu_id,
-                    "altbaslik_id": q.altbaslik_id,
-                    "zorluk": q.zorluk,
-                    "user_id": user_id
-                }
-                p = model.predict(X)
-                scored.append((q, p))
-            except Exception as e:
-                print(f"AI model prediction error for question {q.soru_id}: {e}")
-                print(f"Traceback: {traceback.format_exc()}")
-                scored.append((q, 0.5))
-
-        # Kullanıcının bu dersten çözdüğü soru sayısını kontrol et
-        user_question_count = db.query(Submission.id).join(Questions, Submission.question_id == Questions.soru_id).filter(
-            Submission.user_id == user_id,
-            Questions.ders_id == ders_id
-        ).count()
-        
-        print(f"DEBUG: User has solved {user_question_count} questions in this subject")
-        
-        selected_questions = []
-        
-        if user_question_count < 30:
-            # YENİ KULLANICI: İlk 30 soru - %100 rastgele, eşit dağılım
-            print("DEBUG: New user - 100% random selection with equal distribution")
-            
-            # Zorluk seviyelerine göre grupla
-            easy_questions = [q for q, _ in scored if q.zorluk <= 2]
-            medium_questions = [q for q, _ in scored if 3 <= q.zorluk <= 4]
-            hard_questions = [q for q, _ in scored if q.zorluk >= 5]
-            
-            # Her zorluk seviyesinden eşit sayıda soru seç (10'ar tane)
-            easy_count = min(10, len(easy_questions))
-            medium_count = min(10, len(medium_questions))
-            hard_count = min(10, len(hard_questions))
-            
-            # Rastgele seç
-            shuffle(easy_questions)
-            shuffle(medium_questions)
-            shuffle(hard_questions)
-            
-            selected_questions.extend(easy_questions[:easy_count])
-            selected_questions.extend(medium_questions[:medium_count])
-            selected_questions.extend(hard_questions[:hard_count])
-            
-            # Kalan sorulardan rastgele tamamla
-            remaining = [q for q, _ in scored if q not in selected_questions]
-            shuffle(remaining)
-            selected_questions.extend(remaining[:30 - len(selected_questions)])
-            
-        else:
-            # DENEYİMLİ KULLANICI: %70 zayıf noktalar + %30 rastgele çeşitlilik
-            print("DEBUG: Experienced user - 70% weak points + 30% random diversity")
-            
-            # AI skoruna göre sırala (düşük skor = zayıf konu)
-            scored.sort(key=lambda x: x[1])
-            
-            # %70 zayıf noktalar (21 soru)
-            weak_questions_count = int(30 * 0.7)
-            weak_questions = [q for q, _ in scored[:weak_questions_count]]
-            selected_questions.extend(weak_questions)
-            
-            # %30 rastgele çeşitlilik (9 soru)
-            remaining_questions = [q for q, _ in scored[weak_questions_count:]]
-            shuffle(remaining_questions)
-            diversity_count = 30 - len(selected_questions)
-            selected_questions.extend(remaining_questions[:diversity_count])
-        
-        # Son kontrol - 30 soru olacak şekilde ayarla
-        if len(selected_questions) > 30:
-            selected_questions = selected_questions[:30]
-        elif len(selected_questions) < 30:
-            remaining = [q for q, _ in scored if q not in selected_questions]
-            shuffle(remaining)
-            selected_questions.extend(remaining[:30 - len(selected_questions)])
-        
-        print(f"DEBUG: Final selection - Total: {len(selected_questions)}")
-        print(f"DEBUG: Final selection - Easy: {len([q for q in selected_questions if q.zorluk <= 2])}")
-        print(f"DEBUG: Final selection - Medium: {len([q for q in selected_questions if 3 <= q.zorluk <= 4])}")
-        print(f"DEBUG: Final selection - Hard: {len([q for q in selected_questions if q.zorluk >= 5])}")
-        print(f"DEBUG: Final selection - Topics: {list(set(q.konu_id for q in selected_questions))}")
-        
-        for q in selected_questions:
-            try:
-                q.secenekler = json.loads(q.secenekler) if q.secenekler else {}
-            except (json.JSONDecodeError, TypeError) as e:
-                print(f"JSON parse error for question {q.soru_id}: {e}")
-                q.secenekler = {}
-        
-        print(f"DEBUG: Successfully returning {len(selected_questions)} questions")
-        return selected_questions
+        # Çoğu durumda parti end-test ya da son cevaptan sonra arka planda hazırlanmıştır
+        return next_batch(db, models, user_id, ders_id, etiket)
         
+    except NotEnoughQuestions as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
         print(f"Unexpected error in get_batch_questions: {e}")
         print(f"Traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail="Soru yükleme sırasında bir hata oluştu.")
+
+@router.get("/batch/stream")
+def stream_batch_questions(
+    request: Request,
+    ders_id: int,
+    etiket: str = None,
+    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    db: Session = Depends(get_db),
+    models: ModelRegistry = Depends(get_model_registry)
+):
+    """/batch ile aynı parti, akış olarak: NDJSON (varsayılan) ya da Accept: text/event-stream ise SSE
+    
+    İlk satır hafif listedir (soru_id, konu_id, zorluk); sorular ardından tek tek gelir,
+    istemci ilk soruyu tüm parti inmeden gösterebilir.
+    """
+    try:
+        user_id = int(decode_token(creds.credentials).get("sub"))
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Geçersiz token.")
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=401, detail="Geçersiz token formatı.")
+    
+    # Seçim akış başlamadan yapılır: hatalar normal durum kodlarıyla döner
+    try:
+        batch = next_batch(db, models, user_id, ders_id, etiket)
+    except NotEnoughQuestions as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Unexpected error in stream_batch_questions: {e}")
+        print(f"Traceback: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail="Soru yükleme sırasında bir hata oluştu.")
+    
+    # Ara sunucu (nginx) tamponlaması akışı bozmasın
+    headers = {MODEL_VERSION_HEADER: models.version, "Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    if "text/event-stream" in request.headers.get("accept", ""):
+        return StreamingResponse(sse_messages(batch_events(batch)), media_type="text/event-stream", headers=headers)
+    return StreamingResponse(ndjson_lines(batch_events(batch)), media_type="application/x-ndjson", headers=headers)
@@ -8,13 +8,14 @@ from jose import JWTError
 from app.services.auth_def import decode_token
 from app.core.database import get_db
 from app.core.models import Submission, Questions, TestSession
-from app.services.enhanced_ml_model import EnhancedPracticeModel
+from app.services.model_registry import ModelRegistry, get_model_registry
+from app.services.user_stats import EMPTY_USER_STATS
+from app.services.learning_curve import RESOLUTIONS
 
 router = APIRouter(prefix="/stats", tags=["statistics"])
 bearer = HTTPBearer()
 
 TURKEY_TIMEZONE = timezone(timedelta(hours=3))
-model = EnhancedPracticeModel()
 
 def get_topic_name(ders_id, konu_id):
     topic_names = {
@@ -458,7 +459,8 @@ def get_subject_statistics(
 @router.get("/ai-recommendations")
 def get_ai_recommendations(
     creds: HTTPAuthorizationCredentials = Depends(bearer),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    models: ModelRegistry = Depends(get_model_registry)
 ):
     try:
         payload = decode_token(creds.credentials)
@@ -468,15 +470,10 @@ def get_ai_recommendations(
     
     try:
 
-        recommendations = model.get_recommendations(user_id, ders_id=1)
+        recommendations = models.enhanced.get_recommendations(user_id, ders_id=1)
         
 
-        user_stats = model.user_stats.get(user_id, {
-            'total_questions': 0,
-            'correct_answers': 0,
-            'recent_performance': [],
-            'last_activity': None
-        })
+        user_stats = models.enhanced.user_stats.get(user_id, EMPTY_USER_STATS)
         
 
         default_recommendations = {
@@ -492,11 +489,11 @@ def get_ai_recommendations(
         response = {
             "recommendations": recommendations,
             "user_stats": {
-                "total_questions": user_stats.get('total_questions', 0),
-                "correct_answers": user_stats.get('correct_answers', 0),
-                "overall_accuracy": user_stats.get('correct_answers', 0) / user_stats.get('total_questions', 1) if user_stats.get('total_questions', 0) > 0 else 0,
-                "recent_performance": user_stats.get('recent_performance', [])[-5:] if len(user_stats.get('recent_performance', [])) > 0 else [],
-                "last_activity": user_stats.get('last_activity').isoformat() if user_stats.get('last_activity') else None
+                "total_questions": user_stats.total_questions,
+                "correct_answers": user_stats.correct_answers,
+                "overall_accuracy": user_stats.correct_answers / user_stats.total_questions if user_stats.total_questions > 0 else 0,
+                "recent_performance": user_stats.recent_performance[-5:] if len(user_stats.recent_performance) > 0 else [],
+                "last_activity": user_stats.last_activity.isoformat() if user_stats.last_activity else None
             }
         }
         
@@ -520,6 +517,30 @@ def get_ai_recommendations(
             }
         }
 
+@router.get("/learning-curve")
+def get_learning_curve(
+    resolution: str = "recent",
+    creds: HTTPAuthorizationCredentials = Depends(bearer),
+    models: ModelRegistry = Depends(get_model_registry)
+):
+    try:
+        payload = decode_token(creds.credentials)
+        user_id = int(payload.get("sub"))
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Geçersiz token.")
+
+    if resolution not in RESOLUTIONS:
+        raise HTTPException(status_code=400, detail=f"Geçersiz çözünürlük. Seçenekler: {', '.join(RESOLUTIONS)}")
+
+    points = models.enhanced.get_learning_curve(user_id, resolution)
+    return {
+        "resolution": resolution,
+        "points": [
+            {**point, "timestamp": point["timestamp"].isoformat()}
+            for point in points
+        ]
+    }
+
 @router.get("/time-stats")
 def get_time_statistics(
     creds: HTTPAuthorizationCredentials = Depends(bearer),
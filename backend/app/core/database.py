@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -13,12 +13,24 @@ print(f"DEBUG: Database path: {db_path}")
 print(f"DEBUG: Database URL: {SQLALCHEMY_DATABASE_URL}")
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False, "timeout": 30}
 )
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # Birden çok worker aynı dosyaya yazar: WAL okuyucuları bloklamaz, kilit beklenir (SQLITE_BUSY yerine)
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA busy_timeout=30000")
+    cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+# Yerini kapsayan bir indekse bırakan eski indeksler (create_tables siler)
+OBSOLETE_INDEXES = ("ix_submissions_user_question",)
+
 def get_db():
     db = SessionLocal()
     try:
@@ -27,4 +39,11 @@ def get_db():
         db.close()
 
 def create_tables():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+    # create_all mevcut tablolara sonradan eklenen indeksleri oluşturmaz
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        for name in OBSOLETE_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
\ No newline at end of file
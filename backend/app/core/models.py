@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Float, Index
 from app.core.database import Base
 from datetime import datetime
 
@@ -33,6 +33,27 @@ class Questions(Base):
     zorluk = Column(Integer)
     etiket = Column(String)
 
+class QuestionCalibration(Base):
+    # Cevaplardan kestirilen soru parametreleri (app/services/item_calibration.py yazar)
+    __tablename__ = "question_calibration"
+    soru_id = Column(Integer, ForeignKey("questions.soru_id"), primary_key=True)
+    difficulty = Column(Float, nullable=False)
+    discrimination = Column(Float, nullable=False)
+    zorluk = Column(Integer, nullable=True)  # Kalibre 1-5 seviye; az cevaplanmış sorularda boş
+    responses = Column(Integer, nullable=False)
+    p_correct = Column(Float, nullable=False)
+    calibrated_at = Column(DateTime)
+
+class QuestionTag(Base):
+    # Normalleştirilmiş soru etiketleri (app/services/question_tags.py)
+    __tablename__ = "question_tags"
+    soru_id = Column(Integer, ForeignKey("questions.soru_id"), primary_key=True)
+    etiket = Column(String, primary_key=True)
+
+    __table_args__ = (
+        Index("ix_question_tags_etiket", "etiket"),
+    )
+
 class TestSession(Base):
     __tablename__ = "test_sessions"
     id = Column(Integer, primary_key=True, index=True)
@@ -55,4 +76,9 @@ class Submission(Base):
     selected = Column(String, nullable=True)
     is_correct = Column(Boolean, nullable=True)
     is_skipped = Column(Boolean, default=False)
-    answered_at = Column(DateTime)
\ No newline at end of file
+    answered_at = Column(DateTime)
+
+    __table_args__ = (
+        # Kullanıcının cevapladığı sorular ve doğruluk: /batch bağlam sorgusu tabloya gitmeden indeksten okur
+        Index("ix_submissions_user_question_correct", "user_id", "question_id", "is_correct"),
+    )
\ No newline at end of file
@@ -269,12 +269,27 @@ class AnswerIn(BaseModel):
 
 class PredictIn(BaseModel):
     user_id: int
-    ders_id: int
-    konu_id: int
-    altbaslik_id: int
-    zorluk: int
+    # soru_id verilirse ders/konu/zorluk katalogdan okunur (zorluk kalibre seviye);
+    # verilmezse istemcinin gönderdiği zorluk olduğu gibi kullanılır
+    soru_id: int | None = None
+    ders_id: int | None = None
+    konu_id: int | None = None
+    altbaslik_id: int | None = None
+    zorluk: int | None = None
     is_correct: bool | None = None
 
+class PredictQuestionIn(BaseModel):
+    # soru_id verilirse ders/konu/zorluk soru tablosundan okunur
+    soru_id: int | None = None
+    ders_id: int | None = None
+    konu_id: int | None = None
+    altbaslik_id: int | None = None
+    zorluk: int | None = None
+
+class PredictBatchIn(BaseModel):
+    questions: list[PredictQuestionIn] = []
+    soru_ids: list[int] = []
+
 class QuestionOut(BaseModel):
     soru_id: int
     ders_id: int
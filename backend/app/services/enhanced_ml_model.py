@@ -2,18 +2,29 @@ import os
 import pickle
 import numpy as np
 from datetime import datetime, timedelta
-from collections import defaultdict
 
 from river import compose, linear_model, preprocessing
 
+from app.services.learning_curve import LearningCurve
+from app.services.user_stats import (
+    UserStats, EMPTY_USER_STATS, CURRICULUM, DEFAULT_HALF_LIFE, SUBJECT, TOPIC, DIFFICULTY, decay_parameters
+)
+from app.services.user_stats_cache import UserStatsCache
+from app.services.user_stats_store import UserStatsStore
+
 class EnhancedPracticeModel:
-    def __init__(self):
-        self.model_path = os.path.join(os.path.dirname(__file__), "enhanced_model.pkl")
-        self.user_stats_path = os.path.join(os.path.dirname(__file__), "user_stats.pkl")
+    def __init__(self, storage_dir=None, cache_size=10_000, half_life=DEFAULT_HALF_LIFE, shared=False, stats_dir=None):
+        storage_dir = storage_dir or os.path.dirname(__file__)
+        # stats_dir: kullanıcı istatistikleri model dosyasından ayrı (sürümlenmeyen) bir dizinde olabilir
+        stats_dir = stats_dir or storage_dir
+        self.model_path = os.path.join(storage_dir, "enhanced_model.pkl")
+        self.user_stats_path = os.path.join(stats_dir, "user_stats.pkl")
+        self.store = UserStatsStore(os.path.join(stats_dir, "user_stats.db"), "enhanced_user_stats")
+        self.cache_size = cache_size
+        self.half_life = half_life  # Sayaçların yarı ömrü (cevap sayısı)
+        self.shared = shared  # Depo diğer worker süreçleriyle paylaşılıyor (bkz. SimpleAIModel)
         
         self.user_stats = self.load_user_stats()
-        self.data_cleanup_threshold = 1000  # Veri temizleme eşiği
-        self.data_cleanup_percentage = 0.25  # Silinecek veri yüzdesi (%25)
         
         if os.path.exists(self.model_path):
             try:
@@ -30,103 +41,66 @@ class EnhancedPracticeModel:
             self.create_enhanced_model()
     
     def load_user_stats(self):
-        if os.path.exists(self.user_stats_path):
-            try:
-                with open(self.user_stats_path, "rb") as f:
-                    return pickle.load(f)
-            except (EOFError, pickle.UnpicklingError, FileNotFoundError):
-                try:
-                    os.remove(self.user_stats_path)
-                except:
-                    pass
-                print("⚠️ Bozuk user_stats.pkl dosyası silindi, yeni dosya oluşturuluyor...")
+        # Eski user_stats.pkl varsa bir kereliğine SQLite deposuna taşı
+        if self.store.count() == 0:
+            self.store.migrate_from_pickle(self.user_stats_path, self._restore_user_data)
         
-        return defaultdict(self._create_user_data)
+        # Kullanıcılar ilk erişimde tek tek yüklenir; bellekte sadece son aktif olanlar tutulur
+        return UserStatsCache(self._load_user, capacity=self.cache_size)
+    
+    def _load_user(self, user_id):
+        data, version = self.store.load_versioned(user_id)
+        if data is None:
+            return None
+        data = self._restore_user_data(data)
+        data.version = version
+        return data
+    
+    def _restore_user_data(self, data):
+        """Depodan okunan veriyi kompakt kullanıcı kaydına çevir (eski dict düzeni dahil)"""
+        if not isinstance(data, UserStats):
+            data = UserStats.from_legacy(data, learning_curve=LearningCurve())
+        data.set_half_life(self.half_life)
+        return data
     
     def _create_user_data(self):
-        return {
-            'total_questions': 0,
-            'correct_answers': 0,
-            'subject_performance': defaultdict(self._create_performance_data),
-            'topic_performance': defaultdict(self._create_performance_data),
-            'difficulty_performance': defaultdict(self._create_performance_data),
-            'recent_performance': [],
-            'learning_curve': [],
-            'last_activity': None,
-            'question_history': [],  # Soru geçmişini takip etmek için
-            'last_cleanup_at': 0  # Son temizleme yapılan soru sayısı
-        }
+        return UserStats(learning_curve=LearningCurve(), half_life=self.half_life)
     
     def _create_performance_data(self):
+        # Eski pickle dosyalarındaki defaultdict'ler bu metoda referans verir; okuyabilmek için korunuyor
         return {'total': 0, 'correct': 0}
     
-    def save_user_stats(self):
-        with open(self.user_stats_path, "wb") as f:
-            pickle.dump(self.user_stats, f)
-    
-    def cleanup_old_data(self, user_id):
-        """Kullanıcı her 1000'in katına ulaştığında en eski %25 veriyi temizle"""
-        user_data = self.user_stats[user_id]
-        
-        # Her 1000'in katında temizleme yap
-        if user_data['total_questions'] > 0 and user_data['total_questions'] % self.data_cleanup_threshold == 0:
-            # Son temizleme yapılan yerden farklı olmalı
-            if user_data['last_cleanup_at'] != user_data['total_questions']:
-                print(f"🧹 Enhanced Model - Veri temizleme başlatılıyor - Kullanıcı {user_id}: {user_data['total_questions']} soru (1000'in katı)")
-                
-                # En eski %25 soruyu temizle
-                questions_to_remove = int(user_data['total_questions'] * self.data_cleanup_percentage)
-                
-                # Genel istatistikleri güncelle
-                user_data['total_questions'] -= questions_to_remove
-                
-                # Doğru cevap sayısını orantılı olarak azalt
-                overall_accuracy = user_data['correct_answers'] / (user_data['total_questions'] + questions_to_remove)
-                user_data['correct_answers'] = int(user_data['total_questions'] * overall_accuracy)
-                
-                # Konu bazlı performansı güncelle
-                for ders_id, subject_data in user_data['subject_performance'].items():
-                    if subject_data['total'] > 0:
-                        subject_accuracy = subject_data['correct'] / subject_data['total']
-                        remove_from_subject = min(questions_to_remove // len(user_data['subject_performance']), subject_data['total'])
-                        
-                        subject_data['total'] -= remove_from_subject
-                        subject_data['correct'] = int(subject_data['total'] * subject_accuracy)
-                
-                # Konu bazlı performansı güncelle
-                for topic_key, topic_data in user_data['topic_performance'].items():
-                    if topic_data['total'] > 0:
-                        topic_accuracy = topic_data['correct'] / topic_data['total']
-                        remove_from_topic = min(questions_to_remove // len(user_data['topic_performance']), topic_data['total'])
-                        
-                        topic_data['total'] -= remove_from_topic
-                        topic_data['correct'] = int(topic_data['total'] * topic_accuracy)
-                
-                # Zorluk bazlı performansı güncelle
-                for difficulty, diff_data in user_data['difficulty_performance'].items():
-                    if diff_data['total'] > 0:
-                        diff_accuracy = diff_data['correct'] / diff_data['total']
-                        remove_from_diff = min(questions_to_remove // len(user_data['difficulty_performance']), diff_data['total'])
-                        
-                        diff_data['total'] -= remove_from_diff
-                        diff_data['correct'] = int(diff_data['total'] * diff_accuracy)
-                
-                # Son performans listesini koru (en son 10 veri)
-                if len(user_data['recent_performance']) > 10:
-                    user_data['recent_performance'] = user_data['recent_performance'][-10:]
-                
-                # Öğrenme eğrisini güncelle (son 100 veri)
-                if len(user_data['learning_curve']) > 100:
-                    user_data['learning_curve'] = user_data['learning_curve'][-100:]
-                
-                # Son temizleme yapılan yeri kaydet
-                user_data['last_cleanup_at'] = user_data['total_questions'] + questions_to_remove
-                
-                print(f"✅ Enhanced Model - Veri temizleme tamamlandı - Kullanıcı {user_id}: {user_data['total_questions']} soru kaldı")
-                print(f"📊 Temizleme sonrası başarı oranı: %{user_data['correct_answers'] / user_data['total_questions'] * 100:.1f}")
-                
-                # Güncellenmiş verileri kaydet
-                self.save_user_stats()
+    def _get_user(self, user_id):
+        """Yazma için kullanıcı kaydını getir, yoksa oluştur"""
+        user_data = self.user_stats.get(user_id)
+        if user_data is None:
+            user_data = self._create_user_data()
+            self.user_stats[user_id] = user_data
+        return user_data
+    
+    def _peek_user(self, user_id):
+        """Okuma için kullanıcı kaydını getir; bilinmeyen kullanıcı için kayıt eklemez"""
+        user_data = self.user_stats.get(user_id, EMPTY_USER_STATS)
+        if self.shared and self.store.cached_version(user_id) != user_data.version:
+            # Başka bir worker satırı güncellemiş: yeni sürümü yükle
+            fresh = self._load_user(user_id)
+            if fresh is not None:
+                self.user_stats[user_id] = fresh
+                user_data = fresh
+        return user_data
+    
+    def save_user_stats(self, user_id=None):
+        """Sadece verilen kullanıcının satırını yaz; user_id yoksa bellekteki tüm kullanıcıları yaz"""
+        if user_id is None:
+            self.store.save_many(self.user_stats.resident_items())
+            return
+        user_data = self.user_stats.get(user_id)
+        if user_data is not None:
+            self.store.save(user_id, user_data)
+    
+    def decay_parameters(self):
+        """Sönümlü sayaçların ayarları"""
+        return decay_parameters(self.half_life)
     
     def create_enhanced_model(self):
         num_features = ['zorluk', 'user_accuracy', 'subject_accuracy', 'topic_accuracy', 'difficulty_accuracy']
@@ -144,7 +118,7 @@ class EnhancedPracticeModel:
         self.model = feature_pipeline | linear_model.LinearRegression()
     
     def extract_features(self, X, user_id):
-        user_data = self.user_stats[user_id]
+        user_data = self._peek_user(user_id)
         
         features = {
             'ders_id': X['ders_id'],
@@ -154,30 +128,11 @@ class EnhancedPracticeModel:
             'user_id': user_id
         }
         
-        total = user_data['total_questions']
-        if total > 0:
-            features['user_accuracy'] = user_data['correct_answers'] / total
-        else:
-            features['user_accuracy'] = 0.5
-        
-        subject_data = user_data['subject_performance'][X['ders_id']]
-        if subject_data['total'] > 0:
-            features['subject_accuracy'] = subject_data['correct'] / subject_data['total']
-        else:
-            features['subject_accuracy'] = 0.5
+        features['user_accuracy'] = user_data.overall_accuracy()
         
-        topic_key = (X['ders_id'], X['konu_id'])
-        topic_data = user_data['topic_performance'][topic_key]
-        if topic_data['total'] > 0:
-            features['topic_accuracy'] = topic_data['correct'] / topic_data['total']
-        else:
-            features['topic_accuracy'] = 0.5
-        
-        difficulty_data = user_data['difficulty_performance'][X['zorluk']]
-        if difficulty_data['total'] > 0:
-            features['difficulty_accuracy'] = difficulty_data['correct'] / difficulty_data['total']
-        else:
-            features['difficulty_accuracy'] = 0.5
+        features['subject_accuracy'] = user_data.accuracy(SUBJECT, X['ders_id'])
+        features['topic_accuracy'] = user_data.accuracy(TOPIC, (X['ders_id'], X['konu_id']))
+        features['difficulty_accuracy'] = user_data.accuracy(DIFFICULTY, X['zorluk'])
         
         return features
     
@@ -188,38 +143,24 @@ class EnhancedPracticeModel:
             features = self.extract_features(X, user_id)
             
             # Kullanıcı verilerini kontrol et
-            user_data = self.user_stats[user_id]
+            user_data = self._peek_user(user_id)
             
             # Model henüz eğitilmemişse varsayılan değer döndür
-            if user_data['total_questions'] == 0:
+            if user_data.total_questions == 0:
                 return 0.5
             
-            # Gerçek performans verilerini kullan
-            user_accuracy = user_data['correct_answers'] / user_data['total_questions']
+            # Gerçek performans verilerini kullan (sönümlü: yakın cevaplar daha ağır)
+            user_accuracy = user_data.overall_accuracy()
             
             # Konu bazlı performans
             ders_id = X.get('ders_id', 1)
             konu_id = X.get('konu_id', 1)
             zorluk = X.get('zorluk', 3)
             
-            # Ders bazlı performans
-            subject_data = user_data['subject_performance'][ders_id]
-            subject_accuracy = 0.5
-            if subject_data['total'] > 0:
-                subject_accuracy = subject_data['correct'] / subject_data['total']
-            
-            # Konu bazlı performans
-            topic_key = (ders_id, konu_id)
-            topic_data = user_data['topic_performance'][topic_key]
-            topic_accuracy = 0.5
-            if topic_data['total'] > 0:
-                topic_accuracy = topic_data['correct'] / topic_data['total']
-            
-            # Zorluk bazlı performans
-            difficulty_data = user_data['difficulty_performance'][zorluk]
-            difficulty_accuracy = 0.5
-            if difficulty_data['total'] > 0:
-                difficulty_accuracy = difficulty_data['correct'] / difficulty_data['total']
+            # Ders, konu ve zorluk bazlı performans
+            subject_accuracy = user_data.accuracy(SUBJECT, ders_id)
+            topic_accuracy = user_data.accuracy(TOPIC, (ders_id, konu_id))
+            difficulty_accuracy = user_data.accuracy(DIFFICULTY, zorluk)
             
             # Ağırlıklı performans hesaplama
             performance_score = (
@@ -249,15 +190,68 @@ class EnhancedPracticeModel:
             print(f"Enhanced ML Model prediction error: {e}")
             return self._get_fallback_prediction(X, user_id)
     
+    def predict_many(self, user_id, questions):
+        """Aday soruların hepsini tek NumPy geçişinde skorla (predict ile aynı formül)
+    
+        questions: ders_id, konu_id ve zorluk alanları olan nesneler (ör. Questions satırları) veya dict'ler.
+        """
+        def column(name):
+            values = (q.get(name) if isinstance(q, dict) else getattr(q, name) for q in questions)
+            return np.fromiter((-1 if v is None else v for v in values), dtype=np.int64, count=len(questions))
+    
+        return self.predict_arrays(user_id, column('ders_id'), column('konu_id'), column('zorluk'))
+    
+    def predict_arrays(self, user_id, ders_ids, konu_ids, zorluk):
+        """ders_id/konu_id/zorluk dizileri için skor dizisi; eksik değerler -1 olarak verilir"""
+        user_data = self._peek_user(user_id)
+        scores = np.full(len(ders_ids), 0.5)
+        if user_data.total_questions == 0 or len(ders_ids) == 0:
+            return scores
+    
+        user_accuracy = user_data.overall_accuracy()
+        table = user_data.accuracy_table()
+    
+        # Kullanıcıya ait değerler tek seferde hesaplanır, soru başına sadece tablo araması kalır
+        features = []
+        for kind, rows in (
+            (SUBJECT, CURRICULUM.rows_for(SUBJECT, ders_ids=ders_ids)),
+            (TOPIC, CURRICULUM.rows_for(TOPIC, ders_ids=ders_ids, konu_ids=konu_ids)),
+            (DIFFICULTY, CURRICULUM.rows_for(DIFFICULTY, zorluk=zorluk)),
+        ):
+            accuracy = table[np.maximum(rows, 0)]
+            # Izgara dışı anahtarlar (ör. konusu olmayan sorular) nadirdir; tek tek hesaplanır
+            for i in np.flatnonzero(rows < 0).tolist():
+                ders_id = int(ders_ids[i])
+                konu_id = int(konu_ids[i]) if konu_ids[i] >= 0 else None
+                if kind == SUBJECT:
+                    key = ders_id
+                elif kind == TOPIC:
+                    key = (ders_id, konu_id)
+                else:
+                    key = int(zorluk[i]) if zorluk[i] >= 0 else None
+                accuracy[i] = user_data.accuracy(kind, key)
+            features.append(accuracy)
+        subject_accuracy, topic_accuracy, difficulty_accuracy = features
+    
+        performance_score = (
+            user_accuracy * 0.2 +
+            subject_accuracy * 0.3 +
+            topic_accuracy * 0.4 +
+            difficulty_accuracy * 0.1
+        )
+        difficulty_factor = np.where(zorluk <= 2, 0.2, np.where(zorluk <= 4, 0.0, -0.2))
+        scores = np.clip(performance_score + difficulty_factor, 0.0, 1.0)
+    
+        # Zorluğu olmayan soruda predict hata verip varsayılan 0.5'e düşüyordu
+        scores[zorluk < 0] = 0.5
+        return scores
+    
     def _get_fallback_prediction(self, X, user_id):
         """Fallback tahmin değeri hesapla"""
-        user_data = self.user_stats[user_id]
+        user_data = self._peek_user(user_id)
         
         difficulty = X.get('zorluk', 3)
-        user_accuracy = 0.5
-        
-        if user_data['total_questions'] > 0:
-            user_accuracy = user_data['correct_answers'] / user_data['total_questions']
+        user_accuracy = user_data.overall_accuracy()
         
         if difficulty <= 2:
             base_score = 0.3
@@ -275,55 +269,71 @@ class EnhancedPracticeModel:
         
         return max(0.0, min(1.0, score))
     
-    def update(self, X, y):
-        """Modeli güncelle"""
+    def update(self, X, y, save=True):
+        """Modeli güncelle; save=False ise kaydı çağıran toplu yapar (save_user_stats)"""
         try:
             user_id = X.get('user_id', 1)
             
-            self.update_user_stats(user_id, X, y)
+            self.update_user_stats(user_id, X, y, save=save)
             
         except Exception as e:
             print(f"Model güncelleme hatası: {e}")
     
-    def update_user_stats(self, user_id, X, y):
+    def apply_answers(self, user_id, answers):
+        """Kullanıcının sıradaki cevaplarını işle ve satırını bir kez yaz"""
+        try:
+            if self.shared:
+                self._apply_shared(user_id, answers)
+                return
+            user_data = self._get_user(user_id)
+            for X, y in answers:
+                self._record(user_data, X, y)
+            self.save_user_stats(user_id)
+        except Exception as e:
+            print(f"Model güncelleme hatası: {e}")
+    
+    def _apply_shared(self, user_id, answers):
+        """Paylaşımlı depoda oku-değiştir-yaz tek yazma işleminde; diğer worker'ların güncellemeleri kaybolmaz"""
+        def apply(data):
+            user_data = self._restore_user_data(data) if data is not None else self._create_user_data()
+            for X, y in answers:
+                self._record(user_data, X, y)
+            return user_data
+        
+        user_data, version = self.store.update(user_id, apply)
+        user_data.version = version
+        self.user_stats[user_id] = user_data
+    
+    def update_user_stats(self, user_id, X, y, save=True):
         """Kullanıcı istatistiklerini güncelle"""
-        user_data = self.user_stats[user_id]
-        
-        user_data['total_questions'] += 1
-        if y:
-            user_data['correct_answers'] += 1
-        
-        subject_data = user_data['subject_performance'][X['ders_id']]
-        subject_data['total'] += 1
-        if y:
-            subject_data['correct'] += 1
-        
-        topic_key = (X['ders_id'], X['konu_id'])
-        topic_data = user_data['topic_performance'][topic_key]
-        topic_data['total'] += 1
-        if y:
-            topic_data['correct'] += 1
+        if self.shared:
+            # Paylaşımlı depoda güncelleme ile kayıt ayrılamaz
+            self._apply_shared(user_id, [(X, y)])
+            return
         
-        difficulty_data = user_data['difficulty_performance'][X['zorluk']]
-        difficulty_data['total'] += 1
-        if y:
-            difficulty_data['correct'] += 1
+        self._record(self._get_user(user_id), X, y)
         
-        user_data['recent_performance'].append(y)
-        if len(user_data['recent_performance']) > 10:
-            user_data['recent_performance'].pop(0)
-        
-        user_data['learning_curve'].append({
-            'timestamp': datetime.now(),
-            'accuracy': user_data['correct_answers'] / user_data['total_questions']
-        })
+        if save:
+            self.save_user_stats(user_id)
+    
+    def _record(self, user_data, X, y):
+        user_data.record(X['ders_id'], X['konu_id'], X['zorluk'], y)
         
-        user_data['last_activity'] = datetime.now()
+        user_data.recent_performance.append(y)
+        if len(user_data.recent_performance) > 10:
+            user_data.recent_performance.pop(0)
         
-        # Veri temizleme kontrolü
-        self.cleanup_old_data(user_id)
+        # Öğrenme eğrisi sabit boyutlu: son noktalar + saatlik/günlük/haftalık kovalar
+        user_data.learning_curve.append(datetime.now(), user_data.correct_answers / user_data.total_questions)
         
-        self.save_user_stats()
+        user_data.last_activity = datetime.now()
+    
+    def shutdown(self):
+        """Depo bağlantısını kapat"""
+        self.store.close()
+    
+    def get_cache_metrics(self):
+        return self.user_stats.metrics()
     
     def save_model(self):
         """Modeli kaydet"""
@@ -333,14 +343,18 @@ class EnhancedPracticeModel:
         except Exception as e:
             print(f"Model kaydetme hatası: {e}")
     
+    def get_learning_curve(self, user_id, resolution="recent"):
+        """Kullanıcının öğrenme eğrisi noktaları (recent, hourly, daily, weekly)"""
+        return self._peek_user(user_id).learning_curve.points(resolution)
+    
     def get_recommendations(self, user_id, ders_id, num_questions=5):
         """Kullanıcı için soru önerileri"""
-        user_data = self.user_stats[user_id]
+        user_data = self._peek_user(user_id)
         
         weak_topics = []
-        for (topic_ders_id, topic_id), data in user_data['topic_performance'].items():
-            if topic_ders_id == ders_id and data['total'] > 0:
-                accuracy = data['correct'] / data['total']
+        for (topic_ders_id, topic_id), total, correct in user_data.items(TOPIC):
+            if topic_ders_id == ders_id:
+                accuracy = correct / total
                 if accuracy < 0.6:
                     weak_topics.append({
                         'topic_id': topic_id,
@@ -363,41 +377,39 @@ class EnhancedPracticeModel:
     
     def get_user_insights(self, user_id):
         """Kullanıcı için içgörüler"""
-        user_data = self.user_stats[user_id]
+        user_data = self._peek_user(user_id)
         
-        if user_data['total_questions'] == 0:
+        if user_data.total_questions == 0:
             return {
                 'message': 'Henüz soru çözülmemiş',
                 'recommendations': ['İlk testinizi çözmeye başlayın!']
             }
         
-        overall_accuracy = user_data['correct_answers'] / user_data['total_questions']
+        overall_accuracy = user_data.correct_answers / user_data.total_questions
         
         best_subject = None
         best_accuracy = 0
-        for ders_id, data in user_data['subject_performance'].items():
-            if data['total'] > 0:
-                accuracy = data['correct'] / data['total']
-                if accuracy > best_accuracy:
-                    best_accuracy = accuracy
-                    best_subject = ders_id
+        for ders_id, total, correct in user_data.items(SUBJECT):
+            accuracy = correct / total
+            if accuracy > best_accuracy:
+                best_accuracy = accuracy
+                best_subject = ders_id
         
         worst_subject = None
         worst_accuracy = 1
-        for ders_id, data in user_data['subject_performance'].items():
-            if data['total'] > 0:
-                accuracy = data['correct'] / data['total']
-                if accuracy < worst_accuracy:
-                    worst_accuracy = accuracy
-                    worst_subject = ders_id
+        for ders_id, total, correct in user_data.items(SUBJECT):
+            accuracy = correct / total
+            if accuracy < worst_accuracy:
+                worst_accuracy = accuracy
+                worst_subject = ders_id
         
         recent_accuracy = 0
-        if len(user_data['recent_performance']) > 0:
-            recent_accuracy = sum(user_data['recent_performance']) / len(user_data['recent_performance'])
+        if len(user_data.recent_performance) > 0:
+            recent_accuracy = sum(user_data.recent_performance) / len(user_data.recent_performance)
         
         insights = {
             'overall_accuracy': overall_accuracy,
-            'total_questions': user_data['total_questions'],
+            'total_questions': user_data.total_questions,
             'best_subject': best_subject,
             'best_accuracy': best_accuracy,
             'worst_subject': worst_subject,
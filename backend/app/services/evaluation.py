@@ -0,0 +1,316 @@
+"""
+Tahmin topluluğunun (SimpleAIModel, EnhancedPracticeModel ve
+combine_predictions) çevrimdışı değerlendirmesi.
+
+Cevaplar zaman sırasıyla oynatılır: her cevap için önce tahminler alınır,
+sonra cevap modellere işlenir (önce tahmin et, sonra öğren). Her tahminci
+için log-loss, Brier skoru, kalibrasyon eğrisi ve deneyim aralıklarına
+göre skorlar; her çağrı türü için gecikme yüzdelikleri raporlanır.
+Kaynak submissions tablosu veya boyutu ayarlanabilir sentetik veridir.
+--json ile kaydedilen sonuçlar commitler arasında karşılaştırılabilir.
+
+Kullanım (backend dizininden):
+    python -m app.services.evaluation --synthetic 20000
+    python -m app.services.evaluation --synthetic 100000 --users 2000 --seed 3 --json sonuc.json
+    python -m app.services.evaluation --db app/core/database.db --limit 50000
+    python -m app.services.evaluation --db app/core/database.db --calibrated
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.item_calibration import calibrated_zorluk_sql
+from app.services.model_registry import ModelRegistry
+from app.services.predictions import (
+    get_simple_model_prediction, get_enhanced_model_prediction, combine_predictions
+)
+from app.services.user_stats import DEFAULT_HALF_LIFE
+
+# Tahminler yüzde tamsayı; 0 ve 100 log-loss'u sonsuz yapmasın diye bir yüzde puanına kırpılır
+PROBABILITY_FLOOR = 0.01
+CALIBRATION_BINS = 10
+# combine_predictions ağırlıklarının değiştiği soru sayısı eşikleri
+EXPERIENCE_BUCKETS = ((0, 10), (10, 30), (30, None))
+LATENCY_PERCENTILES = (50, 90, 99)
+PREDICTORS = ("simple", "enhanced", "combined", "base_rate")
+
+# Sıra replay ile aynı: birincil anahtar (ekleme sırası = cevap sırası).
+# Atlanan sorular (is_correct NULL) skorlanamaz, oynatmaya alınmaz.
+EVALUATION_QUERY = """
+SELECT s.user_id,
+       q.ders_id,
+       q.konu_id,
+       q.altbaslik_id,
+       {zorluk},
+       s.is_correct
+FROM submissions s
+JOIN questions q ON q.soru_id = s.question_id
+{calibration_join}
+WHERE s.user_id IS NOT NULL AND s.is_correct IS NOT NULL
+ORDER BY s.id
+"""
+
+
+def submission_answers(db_path, limit=None, calibrated=False):
+    """submissions tablosundaki cevaplar: (user_id, X, is_correct)
+
+    calibrated: zorluk olarak (varsa) question_calibration'daki kalibre seviye
+    kullanılır. Kalibrasyon aynı cevaplardan kestirildiği için sonuç biraz iyimserdir.
+    """
+    conn = sqlite3.connect(db_path)
+    zorluk, calibration_join = calibrated_zorluk_sql(conn) if calibrated else ("q.zorluk", "")
+    query = EVALUATION_QUERY.format(zorluk=zorluk, calibration_join=calibration_join) + (f" LIMIT {int(limit)}" if limit else "")
+    try:
+        for user_id, ders_id, konu_id, altbaslik_id, zorluk, is_correct in conn.execute(query):
+            X = {
+                "ders_id": ders_id,
+                "konu_id": konu_id,
+                "altbaslik_id": altbaslik_id,
+                "zorluk": zorluk,
+                "user_id": user_id,
+            }
+            yield user_id, X, int(bool(is_correct))
+    finally:
+        conn.close()
+
+
+def synthetic_answers(num_answers, num_users=500, num_questions=400, seed=0):
+    """Gizli yetenekli kullanıcılardan sentetik cevap akışı: (user_id, X, is_correct)
+
+    Doğru cevap olasılığı lojistik: kullanıcı yeteneği + kullanıcının konuya
+    özel farkı - soru zorluğu + pratikle artan öğrenme. Kullanıcıların
+    etkinliği dengesizdir; bir kısmı çok, çoğu az soru çözer.
+    """
+    rng = np.random.default_rng(seed)
+    ders_ids = rng.integers(1, 7, num_questions)
+    konu_ids = rng.integers(1, 4, num_questions)
+    altbaslik_ids = rng.integers(1, 5, num_questions)
+    zorluk = rng.integers(1, 6, num_questions)
+
+    skill = rng.normal(0.0, 1.0, num_users)
+    topic_offset = rng.normal(0.0, 0.7, (num_users, 7, 4))
+    activity = rng.pareto(1.5, num_users) + 0.1
+    user_picks = rng.choice(num_users, size=num_answers, p=activity / activity.sum())
+    question_picks = rng.integers(0, num_questions, num_answers)
+    noise = rng.random(num_answers)
+    practice = np.zeros((num_users, 7, 4))
+
+    for i in range(num_answers):
+        u, q = int(user_picks[i]), int(question_picks[i])
+        d, k, z = int(ders_ids[q]), int(konu_ids[q]), int(zorluk[q])
+        logit = skill[u] + topic_offset[u, d, k] - 0.6 * (z - 3) + 0.8 * (1 - math.exp(-practice[u, d, k] / 30))
+        practice[u, d, k] += 1
+        X = {"ders_id": d, "konu_id": k, "altbaslik_id": int(altbaslik_ids[q]), "zorluk": z, "user_id": u + 1}
+        yield u + 1, X, int(noise[i] < 1 / (1 + math.exp(-logit)))
+
+
+def score(probabilities, outcomes, bins=CALIBRATION_BINS):
+    """Olasılık tahminleri için log-loss, Brier, doğruluk ve kalibrasyon eğrisi"""
+    p = np.clip(np.asarray(probabilities, dtype=np.float64), PROBABILITY_FLOOR, 1 - PROBABILITY_FLOOR)
+    y = np.asarray(outcomes, dtype=np.float64)
+    if len(y) == 0:
+        return {"count": 0}
+
+    edges = np.linspace(0.0, 1.0, bins + 1)
+    bin_of = np.minimum(np.searchsorted(edges, p, side="right") - 1, bins - 1)
+    counts = np.bincount(bin_of, minlength=bins)
+    predicted = np.bincount(bin_of, weights=p, minlength=bins)
+    observed = np.bincount(bin_of, weights=y, minlength=bins)
+    filled = counts > 0
+    calibration = [
+        {
+            "bin_lower": round(float(edges[i]), 3),
+            "bin_upper": round(float(edges[i + 1]), 3),
+            "count": int(counts[i]),
+            "mean_predicted": float(predicted[i] / counts[i]),
+            "observed_rate": float(observed[i] / counts[i]),
+        }
+        for i in np.flatnonzero(filled).tolist()
+    ]
+    return {
+        "count": int(len(y)),
+        "log_loss": float(-np.mean(y * np.log(p) + (1 - y) * np.log(1 - p))),
+        "brier": float(np.mean((p - y) ** 2)),
+        "accuracy": float(np.mean((p >= 0.5) == (y == 1))),
+        "mean_predicted": float(p.mean()),
+        "base_rate": float(y.mean()),
+        # Beklenen kalibrasyon hatası: kovalardaki |ortalama tahmin - gerçek oran|, kova boyutuyla ağırlıklı
+        "ece": float(np.abs(predicted[filled] - observed[filled]).sum() / len(y)),
+        "calibration": calibration,
+    }
+
+
+def latency_summary(seconds):
+    values = np.asarray(seconds, dtype=np.float64) * 1e6
+    if len(values) == 0:
+        return {"calls": 0}
+    summary = {"calls": int(len(values)), "mean_us": float(values.mean())}
+    for percentile in LATENCY_PERCENTILES:
+        summary[f"p{percentile}_us"] = float(np.percentile(values, percentile))
+    return summary
+
+
+def evaluate(answers, half_life=DEFAULT_HALF_LIFE, bins=CALIBRATION_BINS):
+    """Cevapları sırayla oynat: her cevapta önce tahmin, sonra güncelleme; metrikleri döndür
+
+    Modeller boş geçici bir dizinde sıfırdan başlar; canlı model dosyalarına dokunulmaz.
+    """
+    predictions = {name: [] for name in PREDICTORS}
+    outcomes = []
+    experience = []
+    users = set()
+    latencies = {name: [] for name in ("simple", "enhanced", "combine", "table", "update")}
+    answered_total = 0
+    answered_correct = 0
+    perf_counter = time.perf_counter
+
+    started = perf_counter()
+    with tempfile.TemporaryDirectory() as storage_dir, open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull):
+        registry = ModelRegistry(storage_dir=storage_dir, async_updates=False, shared_state=False)
+        registry.simple.half_life = registry.enhanced.half_life = half_life
+        try:
+            for user_id, X, y in answers:
+                users.add(user_id)
+                experience.append(registry.simple._peek_user(user_id).total_questions)
+
+                t0 = perf_counter()
+                simple_pred = get_simple_model_prediction(registry.simple, user_id, X)
+                t1 = perf_counter()
+                enhanced_pred = get_enhanced_model_prediction(registry.enhanced, user_id, X)
+                t2 = perf_counter()
+                combined_pred = combine_predictions(registry.simple, simple_pred, enhanced_pred, user_id, X)
+                t3 = perf_counter()
+                # Canlı /answers/predict yolu: önceden hesaplanmış tablo okuması
+                registry.predictions.predict(user_id, X)
+                t4 = perf_counter()
+                registry.apply_answers(user_id, [(X, y)])
+                t5 = perf_counter()
+
+                latencies["simple"].append(t1 - t0)
+                latencies["enhanced"].append(t2 - t1)
+                latencies["combine"].append(t3 - t2)
+                latencies["table"].append(t4 - t3)
+                latencies["update"].append(t5 - t4)
+
+                predictions["simple"].append(simple_pred / 100)
+                predictions["enhanced"].append(enhanced_pred / 100)
+                predictions["combined"].append(combined_pred / 100)
+                # Karşılaştırma tabanı: o ana kadarki tüm cevapların doğru oranı
+                predictions["base_rate"].append((answered_correct + 1) / (answered_total + 2))
+                outcomes.append(y)
+                answered_total += 1
+                answered_correct += y
+        finally:
+            registry.shutdown()
+    elapsed = perf_counter() - started
+
+    outcomes = np.asarray(outcomes)
+    experience = np.asarray(experience)
+    by_experience = {}
+    for low, high in EXPERIENCE_BUCKETS:
+        mask = (experience >= low) & (experience < high if high is not None else True)
+        label = f"{low}-{high - 1}" if high is not None else f"{low}+"
+        by_experience[label] = {
+            name: {key: value for key, value in score(np.asarray(values)[mask], outcomes[mask], bins).items()
+                   if key != "calibration"}
+            for name, values in predictions.items()
+        }
+
+    return {
+        "answers": int(len(outcomes)),
+        "users": len(users),
+        "half_life": half_life,
+        "elapsed_seconds": elapsed,
+        "metrics": {name: score(values, outcomes, bins) for name, values in predictions.items()},
+        "by_experience": by_experience,
+        "latency": {name: latency_summary(values) for name, values in latencies.items()},
+    }
+
+
+def format_report(result):
+    lines = [
+        f"📊 {result['answers']:,} cevap, {result['users']:,} kullanıcı, yarı ömür {result['half_life']} cevap ({result['elapsed_seconds']:.1f} sn)",
+        f"{'tahminci':>10} | {'log-loss':>8} | {'Brier':>6} | {'doğruluk':>8} | {'ECE':>6} | {'ort. tahmin':>11} | {'gerçek':>6}",
+    ]
+    for name, metrics in result["metrics"].items():
+        if not metrics["count"]:
+            continue
+        lines.append(
+            f"{name:>10} | {metrics['log_loss']:8.4f} | {metrics['brier']:6.4f} | {metrics['accuracy']:8.3f} | "
+            f"{metrics['ece']:6.4f} | {metrics['mean_predicted']:11.3f} | {metrics['base_rate']:6.3f}"
+        )
+
+    lines.append("Deneyime göre log-loss (cevap anındaki soru sayısı):")
+    for label, bucket in result["by_experience"].items():
+        combined = bucket["combined"]
+        if not combined["count"]:
+            continue
+        scores = ", ".join(f"{name} {metrics['log_loss']:.4f}" for name, metrics in bucket.items())
+        lines.append(f"  {label:>6} ({combined['count']:,} cevap): {scores}")
+
+    lines.append("Birleşik tahmin kalibrasyonu (kova: ort. tahmin → gerçek oran, adet):")
+    for row in result["metrics"]["combined"].get("calibration", []):
+        lines.append(
+            f"  [{row['bin_lower']:.1f}, {row['bin_upper']:.1f}): {row['mean_predicted']:.3f} → "
+            f"{row['observed_rate']:.3f} ({row['count']:,})"
+        )
+
+    lines.append(f"{'çağrı':>10} | {'ort. µs':>8} | " + " | ".join(f"{f'p{p} µs':>8}" for p in LATENCY_PERCENTILES))
+    for name, summary in result["latency"].items():
+        if not summary["calls"]:
+            continue
+        lines.append(
+            f"{name:>10} | {summary['mean_us']:8.1f} | "
+            + " | ".join(f"{summary[f'p{p}_us']:8.1f}" for p in LATENCY_PERCENTILES)
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tahmin topluluğunu geçmiş veya sentetik cevaplarla değerlendir")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--db", default=None, help="SQLite veritabanı yolu (varsayılan: app/core/database.db)")
+    source.add_argument("--synthetic", type=int, default=None, metavar="N", help="N sentetik cevap üret")
+    parser.add_argument("--users", type=int, default=500, help="Sentetik kullanıcı sayısı")
+    parser.add_argument("--seed", type=int, default=0, help="Sentetik veri tohumu")
+    parser.add_argument("--limit", type=int, default=None, help="Veritabanından en fazla bu kadar cevap oku")
+    parser.add_argument("--calibrated", action="store_true", help="Veritabanındaki kalibre zorluk seviyelerini kullan")
+    parser.add_argument("--half-life", type=float, default=DEFAULT_HALF_LIFE, help="Sayaçların yarı ömrü (cevap sayısı)")
+    parser.add_argument("--bins", type=int, default=CALIBRATION_BINS, help="Kalibrasyon kovası sayısı")
+    parser.add_argument("--json", default=None, help="Sonuçları bu dosyaya JSON olarak yaz")
+    args = parser.parse_args(argv)
+
+    if args.synthetic is not None:
+        answers = synthetic_answers(args.synthetic, num_users=args.users, seed=args.seed)
+    else:
+        db_path = args.db
+        if db_path is None:
+            from app.core.database import db_path
+        answers = submission_answers(db_path, limit=args.limit, calibrated=args.calibrated)
+
+    result = evaluate(answers, half_life=args.half_life, bins=args.bins)
+    if args.synthetic is not None:
+        result["source"] = {"synthetic": args.synthetic, "users": args.users, "seed": args.seed}
+    else:
+        result["source"] = {"db": db_path, "limit": args.limit, "calibrated": args.calibrated}
+
+    if result["answers"] == 0:
+        print("ℹ️ Değerlendirilecek cevap yok")
+        return
+    print(format_report(result))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"✅ Sonuçlar {args.json} dosyasına yazıldı")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,415 @@
+"""
+Soru zorluğunun cevaplardan kalibrasyonu (Rasch / 2PL madde tepki kuramı).
+
+Questions.zorluk elle verilmiş 1-5 etiketidir. Bu iş tüm submissions
+satırlarından her soru için ampirik zorluk (b) ve ayırt edicilik (a)
+tahmin eder: P(doğru) = 1 / (1 + exp(-a * (yetenek - b))). Kullanıcı
+yetenekleri ve soru parametreleri birlikte, öncüllerle düzenlenmiş (MAP)
+blok-köşegen Newton adımlarıyla NumPy'da vektörel olarak kestirilir.
+Elle verilmiş zorluk b'nin öncül ortalamasıdır: az cevaplanan sorular
+etiketlerine yakın kalır.
+
+Bellek sınırlıdır: cevaplar veritabanından parça parça okunup geçici bir
+disk dizisine (memmap) yoğun indekslerle yazılır, her iterasyon bu
+dosyayı parça parça geçer. Bellekte sadece kullanıcı ve soru başına
+diziler ile bir parça tutulur; satır sayısı milyonlarca olabilir.
+
+Sonuçlar question_calibration tablosuna yazılır. Yeterince cevaplanmış
+sorulara b sırasına göre 1-5 arası kalibre edilmiş bir seviye verilir;
+seviyelerin dağılımı elle verilen etiketlerinkiyle aynı tutulur, böylece
+kolay/orta/zor dengesi değişmez. Tahminciler ve soru seçici bu seviyeyi
+(varsa) elle verilen zorluk yerine kullanır. Modellerin zorluk sayaçları
+cevap anındaki seviyeyle kaydedilir; seviyeler değişince eski cevapların
+sayaçları eski seviyede kalır. Bunları yeni seviyelere taşımak için
+kalibrasyondan sonra istatistikler cevaplardan yeniden oluşturulur
+(python -m app.services.replay, kalibre seviyeleri kullanır).
+
+Kullanım (backend dizininden):
+    python -m app.services.item_calibration
+    python -m app.services.item_calibration --model rasch --min-responses 50 --dry-run
+    python -m app.services.item_calibration --db app/core/database.db --chunk-size 500000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.services.question_catalog import invalidate_question_catalog
+from app.services.user_stats import DIFFICULTY_LEVELS
+
+CALIBRATION_TABLE = "question_calibration"
+CHUNK_SIZE = 500_000
+MIN_RESPONSES = 30  # Kalibre seviye verilmesi için en az cevap sayısı
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-3    # Tüm parametrelerde en büyük adım bunun altına inince dur
+MAX_STEP = 1.0      # Newton adımı kırpması (logit ölçeğinde)
+MODELS = ("2pl", "rasch")
+
+# Öncüller: yetenek ~ N(0, 1), b ~ N(elle zorluk → logit, 1), log(a) ~ N(0, 0.5²)
+THETA_PRIOR_VAR = 1.0
+DIFFICULTY_PRIOR_VAR = 1.0
+DIFFICULTY_PRIOR_PER_LEVEL = 0.5  # Elle verilen her zorluk seviyesi öncül ortalamada 0.5 logit
+LOG_DISCRIMINATION_PRIOR_VAR = 0.25
+
+# Atlanan ya da sonucu olmayan cevaplar kalibrasyona girmez
+RESPONSE_FILTER = """
+FROM submissions
+WHERE user_id IS NOT NULL AND question_id IS NOT NULL
+  AND is_correct IS NOT NULL AND COALESCE(is_skipped, 0) = 0
+"""
+
+RESPONSE_DTYPE = np.dtype([("user", np.int32), ("item", np.int32), ("correct", np.int8)])
+
+CALIBRATION_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {CALIBRATION_TABLE} (
+    soru_id INTEGER PRIMARY KEY,
+    difficulty REAL NOT NULL,
+    discrimination REAL NOT NULL,
+    zorluk INTEGER,
+    responses INTEGER NOT NULL,
+    p_correct REAL NOT NULL,
+    calibrated_at DATETIME,
+    FOREIGN KEY (soru_id) REFERENCES questions (soru_id)
+)
+"""
+
+
+class ResponseFile:
+    """Cevapların (kullanıcı indeksi, soru indeksi, doğru) disk dizisi ve indeks eşlemeleri"""
+
+    def __init__(self, path, user_ids, item_ids, size):
+        self.path = path
+        self.user_ids = user_ids
+        self.item_ids = item_ids
+        self.size = size
+        self.rows = np.memmap(path, dtype=RESPONSE_DTYPE, mode="r", shape=(size,)) if size else np.zeros(0, RESPONSE_DTYPE)
+
+    def chunks(self, chunk_size):
+        for start in range(0, self.size, chunk_size):
+            chunk = self.rows[start:start + chunk_size]
+            yield chunk["user"], chunk["item"], chunk["correct"]
+
+    def close(self):
+        # memmap'i bırak; dosya geçici dizinle birlikte silinir
+        self.rows = None
+
+
+def read_responses(conn, path, chunk_size=CHUNK_SIZE):
+    """Cevapları tek okuma işleminde (tutarlı anlık görüntü) diske yoğun indekslerle yaz"""
+    conn.execute("BEGIN")
+    try:
+        user_ids = np.array([row[0] for row in conn.execute(f"SELECT DISTINCT user_id {RESPONSE_FILTER} ORDER BY user_id")], dtype=np.int64)
+        item_ids = np.array([row[0] for row in conn.execute(f"SELECT DISTINCT question_id {RESPONSE_FILTER} ORDER BY question_id")], dtype=np.int64)
+        size = conn.execute(f"SELECT COUNT(*) {RESPONSE_FILTER}").fetchone()[0]
+        if size:
+            rows = np.memmap(path, dtype=RESPONSE_DTYPE, mode="w+", shape=(size,))
+            cursor = conn.execute(f"SELECT user_id, question_id, is_correct {RESPONSE_FILTER}")
+            written = 0
+            while True:
+                chunk = cursor.fetchmany(chunk_size)
+                if not chunk:
+                    break
+                users, items, correct = np.array(chunk, dtype=np.int64).T
+                end = written + len(chunk)
+                rows["user"][written:end] = np.searchsorted(user_ids, users)
+                rows["item"][written:end] = np.searchsorted(item_ids, items)
+                rows["correct"][written:end] = correct != 0
+                written = end
+            rows.flush()
+            del rows
+    finally:
+        conn.rollback()
+    return ResponseFile(path, user_ids, item_ids, size)
+
+
+def _log_sigmoid(z):
+    return -np.logaddexp(0.0, -z)
+
+
+def _person_pass(responses, theta, difficulty, discrimination, chunk_size):
+    """Kullanıcı başına gradyan ve Fisher bilgisi; ayrıca toplam log-olabilirlik"""
+    num_users = len(theta)
+    gradient = np.zeros(num_users)
+    information = np.zeros(num_users)
+    log_likelihood = 0.0
+    for users, items, correct in responses.chunks(chunk_size):
+        a = discrimination[items]
+        z = a * (theta[users] - difficulty[items])
+        p = np.exp(_log_sigmoid(z))
+        gradient += np.bincount(users, a * (correct - p), minlength=num_users)
+        information += np.bincount(users, a * a * p * (1.0 - p), minlength=num_users)
+        log_likelihood += float(np.where(correct != 0, _log_sigmoid(z), _log_sigmoid(-z)).sum())
+    return gradient, information, log_likelihood
+
+
+def _item_pass(responses, theta, difficulty, discrimination, chunk_size, parameter):
+    """Soru başına b ("difficulty") veya log(a) ("discrimination") için gradyan ve Fisher bilgisi"""
+    num_items = len(difficulty)
+    gradient = np.zeros(num_items)
+    information = np.zeros(num_items)
+    for users, items, correct in responses.chunks(chunk_size):
+        a = discrimination[items]
+        z = a * (theta[users] - difficulty[items])
+        p = np.exp(_log_sigmoid(z))
+        residual = correct - p
+        if parameter == "difficulty":
+            gradient -= np.bincount(items, a * residual, minlength=num_items)
+            information += np.bincount(items, a * a * p * (1.0 - p), minlength=num_items)
+        else:
+            gradient += np.bincount(items, residual * z, minlength=num_items)
+            information += np.bincount(items, p * (1.0 - p) * z * z, minlength=num_items)
+    return gradient, information
+
+
+def _newton_step(gradient, information, value, prior_mean, prior_var):
+    """Normal öncüllü (MAP) tek boyutlu Newton adımı, kırpılmış"""
+    step = (gradient - (value - prior_mean) / prior_var) / (information + 1.0 / prior_var)
+    return np.clip(step, -MAX_STEP, MAX_STEP)
+
+
+def _align(theta, difficulty, log_discrimination, difficulty_prior, estimate_discrimination):
+    """Olasılığı değiştirmeyen kaydırma ve (2PL'de) ölçek yönlerinde öncülleri en iyile.
+
+    a * (yetenek - b) hem yetenek ve b'ye aynı sabiti eklemekle hem de
+    yetenek ve b'yi s ile çarpıp a'yı s'ye bölmekle değişmez. Bu yönleri
+    sadece öncüller belirler; Newton adımları onları çok yavaş bulur
+    (yetenek yayılımı küçülürken a büyür). Kaydırma kapalı biçimde, ölçek
+    tek boyutlu Newton ile doğrudan optimuma getirilir; veri geçişi gerekmez.
+    """
+    shift = -(theta.sum() / THETA_PRIOR_VAR + (difficulty - difficulty_prior).sum() / DIFFICULTY_PRIOR_VAR) / (
+        len(theta) / THETA_PRIOR_VAR + len(difficulty) / DIFFICULTY_PRIOR_VAR
+    )
+    theta += shift
+    difficulty += shift
+    if not estimate_discrimination:
+        return
+
+    theta_energy = float((theta * theta).sum()) / THETA_PRIOR_VAR
+    log_scale = 0.0
+    for _ in range(20):
+        scale = np.exp(log_scale)
+        scaled = scale * difficulty
+        first = (-theta_energy * scale * scale - ((scaled - difficulty_prior) * scaled).sum() / DIFFICULTY_PRIOR_VAR
+                 + (log_discrimination - log_scale).sum() / LOG_DISCRIMINATION_PRIOR_VAR)
+        second = (-2.0 * theta_energy * scale * scale - ((2.0 * scaled - difficulty_prior) * scaled).sum() / DIFFICULTY_PRIOR_VAR
+                  - len(log_discrimination) / LOG_DISCRIMINATION_PRIOR_VAR)
+        step = float(np.clip(-first / second, -0.5, 0.5)) if second < 0 else 0.0
+        log_scale += step
+        if abs(step) < 1e-10:
+            break
+    scale = np.exp(log_scale)
+    theta *= scale
+    difficulty *= scale
+    log_discrimination -= log_scale
+
+
+def fit(responses, difficulty_prior, model="2pl", chunk_size=CHUNK_SIZE, max_iterations=MAX_ITERATIONS, tolerance=TOLERANCE):
+    """Yetenek, zorluk ve ayırt ediciliği birlikte kestir.
+
+    Her iterasyonda parametre blokları sırayla, her biri cevap dosyasının
+    bir geçişiyle Newton adımı atar: yetenekler, zorluklar, (2PL'de)
+    ayırt edicilikler. Blokları aynı geçişte güncellemek aynı hatayı iki
+    kez düzeltip salınır. Gradyan ve Fisher bilgisi np.bincount ile
+    biriktirilir; her iterasyonun sonunda _align olasılığın değişmediği
+    yönleri düzeltir.
+    """
+    num_users, num_items = len(responses.user_ids), len(responses.item_ids)
+    theta = np.zeros(num_users)
+    difficulty = difficulty_prior.astype(np.float64).copy()
+    log_discrimination = np.zeros(num_items)
+    estimate_discrimination = model == "2pl"
+
+    history = []
+    iterations = 0
+    largest_step = float("inf")
+    for iterations in range(1, max_iterations + 1):
+        discrimination = np.exp(log_discrimination)
+        g_theta, h_theta, log_likelihood = _person_pass(responses, theta, difficulty, discrimination, chunk_size)
+        theta_step = _newton_step(g_theta, h_theta, theta, 0.0, THETA_PRIOR_VAR)
+        theta += theta_step
+        history.append(log_likelihood)
+
+        g_b, h_b = _item_pass(responses, theta, difficulty, discrimination, chunk_size, "difficulty")
+        steps = [theta_step, _newton_step(g_b, h_b, difficulty, difficulty_prior, DIFFICULTY_PRIOR_VAR)]
+        difficulty += steps[1]
+        if estimate_discrimination:
+            g_a, h_a = _item_pass(responses, theta, difficulty, discrimination, chunk_size, "discrimination")
+            steps.append(_newton_step(g_a, h_a, log_discrimination, 0.0, LOG_DISCRIMINATION_PRIOR_VAR))
+            log_discrimination += steps[2]
+        _align(theta, difficulty, log_discrimination, difficulty_prior, estimate_discrimination)
+
+        largest_step = max((float(np.abs(step).max()) for step in steps if step.size), default=0.0)
+        if largest_step < tolerance:
+            break
+
+    return {
+        "theta": theta,
+        "difficulty": difficulty,
+        "discrimination": np.exp(log_discrimination),
+        "iterations": iterations,
+        "log_likelihood": history,
+        "converged": largest_step < tolerance,
+    }
+
+
+def calibrated_levels_from_difficulty(difficulty, hand_levels, eligible):
+    """b sırasına göre 1-5 seviyeleri; her seviyedeki soru sayısı elle verilen etiketlerdeki kadar"""
+    levels = np.zeros(len(difficulty), dtype=np.int64)
+    indices = np.flatnonzero(eligible)
+    if not len(indices):
+        return levels
+    order = indices[np.argsort(difficulty[indices], kind="stable")]
+    counts = [int(np.count_nonzero(hand_levels[indices] == level)) for level in DIFFICULTY_LEVELS]
+    # Izgara dışı elle etiketler (ör. boş) orta seviyeye sayılır
+    counts[len(counts) // 2] += len(indices) - sum(counts)
+    levels[order] = np.repeat(DIFFICULTY_LEVELS, counts)
+    return levels
+
+
+def difficulty_prior_from_levels(hand_levels):
+    middle = DIFFICULTY_LEVELS[len(DIFFICULTY_LEVELS) // 2]
+    return (np.where(hand_levels > 0, hand_levels, middle) - middle) * DIFFICULTY_PRIOR_PER_LEVEL
+
+
+def save_calibration(conn, rows):
+    """Tabloyu tek işlemde yeni sonuçlarla değiştir; okuyucular eski ya da yeni halin tamamını görür"""
+    conn.execute(CALIBRATION_TABLE_SQL)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(f"DELETE FROM {CALIBRATION_TABLE}")
+        conn.executemany(
+            f"INSERT INTO {CALIBRATION_TABLE} "
+            "(soru_id, difficulty, discrimination, zorluk, responses, p_correct, calibrated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def calibrate(db_path=None, model="2pl", min_responses=MIN_RESPONSES, chunk_size=CHUNK_SIZE,
+              max_iterations=MAX_ITERATIONS, dry_run=False):
+    """Tüm cevaplardan soru parametrelerini kestir ve question_calibration tablosuna yaz"""
+    if model not in MODELS:
+        raise ValueError(f"Bilinmeyen model: {model}")
+    if db_path is None:
+        from app.core.database import db_path
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            responses = read_responses(conn, os.path.join(workdir, "responses.bin"), chunk_size)
+            read_seconds = time.perf_counter() - started
+            try:
+                hand = dict(conn.execute("SELECT soru_id, COALESCE(zorluk, 0) FROM questions"))
+                hand_levels = np.array([hand.get(int(soru_id), 0) for soru_id in responses.item_ids], dtype=np.int64)
+                num_items = len(responses.item_ids)
+                counts = np.zeros(num_items, dtype=np.int64)
+                corrects = np.zeros(num_items, dtype=np.int64)
+                for _, items, correct in responses.chunks(chunk_size):
+                    counts += np.bincount(items, minlength=num_items)
+                    corrects += np.bincount(items, correct, minlength=num_items).astype(np.int64)
+
+                result = fit(responses, difficulty_prior_from_levels(hand_levels), model, chunk_size, max_iterations)
+            finally:
+                responses.close()
+
+        eligible = counts >= min_responses
+        levels = calibrated_levels_from_difficulty(result["difficulty"], hand_levels, eligible)
+        calibrated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")
+        rows = [
+            (int(soru_id), float(b), float(a), int(level) if ok else None, int(n), float(c / n), calibrated_at)
+            for soru_id, b, a, level, ok, n, c in zip(
+                responses.item_ids, result["difficulty"], result["discrimination"], levels, eligible, counts, corrects
+            )
+        ]
+        if not dry_run:
+            save_calibration(conn, rows)
+            # Soru kataloğu kalibre seviyeleri taşır; çalışan sunucular yeniden yükler
+            invalidate_question_catalog(db_path)
+    finally:
+        conn.close()
+
+    changed = int(np.count_nonzero(eligible & (levels != hand_levels)))
+    return {
+        "responses": responses.size,
+        "users": len(responses.user_ids),
+        "questions": len(responses.item_ids),
+        "calibrated_questions": int(eligible.sum()),
+        "changed_levels": changed,
+        "model": model,
+        "iterations": result["iterations"],
+        "converged": result["converged"],
+        "log_likelihood": result["log_likelihood"][-1] if result["log_likelihood"] else 0.0,
+        "read_seconds": read_seconds,
+        "total_seconds": time.perf_counter() - started,
+        "written": not dry_run,
+        "difficulty": result["difficulty"],
+        "discrimination": result["discrimination"],
+        "levels": levels,
+        "item_ids": responses.item_ids,
+    }
+
+
+def calibrated_levels(db, soru_ids=None, ders_id=None):
+    """{soru_id: kalibre zorluk} — sadece yeterince cevaplanmış sorular; diğerleri elle verilen zorluğu kullanır"""
+    # ORM modelleri sadece API tarafında gerekir; toplu işler ham sqlite3 ile çalışır
+    from app.core.models import Questions, QuestionCalibration
+
+    query = db.query(QuestionCalibration.soru_id, QuestionCalibration.zorluk).filter(QuestionCalibration.zorluk.isnot(None))
+    if soru_ids is not None:
+        if not soru_ids:
+            return {}
+        query = query.filter(QuestionCalibration.soru_id.in_(soru_ids))
+    if ders_id is not None:
+        query = query.join(Questions, Questions.soru_id == QuestionCalibration.soru_id).filter(Questions.ders_id == ders_id)
+    return dict(query.all())
+
+
+def calibrated_zorluk_sql(conn, question_alias="q"):
+    """Ham SQL sorguları için (zorluk ifadesi, ek JOIN); tablo yoksa elle verilen zorluk"""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (CALIBRATION_TABLE,)
+    ).fetchone()
+    if not exists:
+        return f"{question_alias}.zorluk", ""
+    return (
+        f"COALESCE(ic.zorluk, {question_alias}.zorluk)",
+        f"LEFT JOIN {CALIBRATION_TABLE} ic ON ic.soru_id = {question_alias}.soru_id",
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soru zorluk ve ayırt ediciliğini cevaplardan kalibre et")
+    parser.add_argument("--db", default=None, help="SQLite veritabanı yolu (varsayılan: app/core/database.db)")
+    parser.add_argument("--model", choices=MODELS, default="2pl", help="rasch: ayırt edicilik sabit 1")
+    parser.add_argument("--min-responses", type=int, default=MIN_RESPONSES, help="Kalibre seviye için en az cevap")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--max-iterations", type=int, default=MAX_ITERATIONS)
+    parser.add_argument("--dry-run", action="store_true", help="Sadece hesapla, tabloya yazma")
+    args = parser.parse_args(argv)
+
+    result = calibrate(args.db, args.model, args.min_responses, args.chunk_size, args.max_iterations, args.dry_run)
+    if not result["responses"]:
+        print("ℹ️ Kalibre edilecek cevap yok")
+        return
+    print(f"✅ {result['responses']:,} cevap, {result['users']:,} kullanıcı, {result['questions']:,} soru "
+          f"({result['model']}, {result['iterations']} iterasyon, {result['total_seconds']:.2f} sn)")
+    if not result["converged"]:
+        print(f"⚠️ {args.max_iterations} iterasyonda yakınsamadı; sonuçlar yine de kullanılabilir")
+    print(f"📊 {result['calibrated_questions']} soru kalibre edildi, {result['changed_levels']} sorunun seviyesi elle verilenden farklı")
+    if not result["written"]:
+        print("ℹ️ --dry-run: tabloya yazılmadı")
+    elif result["changed_levels"]:
+        print("ℹ️ Model zorluk sayaçlarını yeni seviyelere taşımak için: python -m app.services.replay")
+
+
+if __name__ == "__main__":
+    main()
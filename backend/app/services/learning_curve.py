@@ -0,0 +1,128 @@
+from array import array
+from collections import deque
+from datetime import datetime
+
+HOUR = 3600
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+# 1970-01-01 Perşembe; haftalık kovalar Pazartesi başlasın diye 4 gün kaydır
+WEEK_OFFSET = 4 * DAY
+# Kovalar Türkiye saatiyle (UTC+3, yaz saati yok) gece yarısında başlasın
+LOCAL_OFFSET = 3 * HOUR
+
+RESOLUTIONS = ("recent", "hourly", "daily", "weekly")
+BUCKET_RESOLUTIONS = ("hourly", "daily", "weekly")
+
+
+def bucket_starts(resolution, ts):
+    """Zaman damgasının (veya NumPy dizisinin) ait olduğu kovanın başlangıcı"""
+    if resolution == "hourly":
+        return ts - (ts + LOCAL_OFFSET) % HOUR
+    if resolution == "daily":
+        return ts - (ts + LOCAL_OFFSET) % DAY
+    return ts - (ts + LOCAL_OFFSET - WEEK_OFFSET) % WEEK
+
+
+class LearningCurve:
+    """Sabit boyutlu öğrenme eğrisi.
+
+    Son noktalar bir halka tamponda, uzun dönem geçmiş ise saatlik, günlük ve
+    haftalık ortalama kovalarında tutulur. Her ekleme O(1) ve toplam boyut
+    kullanıcı ne kadar soru çözerse çözsün sabittir.
+    """
+
+    __slots__ = ('recent', 'hourly', 'daily', 'weekly')
+
+    RECENT_SIZE = 100
+    HOURLY_SIZE = 48   # son 2 gün
+    DAILY_SIZE = 90    # son 3 ay
+    WEEKLY_SIZE = 104  # son 2 yıl
+
+    def __init__(self):
+        self.recent = deque(maxlen=self.RECENT_SIZE)   # (timestamp, accuracy)
+        self.hourly = deque(maxlen=self.HOURLY_SIZE)   # [kova başlangıcı, doğruluk toplamı, nokta sayısı]
+        self.daily = deque(maxlen=self.DAILY_SIZE)
+        self.weekly = deque(maxlen=self.WEEKLY_SIZE)
+
+    def __len__(self):
+        return len(self.recent)
+
+    def append(self, timestamp, accuracy):
+        ts = timestamp.timestamp() if isinstance(timestamp, datetime) else float(timestamp)
+        self.recent.append((ts, accuracy))
+        self._merge(self.hourly, bucket_starts("hourly", ts), accuracy, 1)
+        self._merge(self.daily, bucket_starts("daily", ts), accuracy, 1)
+        self._merge(self.weekly, bucket_starts("weekly", ts), accuracy, 1)
+
+    def add_bucket(self, resolution, start, accuracy_sum, count):
+        """Önceden toplanmış noktaları kovaya ekle; son kova aynıysa birleştir"""
+        self._merge(getattr(self, resolution), start, accuracy_sum, count)
+
+    @staticmethod
+    def _merge(buckets, start, accuracy_sum, count):
+        if buckets and buckets[-1][0] == start:
+            buckets[-1][1] += accuracy_sum
+            buckets[-1][2] += count
+        else:
+            buckets.append([start, accuracy_sum, count])
+
+    def points(self, resolution="recent"):
+        """Grafik için {'timestamp', 'accuracy'} noktaları döndür"""
+        if resolution == "recent":
+            return [
+                {'timestamp': datetime.fromtimestamp(ts), 'accuracy': accuracy}
+                for ts, accuracy in self.recent
+            ]
+        buckets = getattr(self, resolution)
+        return [
+            {'timestamp': datetime.fromtimestamp(start), 'accuracy': total / count, 'count': count}
+            for start, total, count in buckets
+        ]
+
+    def copy(self):
+        clone = LearningCurve()
+        clone.__setstate__(self.__getstate__())
+        return clone
+
+    def __getstate__(self):
+        recent = array('d')
+        for ts, accuracy in self.recent:
+            recent.extend((ts, accuracy))
+        state = [recent.tobytes()]
+        for buckets in (self.hourly, self.daily, self.weekly):
+            flat = array('d')
+            for start, total, count in buckets:
+                flat.extend((start, total, count))
+            state.append(flat.tobytes())
+        return tuple(state)
+
+    def __setstate__(self, state):
+        recent_bytes, hourly_bytes, daily_bytes, weekly_bytes = state
+        self.recent = deque(maxlen=self.RECENT_SIZE)
+        recent = array('d')
+        recent.frombytes(recent_bytes)
+        for i in range(0, len(recent), 2):
+            self.recent.append((recent[i], recent[i + 1]))
+
+        for name, size, raw in (
+            ('hourly', self.HOURLY_SIZE, hourly_bytes),
+            ('daily', self.DAILY_SIZE, daily_bytes),
+            ('weekly', self.WEEKLY_SIZE, weekly_bytes),
+        ):
+            flat = array('d')
+            flat.frombytes(raw)
+            buckets = deque(maxlen=size)
+            for i in range(0, len(flat), 3):
+                buckets.append([flat[i], flat[i + 1], int(flat[i + 2])])
+            setattr(self, name, buckets)
+
+    @classmethod
+    def from_points(cls, points):
+        """Eski {'timestamp', 'accuracy'} listesinden eğri oluştur"""
+        curve = cls()
+        for point in points:
+            timestamp = point.get('timestamp')
+            if timestamp is None:
+                continue
+            curve.append(timestamp, point.get('accuracy', 0))
+        return curve
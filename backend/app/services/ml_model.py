@@ -1,43 +1,206 @@
+"""
+River tabanlı PracticeModel.
+
+Geçmiş cevaplardan toplu eğitim (backend dizininden, sunucu kapalıyken):
+    python -m app.services.ml_model
+    python -m app.services.ml_model --db app/core/database.db --limit 100000
+"""
+import argparse
 import os
 import pickle
+import sqlite3
+import threading
+import time
 
 from river import compose, linear_model
 from river.preprocessing import StandardScaler, OneHotEncoder, FeatureHasher
 
+from app.services.write_behind import WriteBehindFlusher, atomic_write_bytes
+
+TRAINING_QUERY = """
+SELECT s.user_id, q.ders_id, q.konu_id, q.altbaslik_id, q.zorluk, s.is_correct
+FROM submissions s
+JOIN questions q ON q.soru_id = s.question_id
+WHERE s.is_correct IS NOT NULL
+ORDER BY s.id
+"""
+
 class PracticeModel:
-    def __init__(self):
-        self.model_path = os.path.join(os.path.dirname(__file__), "model.pkl")
+    def __init__(self, storage_dir=None, batch_size=32, checkpoint_every=500, checkpoint_interval=60.0, buffered=True):
+        storage_dir = storage_dir or os.path.dirname(__file__)
+        self.model_path = os.path.join(storage_dir, "model.pkl")
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()
+        self._buffer = []  # Henüz modele uygulanmamış (X, y) örnekleri
+        self.samples_seen = 0
+        self.last_checkpoint_at = None
 
         if os.path.exists(self.model_path):
             with open(self.model_path, "rb") as f:
                 self.model = pickle.load(f)
         else:
-            num_features = ['zorluk']
-            low_card_cats = ['ders_id', 'konu_id', 'altbaslik_id']
-            high_card_cats = ['user_id']
+            self.model = self.create_model()
 
-            num_pipeline = compose.Select(*num_features) | StandardScaler()
+        # Model her örnekte değil, checkpoint_every örnekte veya checkpoint_interval saniyede bir diske yazılır
+        self.checkpointer = None
+        if buffered:
+            self.checkpointer = WriteBehindFlusher(
+                lambda _: self.checkpoint(),
+                flush_interval=checkpoint_interval,
+                max_pending_updates=checkpoint_every,
+                name="practice-model-checkpoint"
+            )
+            self.checkpointer.start()
 
-            onehot_pipeline = compose.Select(*low_card_cats) | OneHotEncoder()
+    def create_model(self):
+        num_features = ['zorluk']
+        low_card_cats = ['ders_id', 'konu_id', 'altbaslik_id']
+        high_card_cats = ['user_id']
 
-            hashing_pipeline = compose.Select(*high_card_cats) | FeatureHasher(n_features=2**10)
+        num_pipeline = compose.Select(*num_features) | StandardScaler()
 
-            feature_pipeline = compose.TransformerUnion(
-                num_pipeline,
-                onehot_pipeline,
-                hashing_pipeline
-            )
+        onehot_pipeline = compose.Select(*low_card_cats) | OneHotEncoder()
+
+        hashing_pipeline = compose.Select(*high_card_cats) | FeatureHasher(n_features=2**10)
 
-            self.model = feature_pipeline | linear_model.LogisticRegression()
+        feature_pipeline = compose.TransformerUnion(
+            num_pipeline,
+            onehot_pipeline,
+            hashing_pipeline
+        )
+
+        return feature_pipeline | linear_model.LogisticRegression()
 
     def predict(self, X):
         """
         X: dict, örn:
         {'ders_id': ..., 'konu_id': ..., 'altbaslik_id': ..., 'zorluk': ..., 'user_id': ...}
+
+        Tamponda bekleyen (en fazla batch_size) örnek henüz modele yansımamış olabilir.
         """
-        return self.model.predict_proba_one(X)
+        with self._lock:
+            return self.model.predict_proba_one(X)
 
     def update(self, X, y):
-        self.model.learn_one(X, y)
-        with open(self.model_path, "wb") as f:
-            pickle.dump(self.model, f)
+        if self.checkpointer is None:
+            # Tamponsuz mod: eski davranış, her örnekte öğren ve kaydet
+            with self._lock:
+                self.model.learn_one(X, y)
+                self.samples_seen += 1
+            self.checkpoint()
+            return
+
+        with self._lock:
+            self._buffer.append((X, y))
+            if len(self._buffer) >= self.batch_size:
+                self._apply_buffer()
+        self.checkpointer.mark_dirty("model")
+
+    def learn_batch(self, samples):
+        """(X, y) örneklerini sırayla modele uygula (pandas olmadan mini-batch döngüsü)"""
+        with self._lock:
+            self._buffer.extend(samples)
+            self._apply_buffer()
+
+    def _apply_buffer(self):
+        learn_one = self.model.learn_one
+        for X, y in self._buffer:
+            learn_one(X, y)
+        self.samples_seen += len(self._buffer)
+        self._buffer = []
+
+    def checkpoint(self):
+        """Bekleyen örnekleri uygula ve modeli atomik olarak diske yaz"""
+        # Checkpoint'ler sırayla yazılsın; eski bir kopya yenisinin üzerine yazılmasın
+        with self._checkpoint_lock:
+            with self._lock:
+                self._apply_buffer()
+                payload = pickle.dumps(self.model, protocol=pickle.HIGHEST_PROTOCOL)
+            # Disk yazması model kilidi dışında; güncellemeler beklemez
+            atomic_write_bytes(payload, self.model_path)
+            self.last_checkpoint_at = time.time()
+
+    def shutdown(self):
+        """Bekleyen örnekleri uygula ve son checkpoint'i yaz"""
+        if self.checkpointer is not None:
+            self.checkpointer.stop()
+        with self._lock:
+            pending = bool(self._buffer)
+        if pending:
+            self.checkpoint()
+
+    def get_training_metrics(self):
+        with self._lock:
+            buffered = len(self._buffer)
+        metrics = {
+            "samples_seen": self.samples_seen,
+            "buffered_samples": buffered,
+            "batch_size": self.batch_size,
+            "last_checkpoint_at": self.last_checkpoint_at,
+        }
+        if self.checkpointer is not None:
+            metrics["checkpoint"] = self.checkpointer.metrics()
+        return metrics
+
+
+def train_from_submissions(db_path=None, storage_dir=None, chunk_size=50_000, limit=None):
+    """Geçmiş cevaplardan sıfırdan bir model eğit ve tek checkpoint olarak yaz"""
+    if db_path is None:
+        from app.core.database import db_path
+
+    model = PracticeModel(storage_dir=storage_dir, buffered=False)
+    # Geçmişin tamamı yeniden öğretildiği için mevcut model üzerine değil, boş modelden başla
+    model.model = model.create_model()
+
+    started = time.perf_counter()
+    conn = sqlite3.connect(db_path)
+    try:
+        query = TRAINING_QUERY + (f" LIMIT {int(limit)}" if limit else "")
+        cursor = conn.execute(query)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            model.learn_batch([
+                (
+                    {
+                        "ders_id": ders_id,
+                        "konu_id": konu_id,
+                        "altbaslik_id": altbaslik_id,
+                        "zorluk": zorluk,
+                        "user_id": user_id,
+                    },
+                    bool(is_correct)
+                )
+                for user_id, ders_id, konu_id, altbaslik_id, zorluk, is_correct in rows
+            ])
+            print(f"📚 {model.samples_seen:,} örnek işlendi")
+    finally:
+        conn.close()
+
+    train_seconds = time.perf_counter() - started
+    model.checkpoint()
+    return {
+        "samples": model.samples_seen,
+        "train_seconds": train_seconds,
+        "total_seconds": time.perf_counter() - started,
+        "model_path": model.model_path,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PracticeModel'i submissions tablosundan toplu eğit")
+    parser.add_argument("--db", default=None, help="SQLite veritabanı yolu (varsayılan: app/core/database.db)")
+    parser.add_argument("--storage-dir", default=None, help="model.pkl dizini (varsayılan: app/services)")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--limit", type=int, default=None, help="En fazla bu kadar cevap kullan")
+    args = parser.parse_args(argv)
+
+    result = train_from_submissions(args.db, args.storage_dir, args.chunk_size, args.limit)
+    print(f"✅ {result['samples']:,} örnekle eğitildi ({result['train_seconds']:.1f} sn), "
+          f"model kaydedildi: {result['model_path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+import os
+import threading
+import time
+
+from fastapi import Response
+
+from app.services.simple_ai_model import SimpleAIModel
+from app.services.enhanced_ml_model import EnhancedPracticeModel
+from app.services.ml_model import PracticeModel
+from app.services.predictions import PredictionTables
+from app.services.model_snapshots import SnapshotStore, DEFAULT_VERSION
+from app.services.update_queue import ModelUpdateQueue
+
+MODEL_VERSION_HEADER = "X-Model-Version"
+
+
+class ModelRegistry:
+    """Süreç genelinde tek model kümesi.
+
+    Modeller ilk kullanımda bir kez oluşturulur ve tüm router'lar aynı
+    örnekleri paylaşır; böylece bir güncelleme tüm okumalara hemen yansır.
+
+    shared_state: uygulama birden çok worker süreciyle çalışıyorsa (uvicorn
+    --workers) kullanıcı istatistikleri ortak SQLite deposunda atomik
+    güncellenir. Varsayılan olarak MODEL_SHARED_STATE (1/0) ortam
+    değişkeninden, o yoksa WEB_CONCURRENCY > 1 olup olmadığından belirlenir.
+
+    stats_dir: kullanıcı istatistiklerinin (user_stats.db) dizini; verilmezse
+    storage_dir. Model dosyaları sürümlenir, istatistikler sürümler arasında
+    ortak tek depodadır (bkz. ModelManager).
+    """
+
+    def __init__(self, storage_dir=None, async_updates=True, max_pending_updates=10_000, read_wait_timeout=2.0,
+                 shared_state=None, version=DEFAULT_VERSION, stats_dir=None):
+        if shared_state is None:
+            if "MODEL_SHARED_STATE" in os.environ:
+                shared_state = os.environ["MODEL_SHARED_STATE"] == "1"
+            else:
+                shared_state = int(os.environ.get("WEB_CONCURRENCY", "1")) > 1
+        self.storage_dir = storage_dir
+        self.stats_dir = stats_dir or storage_dir
+        self.shared_state = shared_state
+        self.version = version  # Yüklü anlık görüntü sürümü (X-Model-Version)
+        self.in_flight = 0  # Bu kümeyi kullanan istek sayısı (ModelManager tutar)
+        self.async_updates = async_updates
+        self.max_pending_updates = max_pending_updates
+        self.read_wait_timeout = read_wait_timeout  # Okumadan önce bekleyen güncellemeler için üst sınır
+        self._lock = threading.Lock()
+        self._simple = None
+        self._enhanced = None
+        self._practice = None
+        self._predictions = None
+        self._updates = None
+        self._handover_lock = threading.Lock()
+        self._successor = None  # Sürüm geçişinden sonra cevaplar yeni kümeye işlenir
+        self._accepting = threading.Event()  # Temizken güncellemeler uygulanır (bkz. hold_updates)
+        self._accepting.set()
+
+    @property
+    def simple(self):
+        if self._simple is None:
+            with self._lock:
+                if self._simple is None:
+                    self._simple = SimpleAIModel(storage_dir=self.stats_dir, shared=self.shared_state)
+        return self._simple
+
+    @property
+    def enhanced(self):
+        if self._enhanced is None:
+            with self._lock:
+                if self._enhanced is None:
+                    self._enhanced = EnhancedPracticeModel(
+                        storage_dir=self.storage_dir, stats_dir=self.stats_dir, shared=self.shared_state
+                    )
+        return self._enhanced
+
+    @property
+    def practice(self):
+        if self._practice is None:
+            with self._lock:
+                if self._practice is None:
+                    self._practice = PracticeModel(storage_dir=self.storage_dir)
+        return self._practice
+
+    @property
+    def predictions(self):
+        if self._predictions is None:
+            simple, enhanced = self.simple, self.enhanced
+            with self._lock:
+                if self._predictions is None:
+                    self._predictions = PredictionTables(simple, enhanced)
+        return self._predictions
+
+    @property
+    def updates(self):
+        if self._updates is None:
+            with self._lock:
+                if self._updates is None:
+                    updates = ModelUpdateQueue(self.apply_answers, max_pending=self.max_pending_updates)
+                    updates.start()
+                    self._updates = updates
+        return self._updates
+
+    @property
+    def data_dir(self):
+        """Model dosyalarının bulunduğu dizin"""
+        return self.storage_dir or os.path.dirname(os.path.abspath(__file__))
+
+    def warm_up(self):
+        """Modelleri şimdi yükle; ilk istek yükleme maliyetini ödemesin"""
+        self.simple, self.enhanced, self.practice, self.predictions
+
+    def flush(self, timeout=30.0):
+        """Kuyruktaki güncellemeleri uygula ve tüm model durumunu diske yaz (anlık görüntü öncesi)"""
+        if self._updates is not None:
+            self._updates.wait_idle(timeout)
+        with self._lock:
+            simple, enhanced, practice = self._simple, self._enhanced, self._practice
+        if simple is not None:
+            simple.save_user_stats()
+        if enhanced is not None:
+            enhanced.save_user_stats()
+            enhanced.save_model()
+        if practice is not None:
+            practice.checkpoint()
+
+    def record_answer(self, X, y):
+        """Cevabı modellere işle; async_updates açıksa kuyruğa bırakıp hemen dön"""
+        with self._handover_lock:
+            successor = self._successor
+            if successor is None:
+                user_id = X.get('user_id', 1)
+                if not self.async_updates:
+                    self.apply_answers(user_id, [(X, y)])
+                else:
+                    self.updates.put(user_id, (X, y))
+                return
+        # Bu küme devredildi (eski sürümde süren istek): cevap etkin kümeye işlenir
+        successor.record_answer(X, y)
+
+    def apply_answers(self, user_id, answers):
+        """Bir kullanıcının sıradaki cevaplarını uygula; kayıt ve tablo yenileme parti başına bir kez"""
+        self._accepting.wait()
+        self.simple.apply_answers(user_id, answers)
+        self.enhanced.apply_answers(user_id, answers)
+        try:
+            self.predictions.refresh(user_id)
+        except Exception as e:
+            # Cevaplar modellere işlendi; hata kuyruğa yansırsa parti tekrar denenip iki kez sayılırdı
+            print(f"⚠️ Kullanıcı {user_id} için tahmin tablosu yenilenemedi, sonraki okumada hesaplanacak: {e}")
+            self.predictions.invalidate(user_id)
+
+    def wait_for_updates(self, user_id):
+        """Okumadan önce kullanıcının bekleyen güncellemelerini bekle (read-your-writes)"""
+        if self._updates is None:
+            return True
+        applied = self._updates.wait_for_user(user_id, self.read_wait_timeout)
+        if not applied:
+            print(f"⚠️ Kullanıcı {user_id} için bekleyen model güncellemeleri {self.read_wait_timeout} sn içinde bitmedi")
+        return applied
+
+    def hold_updates(self):
+        """resume_updates() çağrılana kadar güncelleme uygulama; cevaplar kuyrukta bekler"""
+        self._accepting.clear()
+
+    def resume_updates(self):
+        """Beklerken okunan kayıtlar eskimiş olabilir: önbellekleri bırak ve güncellemelere devam et"""
+        with self._lock:
+            models = (self._simple, self._enhanced)
+            predictions = self._predictions
+        for model in models:
+            if model is not None:
+                model.user_stats.discard_clean()
+        if predictions is not None:
+            predictions.clear()
+        self._accepting.set()
+
+    def hand_over(self, successor, timeout=30.0):
+        """Sürüm geçişi: yeni cevapları successor'a yönlendir, bekleyenleri ortak istatistik deposuna yaz.
+
+        successor bu sırada hold_updates() ile bekletilmelidir; bekleyenler
+        yazılınca devam eder. Eski kuyruktaki hiçbir cevap kaybolmaz ve iki
+        küme aynı kullanıcının kaydını birbirinin üzerine yazmaz.
+        """
+        with self._handover_lock:
+            self._successor = successor
+        try:
+            if self._updates is not None and not self._updates.wait_idle(timeout):
+                print(f"⚠️ {self.version} sürümünün kuyruğu {timeout} sn içinde boşalmadı")
+            with self._lock:
+                simple = self._simple
+            # Enhanced her partide kendi satırını yazar; sadece simple'ın bellekte bekleyen kayıtları var
+            if simple is not None:
+                simple.save_user_stats()
+        finally:
+            successor.resume_updates()
+
+    def get_update_metrics(self):
+        if self._updates is None:
+            return {"async_updates": self.async_updates, "shared_state": self.shared_state, "queue_depth": 0}
+        return {"async_updates": self.async_updates, "shared_state": self.shared_state, **self._updates.metrics()}
+
+    def shutdown(self):
+        """Oluşturulmuş modellerin bekleyen kayıtlarını tamamla"""
+        # Önce kuyruktaki güncellemeler uygulanır, sonra modeller kaydedilir
+        if self._updates is not None:
+            self._updates.stop()
+        with self._lock:
+            if self._simple is not None:
+                self._simple.shutdown()
+            if self._enhanced is not None:
+                self._enhanced.shutdown()
+            if self._practice is not None:
+                self._practice.shutdown()
+
+
+class ModelManager:
+    """Etkin ModelRegistry'yi tutar ve sürümler arasında kesintisiz geçiş yapar.
+
+    Etkin sürüm anlık görüntü dizinindeki ACTIVE işaretçisinden okunur.
+    İşaretçi değişince (yönetici uç noktası, CLI veya başka bir worker) yeni
+    küme arka planda yüklenip ısıtılır ve tek atamayla etkin yapılır. İstekler
+    başlarken etkin kümeyi kiralar (acquire) ve sonuna kadar onu kullanır;
+    eski küme, üzerindeki istekler bitince kapatılır.
+
+    Sürümler sadece model dosyalarıdır. Kullanıcı istatistikleri tüm sürümlerin
+    paylaştığı stats_dir'deki tek canlı depodadır (varsayılan app/services):
+    geçişte eski kümenin bekleyen güncellemeleri bu depoya yazılır, yeni
+    cevaplar yeni kümeye gider.
+    """
+
+    def __init__(self, snapshots=None, watch_interval=None, retire_timeout=60.0, stats_dir=None, **registry_options):
+        if watch_interval is None:
+            watch_interval = float(os.environ.get("MODEL_WATCH_INTERVAL", "2.0"))
+        self.snapshots = snapshots or SnapshotStore()
+        self.watch_interval = watch_interval  # ACTIVE dosyasını kontrol aralığı (sn); 0 izlemeyi kapatır
+        self.retire_timeout = retire_timeout  # Eski kümedeki isteklerin bitmesi için üst sınır
+        self.stats_dir = stats_dir or os.path.dirname(os.path.abspath(__file__))
+        self.registry_options = registry_options
+        self._cond = threading.Condition()
+        self._reload_lock = threading.Lock()
+        self._stamp = self.snapshots.active_stamp()
+        self._current = self._create(self.snapshots.active())
+        self._retiring = []
+        self._stopped = threading.Event()
+        self.loading = None
+        self.reloads = 0
+        self.last_reload_at = None
+        self.last_reload_seconds = None
+        self.last_error = None
+
+        self._watcher = None
+        if self.watch_interval > 0:
+            self._watcher = threading.Thread(target=self._watch, name="model-snapshot-watcher", daemon=True)
+            self._watcher.start()
+
+    def _create(self, active):
+        return ModelRegistry(
+            storage_dir=active["storage_dir"], stats_dir=self.stats_dir, version=active["version"], **self.registry_options
+        )
+
+    @property
+    def registry(self):
+        return self._current
+
+    @property
+    def version(self):
+        return self._current.version
+
+    def acquire(self):
+        """İstek başında etkin kümeyi al; istek bitince release() çağrılmalı"""
+        with self._cond:
+            registry = self._current
+            registry.in_flight += 1
+            return registry
+
+    def release(self, registry):
+        with self._cond:
+            registry.in_flight -= 1
+            self._cond.notify_all()
+
+    def snapshot(self, version=None, note=None):
+        """Etkin kümenin güncel durumundan yeni bir anlık görüntü oluştur"""
+        registry = self._current
+        registry.flush()
+        return self.snapshots.create(registry.data_dir, version, note)
+
+    def activate(self, version, wait=False):
+        """Sürümü etkinleştir ve bu worker'da hemen yükle; diğer worker'lar izleyiciyle geçer"""
+        self.snapshots.activate(version)
+        thread = threading.Thread(target=self.reload, name="model-reload", daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+
+    def reload(self):
+        """ACTIVE işaretçisindeki sürümü yükle ve etkin kümeyle değiştir"""
+        with self._reload_lock:
+            stamp = self.snapshots.active_stamp()
+            active = self.snapshots.active()
+            if active["storage_dir"] == self._current.storage_dir:
+                self._stamp = stamp
+                return False
+
+            self.loading = active["version"]
+            started = time.perf_counter()
+            try:
+                registry = self._create(active)
+                registry.warm_up()
+            except Exception as e:
+                # Aynı işaretçi için tekrar denenmez; işaretçi değişince yeniden yüklenir
+                self._stamp = stamp
+                self.last_error = str(e)
+                print(f"⚠️ {active['version']} model sürümü yüklenemedi, {self.version} ile devam ediliyor: {e}")
+                return False
+            finally:
+                self.loading = None
+
+            registry.hold_updates()
+            with self._cond:
+                old = self._current
+                self._current = registry
+                self._stamp = stamp
+                self.reloads += 1
+                self.last_reload_at = time.time()
+                self.last_reload_seconds = time.perf_counter() - started
+                self.last_error = None
+            old.hand_over(registry)
+            print(f"✅ Model sürümü {old.version} → {registry.version} ({self.last_reload_seconds:.2f} sn)")
+
+            retire = threading.Thread(target=self._retire, args=(old,), name="model-retire", daemon=True)
+            self._retiring.append(retire)
+            retire.start()
+            return True
+
+    def _retire(self, registry):
+        """Eski kümedeki istekler bitince onu kapat (bekleyen güncellemeleri hand_over ile devredildi)"""
+        with self._cond:
+            finished = self._cond.wait_for(lambda: registry.in_flight == 0, self.retire_timeout)
+        if not finished:
+            print(f"⚠️ {registry.version} sürümünde {registry.in_flight} istek {self.retire_timeout} sn içinde bitmedi, yine de kapatılıyor")
+        registry.shutdown()
+
+    def _watch(self):
+        while not self._stopped.wait(self.watch_interval):
+            try:
+                if self.snapshots.active_stamp() != self._stamp:
+                    self.reload()
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"⚠️ Model anlık görüntü izleme hatası: {e}")
+
+    def status(self):
+        with self._cond:
+            return {
+                "active_version": self._current.version,
+                "storage_dir": self._current.data_dir,
+                "stats_dir": self.stats_dir,
+                "in_flight": self._current.in_flight,
+                "loading": self.loading,
+                "reloads": self.reloads,
+                "last_reload_at": self.last_reload_at,
+                "last_reload_seconds": self.last_reload_seconds,
+                "last_error": self.last_error,
+                "watch_interval_seconds": self.watch_interval,
+            }
+
+    def shutdown(self):
+        """İzleyiciyi durdur, kapanmakta olan eski kümeleri bekle ve etkin kümeyi kapat"""
+        self._stopped.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+        with self._reload_lock:
+            for retire in self._retiring:
+                retire.join()
+            self._current.shutdown()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_model_manager():
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = ModelManager()
+    return _manager
+
+
+def get_model_registry(response: Response):
+    """FastAPI bağımlılığı: isteğin başında etkin olan model kümesi.
+
+    İstek bitene kadar bu küme kapatılmaz; sürüm geçişi sırasında süren
+    istekler eski sürümle tamamlanır. Kullanılan sürüm yanıt başlığına yazılır.
+    """
+    manager = get_model_manager()
+    registry = manager.acquire()
+    response.headers[MODEL_VERSION_HEADER] = registry.version
+    try:
+        yield registry
+    finally:
+        manager.release(registry)
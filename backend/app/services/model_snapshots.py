@@ -0,0 +1,205 @@
+"""
+Sürümlü model anlık görüntüleri (snapshot).
+
+Her anlık görüntü kök dizin altında sürüm adıyla bir klasördür: eğitilmiş
+model dosyaları (enhanced_model.pkl, model.pkl) ve manifest.json. Anlık
+görüntüler değiştirilmez; bir sürüm etkinleştirilince kopyası .live/ altında
+çalışma dizinine açılır ve modellerin canlı yazmaları oraya gider.
+Kullanıcı istatistikleri (user_stats.db) sürümlenmez: tüm sürümler tek canlı
+depoyu kullanır, sürüm değişince kimsenin istatistiği geri gitmez (eski
+anlık görüntülerdeki user_stats.db kopyası yok sayılır).
+Etkin sürüm ACTIVE dosyasında tutulur; çalışan her worker bu dosyayı izler
+ve değişince yeni sürümü arka planda yükleyip atomik olarak geçer. .live/
+altında sadece etkin ve bir önceki sürümün çalışma kopyası tutulur (henüz
+geçmemiş worker'lar için); daha eskileri etkinleştirmede silinir.
+
+Kullanım (backend dizininden):
+    python -m app.services.model_snapshots list
+    python -m app.services.model_snapshots create [--version v] [--source app/services]
+    python -m app.services.model_snapshots activate <sürüm>
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from datetime import datetime
+
+from app.services.write_behind import atomic_write_bytes
+
+SNAPSHOT_FILES = ("enhanced_model.pkl", "model.pkl")
+MANIFEST_FILE = "manifest.json"
+ACTIVE_FILE = "ACTIVE"
+LIVE_DIR = ".live"
+DEFAULT_VERSION = "default"  # Anlık görüntü etkinleştirilmemiş: app/services altındaki dosyalar
+VERSION_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$")
+
+
+def default_root():
+    return os.environ.get("MODEL_SNAPSHOT_DIR") or os.path.join(os.path.dirname(__file__), "snapshots")
+
+
+def _copy_model_files(source_dir, target_dir):
+    files = []
+    for name in SNAPSHOT_FILES:
+        source = os.path.join(source_dir, name)
+        if not os.path.exists(source):
+            continue
+        shutil.copy2(source, os.path.join(target_dir, name))
+        files.append(name)
+    return files
+
+
+class SnapshotStore:
+    """Anlık görüntü dizini ve etkin sürüm işaretçisi"""
+
+    def __init__(self, root=None):
+        self.root = root or default_root()
+
+    def path(self, version):
+        if not VERSION_PATTERN.match(version or "") or version == DEFAULT_VERSION:
+            raise ValueError(f"Geçersiz sürüm adı: {version!r}")
+        return os.path.join(self.root, version)
+
+    def exists(self, version):
+        try:
+            return os.path.isfile(os.path.join(self.path(version), MANIFEST_FILE))
+        except ValueError:
+            return False
+
+    def manifest(self, version):
+        with open(os.path.join(self.path(version), MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+
+    def list(self):
+        if not os.path.isdir(self.root):
+            return []
+        active = self.active()["version"]
+        snapshots = []
+        for name in sorted(os.listdir(self.root)):
+            if self.exists(name):
+                snapshots.append({**self.manifest(name), "active": name == active})
+        return snapshots
+
+    def create(self, source_dir, version=None, note=None):
+        """source_dir'deki model dosyalarından yeni bir anlık görüntü oluştur; sürüm adını döndür"""
+        version = version or datetime.now().strftime("%Y%m%d-%H%M%S")
+        target = self.path(version)
+        if os.path.exists(target):
+            raise FileExistsError(f"{version} sürümü zaten var")
+        os.makedirs(self.root, exist_ok=True)
+
+        # Yarım kalmış kopya sürüm olarak görünmesin: geçici klasöre yaz, sonra tek rename
+        staging = os.path.join(self.root, f".tmp-{version}-{os.getpid()}")
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        try:
+            files = _copy_model_files(source_dir, staging)
+            manifest = {
+                "version": version,
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "source": os.path.abspath(source_dir),
+                "files": files,
+                "note": note,
+            }
+            with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+            os.replace(staging, target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return version
+
+    def active(self):
+        """Etkin sürüm: {"version", "storage_dir" (None = varsayılan dizin), "activated_at"}"""
+        try:
+            with open(os.path.join(self.root, ACTIVE_FILE), encoding="utf-8") as f:
+                active = json.load(f)
+        except FileNotFoundError:
+            return {"version": DEFAULT_VERSION, "storage_dir": None, "activated_at": None}
+        storage_dir = active.get("storage_dir")
+        if storage_dir and not os.path.isabs(storage_dir):
+            storage_dir = os.path.join(self.root, storage_dir)
+        return {**active, "storage_dir": storage_dir}
+
+    def active_stamp(self):
+        """ACTIVE dosyasının değişim damgası; izleyici her turda sadece bunu okur"""
+        try:
+            stat = os.stat(os.path.join(self.root, ACTIVE_FILE))
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def activate(self, version):
+        """Sürümün çalışma kopyasını aç ve ACTIVE işaretçisini atomik olarak ona çevir"""
+        previous = self.active()["storage_dir"]
+        if version == DEFAULT_VERSION:
+            # Varsayılan dizine (app/services) geri dön
+            try:
+                os.remove(os.path.join(self.root, ACTIVE_FILE))
+            except FileNotFoundError:
+                pass
+            self._prune_live(previous)
+            return self.active()
+        if not self.exists(version):
+            raise FileNotFoundError(f"{version} sürümü bulunamadı")
+        live_root = os.path.join(self.root, LIVE_DIR)
+        os.makedirs(live_root, exist_ok=True)
+        # Aynı sürüm tekrar etkinleştirilirse anlık görüntüden temiz bir kopya açılır
+        live_dir = tempfile.mkdtemp(prefix=f"{version}-{datetime.now().strftime('%Y%m%d%H%M%S')}-", dir=live_root)
+        os.chmod(live_dir, 0o755)
+        _copy_model_files(self.path(version), live_dir)
+        active = {
+            "version": version,
+            "storage_dir": os.path.join(LIVE_DIR, os.path.basename(live_dir)),
+            "activated_at": datetime.now().isoformat(timespec="seconds"),
+        }
+        atomic_write_bytes(json.dumps(active, ensure_ascii=False).encode("utf-8"), os.path.join(self.root, ACTIVE_FILE))
+        self._prune_live(live_dir, previous)
+        return {**active, "storage_dir": live_dir}
+
+    def _prune_live(self, *keep):
+        """Verilenler dışındaki çalışma kopyalarını sil; tüm worker'lar onlardan geçmiş sayılır"""
+        live_root = os.path.join(self.root, LIVE_DIR)
+        if not os.path.isdir(live_root):
+            return
+        keep = {os.path.realpath(path) for path in keep if path}
+        for name in os.listdir(live_root):
+            path = os.path.join(live_root, name)
+            if os.path.realpath(path) not in keep:
+                shutil.rmtree(path, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Model anlık görüntülerini yönet")
+    parser.add_argument("--root", default=None, help="Anlık görüntü dizini (varsayılan: app/services/snapshots)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Anlık görüntüleri listele")
+    create = commands.add_parser("create", help="Model dosyalarından anlık görüntü oluştur (sunucu kapalıyken)")
+    create.add_argument("--version", default=None)
+    create.add_argument("--source", default=None, help="Model dosyalarının dizini (varsayılan: etkin sürüm)")
+    create.add_argument("--note", default=None)
+    activate = commands.add_parser("activate", help="Sürümü etkinleştir; çalışan worker'lar otomatik geçer")
+    activate.add_argument("version")
+    args = parser.parse_args(argv)
+
+    snapshots = SnapshotStore(args.root)
+    if args.command == "list":
+        for snapshot in snapshots.list():
+            marker = "*" if snapshot["active"] else " "
+            print(f"{marker} {snapshot['version']:<24} {snapshot['created_at']}  {', '.join(snapshot['files'])}"
+                  + (f"  ({snapshot['note']})" if snapshot.get("note") else ""))
+    elif args.command == "create":
+        source = args.source or snapshots.active()["storage_dir"] or os.path.dirname(__file__)
+        started = time.perf_counter()
+        version = snapshots.create(source, args.version, args.note)
+        print(f"✅ {version} anlık görüntüsü oluşturuldu ({time.perf_counter() - started:.2f} sn)")
+    else:
+        active = snapshots.activate(args.version)
+        print(f"✅ {active['version']} etkinleştirildi; çalışan worker'lar izleyiciyle geçecek")
+
+
+if __name__ == "__main__":
+    main()
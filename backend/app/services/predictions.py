@@ -0,0 +1,276 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from app.services.user_stats import CURRICULUM, SUBJECT, TOPIC
+
+SIMPLE = 0
+ENHANCED = 1
+COMBINED = 2
+
+
+def get_simple_model_prediction(simple_model, user_id, X):
+    """Simple AI Model'den tahmin al"""
+    try:
+        # Simple AI Model'in predict metodunu kullan
+        prediction = simple_model.predict(X)
+        # prediction zaten 0-1 arası, 100 ile çarp
+        return round(prediction * 100)  # Yüzdeye çevir
+    except Exception as e:
+        print(f"Simple model prediction error: {e}")
+        return 50  # Varsayılan değer
+
+
+def get_enhanced_model_prediction(enhanced_model, user_id, X):
+    """Enhanced ML Model'den tahmin al"""
+    try:
+        # Enhanced model için veri formatını hazırla
+        enhanced_X = {
+            'ders_id': X['ders_id'],
+            'konu_id': X['konu_id'],
+            'altbaslik_id': X['altbaslik_id'],
+            'zorluk': X['zorluk'],
+            'user_id': X['user_id']
+        }
+
+        # Enhanced model tahmin yap
+        prediction = enhanced_model.predict(enhanced_X)
+        return round(prediction * 100)  # Yüzdeye çevir
+    except Exception as e:
+        print(f"Enhanced model prediction error: {e}")
+        return 50  # Varsayılan değer
+
+
+def experience_weights(total_questions):
+    """Kullanıcının soru sayısına göre (simple, enhanced) temel ağırlıkları"""
+    if total_questions < 10:
+        # İlk 10 soruda Simple model daha güvenilir
+        return 0.7, 0.3
+    if total_questions < 30:
+        # 10-30 arası eşit ağırlık
+        return 0.5, 0.5
+    # 30+ soruda Enhanced model daha güvenilir
+    return 0.3, 0.7
+
+
+def combine_predictions(simple_model, simple_pred, enhanced_pred, user_id, X):
+    """Gelişmiş tahmin birleştirme algoritması"""
+    try:
+        # Kullanıcının soru sayısına göre dinamik ağırlık
+        user_data = simple_model.user_stats.get(user_id)
+        total_questions = user_data.total_questions if user_data is not None else 0
+
+        # Zorluk seviyesine göre ağırlık ayarlama
+        zorluk = X.get('zorluk', 3)
+
+        simple_weight, enhanced_weight = experience_weights(total_questions)
+
+        # Zorluk bazlı ek düzeltme
+        if zorluk <= 2:  # Kolay sorular
+            simple_weight += 0.1
+            enhanced_weight -= 0.1
+        elif zorluk >= 5:  # Zor sorular
+            simple_weight -= 0.1
+            enhanced_weight += 0.1
+
+        # Ağırlıkları normalize et
+        total_weight = simple_weight + enhanced_weight
+        simple_weight /= total_weight
+        enhanced_weight /= total_weight
+
+        # Birleştirilmiş tahmin (simple_pred ve enhanced_pred zaten yüzde değeri)
+        combined_pred = (simple_pred * simple_weight) + (enhanced_pred * enhanced_weight)
+
+        # Konu bazlı düzeltme faktörü
+        konu_id = X.get('konu_id', 1)
+        konu_factor = 1.0
+
+        # Konu bazlı performans düzeltmesi (opsiyonel)
+        if user_data is not None:
+            topic_key = (X.get('ders_id', 1), konu_id)
+            topic_total, topic_correct = user_data.get_counts(TOPIC, topic_key)
+
+            if topic_total > 5:
+                topic_accuracy = topic_correct / topic_total
+                # Konu performansına göre küçük düzeltme
+                if topic_accuracy < 0.3:
+                    konu_factor = 0.95  # Zayıf konularda %5 azalış
+                elif topic_accuracy > 0.7:
+                    konu_factor = 1.05  # Güçlü konularda %5 artış
+
+        # Final tahmin (yüzde değeri olarak)
+        final_pred = combined_pred * konu_factor
+
+        # 0-100 arasında sınırla
+        final_pred = max(0, min(100, final_pred))
+
+        return round(final_pred)
+
+    except Exception as e:
+        print(f"Tahmin birleştirme hatası: {e}")
+        # Hata durumunda basit ortalama
+        return round((simple_pred + enhanced_pred) / 2)
+
+
+def _combine_weights(simple_weight, enhanced_weight):
+    """combine_predictions'taki zorluk düzeltmesi ve normalizasyonun hücre dizisi hali"""
+    zorluk = CURRICULUM.cell_zorluk
+    simple_weight = np.where(zorluk <= 2, simple_weight + 0.1, np.where(zorluk >= 5, simple_weight - 0.1, simple_weight))
+    enhanced_weight = np.where(zorluk <= 2, enhanced_weight - 0.1, np.where(zorluk >= 5, enhanced_weight + 0.1, enhanced_weight))
+    total_weight = simple_weight + enhanced_weight
+    return simple_weight / total_weight, enhanced_weight / total_weight
+
+
+# Hücrelere bağlı sabitler bir kez hesaplanır; tablo yenileme sadece kullanıcıya bağlı kısmı hesaplar
+_CELL_SUBJECT_ROWS = CURRICULUM.rows_for(SUBJECT, ders_ids=CURRICULUM.cell_ders_ids)
+_CELL_TOPIC_ROWS = CURRICULUM.rows_for(TOPIC, ders_ids=CURRICULUM.cell_ders_ids, konu_ids=CURRICULUM.cell_konu_ids)
+_SIMPLE_DIFFICULTY_TERM = (1 - np.where(
+    CURRICULUM.cell_zorluk <= 2, 0.3, np.where(CURRICULUM.cell_zorluk <= 4, 0.5, 0.7)
+)) * 0.2
+_COMBINE_WEIGHTS = {weights: _combine_weights(*weights) for weights in (experience_weights(0), experience_weights(10), experience_weights(30))}
+
+
+class PredictionTables:
+    """Kullanıcı başına her müfredat hücresi (ders, konu, zorluk) için önceden hesaplanmış tahminler.
+
+    Tablo (3, hücre) şekillidir: simple ve enhanced yüzdeleri ile
+    combine_predictions çıktısı. Genel doğruluk ve soru sayısı her hücreyi
+    etkilediği için bir güncelleme tabloyu tek NumPy geçişinde yeniden
+    hesaplar (90 hücre); okumalar tek bir dizi erişimidir. Izgara dışı
+    sorular skaler formüllere düşer. Tablolar boyutu sınırlı bir LRU'da tutulur.
+    Paylaşımlı depoda tablo, hesaplandığı kayıt sürümleriyle saklanır; başka
+    bir worker kullanıcıyı güncellediyse sonraki okumada yeniden hesaplanır.
+    """
+
+    def __init__(self, simple_model, enhanced_model, capacity=10_000):
+        self.simple_model = simple_model
+        self.enhanced_model = enhanced_model
+        self.capacity = capacity
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def refresh(self, user_id):
+        """Güncellemeden sonra kullanıcının tablosunu yeniden hesapla"""
+        with self._lock:
+            # Hesaplama da kilit altında: eş zamanlı iki güncellemede eski tablo yenisinin üzerine yazılmasın
+            self._store(user_id, self._version_key(user_id), self.compute(user_id))
+            self.refreshes += 1
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._tables.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._tables.clear()
+
+    def table(self, user_id):
+        with self._lock:
+            key = self._version_key(user_id)
+            entry = self._tables.get(user_id)
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                self._tables.move_to_end(user_id)
+                return entry[1]
+            # Yeniden başlatma, LRU'dan çıkma veya başka worker'ın güncellemesi sonrası hesaplanır
+            self.misses += 1
+            table = self.compute(user_id)
+            self._store(user_id, key, table)
+            return table
+
+    def _version_key(self, user_id):
+        """Paylaşımlı depoda tablonun dayandığı (simple, enhanced) kayıt sürümleri"""
+        if not (self.simple_model.shared or self.enhanced_model.shared):
+            return None
+        return self.simple_model._peek_user(user_id).version, self.enhanced_model._peek_user(user_id).version
+
+    def _store(self, user_id, key, table):
+        self._tables[user_id] = (key, table)
+        self._tables.move_to_end(user_id)
+        while len(self._tables) > self.capacity:
+            self._tables.popitem(last=False)
+
+    def predict(self, user_id, X):
+        """(simple, enhanced, combined) yüzdeleri; /answers/predict ile aynı sonuç"""
+        cell = CURRICULUM.cell(X.get('ders_id'), X.get('konu_id'), X.get('zorluk'))
+        if cell is None:
+            simple_pred = get_simple_model_prediction(self.simple_model, user_id, X)
+            enhanced_pred = get_enhanced_model_prediction(self.enhanced_model, user_id, X)
+            return simple_pred, enhanced_pred, combine_predictions(self.simple_model, simple_pred, enhanced_pred, user_id, X)
+        simple_pred, enhanced_pred, combined = self.table(user_id)[:, cell].tolist()
+        return int(simple_pred), int(enhanced_pred), int(combined)
+
+    def predict_many(self, user_id, questions):
+        """Soruların (simple, enhanced, combined) yüzdeleri, (3, soru) şeklinde; tek tablo okuması
+
+        questions: ders_id, konu_id, altbaslik_id ve zorluk alanları olan nesneler veya dict'ler.
+        Izgara dışı sorular skaler hesaplanır.
+        """
+        # Alanlar zaten soru soru okunuyor; hücre indeksi için sözlük araması küçük dizilerdeki NumPy yükünden ucuz
+        lookup = CURRICULUM.cells.get
+        cells = np.array([
+            lookup((q.get('ders_id'), q.get('konu_id'), q.get('zorluk')) if isinstance(q, dict)
+                   else (q.ders_id, q.konu_id, q.zorluk), -1)
+            for q in questions
+        ], dtype=np.int64)
+        predictions = self.table(user_id)[:, np.maximum(cells, 0)]
+        for i in np.flatnonzero(cells < 0).tolist():
+            q = questions[i]
+            X = {name: (q.get(name) if isinstance(q, dict) else getattr(q, name))
+                 for name in ('ders_id', 'konu_id', 'altbaslik_id', 'zorluk')}
+            X['user_id'] = user_id
+            predictions[:, i] = self.predict(user_id, X)
+        return predictions
+
+    def combined_many(self, user_id, questions):
+        """Aday soruların birleşik tahminleri (0-1 arası)"""
+        return self.predict_many(user_id, questions)[COMBINED] / 100.0
+
+    def compute(self, user_id):
+        """Tüm hücreler için simple/enhanced/birleşik yüzdeleri tek geçişte hesapla"""
+        simple_data = self.simple_model._peek_user(user_id)
+
+        # SimpleAIModel.predict ile aynı formül ve aynı işlem sırası
+        table = simple_data.accuracy_table()
+        performance_factor = (
+            simple_data.overall_accuracy() * 0.1 + table[_CELL_SUBJECT_ROWS] * 0.2 + table[_CELL_TOPIC_ROWS] * 0.7
+        )
+        simple_pred = np.rint(np.clip(performance_factor * 0.8 + _SIMPLE_DIFFICULTY_TERM, 0.0, 1.0) * 100)
+
+        enhanced_pred = np.rint(self.enhanced_model.predict_arrays(
+            user_id, CURRICULUM.cell_ders_ids, CURRICULUM.cell_konu_ids, CURRICULUM.cell_zorluk
+        ) * 100)
+
+        # combine_predictions: soru sayısı ve zorluğa göre ağırlıklar, konu performansına göre düzeltme
+        stored = self.simple_model.user_stats.get(user_id)
+        simple_weight, enhanced_weight = _COMBINE_WEIGHTS[experience_weights(stored.total_questions if stored is not None else 0)]
+        combined = simple_pred * simple_weight + enhanced_pred * enhanced_weight
+
+        if stored is not None:
+            topic_counts = stored.decayed_counts()[_CELL_TOPIC_ROWS]
+            topic_total, topic_correct = topic_counts[:, 0], topic_counts[:, 1]
+            trusted = topic_total > 5
+            if trusted.any():
+                topic_ratio = np.divide(topic_correct, topic_total, out=np.full(len(topic_total), 0.5), where=trusted)
+                konu_factor = np.where(trusted, np.where(topic_ratio < 0.3, 0.95, np.where(topic_ratio > 0.7, 1.05, 1.0)), 1.0)
+                combined = combined * konu_factor
+
+        combined_pred = np.rint(np.clip(combined, 0, 100))
+        return np.vstack([simple_pred, enhanced_pred, combined_pred]).astype(np.int16)
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "capacity": self.capacity,
+                "resident_users": len(self._tables),
+                "cells_per_user": CURRICULUM.cell_count,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0,
+                "refreshes": self.refreshes,
+            }
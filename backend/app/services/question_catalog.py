@@ -0,0 +1,179 @@
+"""
+Soru kataloğu: soru bankasının bellekteki salt-okunur kopyası.
+
+Sorular bir kez okunur; seçenekler JSON'dan önceden çözülür ve her soru
+için API'nin döndürdüğü sözlük hazır tutulur. Filtreleme için sütun
+dizileri (soru_id, ders, konu, zorluk, müfredat hücresi) vardır; sorular
+ders ve soru_id sırasıyla dizildiği için bir dersin soruları tek bir
+aralıktır. Zorluk, varsa question_calibration'daki kalibre seviyedir.
+Etiket filtresi question_tags'ten kurulan ters indeksle çalışır.
+
+Soru tablosu değişince (import_questions.py, kalibrasyon işi)
+invalidate_question_catalog() veritabanının yanındaki damga dosyasını
+yeniler; her süreç isteklerde damgayı kontrol eder ve değişmişse kataloğu
+yeniden yükleyip atomik olarak değiştirir. Katalog nesneleri hiç
+değiştirilmez: okuyucular kilitsiz çalışır.
+"""
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from app.services.question_tags import TagIndex, parse_tag_query, question_tags, split_tags
+from app.services.user_stats import CURRICULUM
+from app.services.write_behind import atomic_write_bytes
+
+STAMP_FILE = "question_catalog.stamp"
+PAYLOAD_FIELDS = (
+    "soru_id", "ders_id", "konu_id", "altbaslik_id", "soru_metin", "secenekler",
+    "dogru_cevap", "dogru_cevap_aciklamasi", "zorluk", "etiket",
+)
+
+
+def stamp_path(db_path=None):
+    if db_path is None:
+        from app.core.database import db_path
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), STAMP_FILE)
+
+
+def read_stamp(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+
+def invalidate_question_catalog(db_path=None):
+    """Soru tablosu değişti: bu veritabanını kullanan tüm süreçlerde katalog yeniden yüklenir"""
+    atomic_write_bytes(f"{time.time_ns()} {os.getpid()}\n".encode("ascii"), stamp_path(db_path))
+
+
+def _parse_options(soru_id, secenekler):
+    try:
+        return json.loads(secenekler) if secenekler else {}
+    except (json.JSONDecodeError, TypeError) as e:
+        print(f"JSON parse error for question {soru_id}: {e}")
+        return {}
+
+
+class CatalogQuestion:
+    """Katalogdaki tek soru; payload API yanıtıdır ve paylaşıldığı için değiştirilmemeli"""
+
+    __slots__ = ("soru_id", "ders_id", "konu_id", "altbaslik_id", "zorluk", "tags", "payload")
+
+    def __init__(self, payload, zorluk, tags):
+        self.soru_id = payload["soru_id"]
+        self.ders_id = payload["ders_id"]
+        self.konu_id = payload["konu_id"]
+        self.altbaslik_id = payload["altbaslik_id"]
+        # Seçim ve tahminde kullanılan zorluk: kalibre seviye varsa o (payload'daki elle verilen etiket kalır)
+        self.zorluk = zorluk
+        self.tags = tags
+        self.payload = payload
+
+
+class QuestionCatalog:
+    """Ders ve soru_id sırasıyla dizilmiş sorular ve sütun dizileri"""
+
+    def __init__(self, rows, calibrated=None, stamp=None, tags=None):
+        calibrated = calibrated or {}
+        tags = tags or {}
+        rows = sorted(rows, key=lambda row: (row["ders_id"] if row["ders_id"] is not None else -1, row["soru_id"]))
+        self.questions = []
+        for row in rows:
+            payload = dict(row, secenekler=_parse_options(row["soru_id"], row["secenekler"]))
+            # question_tags'te satırı olmayan soru: etiket sütunu
+            soru_tags = tags.get(row["soru_id"]) or split_tags(row["etiket"])
+            self.questions.append(CatalogQuestion(payload, calibrated.get(row["soru_id"], row["zorluk"]), soru_tags))
+        self.position = {q.soru_id: i for i, q in enumerate(self.questions)}
+        self.tags = TagIndex(q.tags for q in self.questions)
+
+        def column(name):
+            return np.array([getattr(q, name) if getattr(q, name) is not None else -1 for q in self.questions], dtype=np.int64)
+
+        self.soru_ids = column("soru_id")
+        self.ders_ids = column("ders_id")
+        self.konu_ids = column("konu_id")
+        self.zorluk = column("zorluk")
+        self.cells = CURRICULUM.cells_for(self.ders_ids, self.konu_ids, self.zorluk)
+        self.stamp = stamp
+        self.loaded_at = time.time()
+        self.load_seconds = 0.0
+
+    @classmethod
+    def load(cls, db, stamp=None):
+        """Tüm soruları, kalibre seviyeleri ve etiketleri tek seferde oku (ORM nesnesi oluşturmadan)"""
+        from app.core.models import Questions
+        from app.services.item_calibration import calibrated_levels
+
+        started = time.perf_counter()
+        columns = [getattr(Questions, name) for name in PAYLOAD_FIELDS]
+        rows = [dict(zip(PAYLOAD_FIELDS, row)) for row in db.query(*columns).all()]
+        catalog = cls(rows, calibrated_levels(db), stamp, question_tags(db))
+        catalog.load_seconds = time.perf_counter() - started
+        return catalog
+
+    def __len__(self):
+        return len(self.questions)
+
+    def get(self, soru_id):
+        position = self.position.get(soru_id)
+        return self.questions[position] if position is not None else None
+
+    def subject_range(self, ders_id):
+        """Dersin sorularının [başlangıç, bitiş) aralığı"""
+        return (int(np.searchsorted(self.ders_ids, ders_id, side="left")),
+                int(np.searchsorted(self.ders_ids, ders_id, side="right")))
+
+    def positions(self, ders_id, etiket=None):
+        """Dersin (ve verilirse etiket sorgusuna uyan) sorularının konumları, artan sırada"""
+        start, end = self.subject_range(ders_id)
+        groups = parse_tag_query(etiket)
+        if not groups:
+            return np.arange(start, end)
+        return self.tags.query(groups, start, end)
+
+    def tag_counts(self, ders_id=None):
+        """{etiket: soru sayısı}; verilirse sadece dersin soruları"""
+        if ders_id is None:
+            return self.tags.counts()
+        return self.tags.counts(*self.subject_range(ders_id))
+
+    def take(self, positions):
+        questions = self.questions
+        return [questions[i] for i in positions.tolist()]
+
+    def stats(self):
+        return {
+            "questions": len(self.questions),
+            "tags": len(self.tags),
+            "loaded_at": self.loaded_at,
+            "load_seconds": self.load_seconds,
+        }
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_question_catalog():
+    """Güncel katalog; damga değiştiyse (veya ilk çağrıda) veritabanından yeniden yüklenir"""
+    global _catalog
+    stamp = read_stamp(stamp_path())
+    catalog = _catalog
+    if catalog is not None and catalog.stamp == stamp:
+        return catalog
+    with _catalog_lock:
+        if _catalog is None or _catalog.stamp != stamp:
+            from app.core.database import SessionLocal
+
+            db = SessionLocal()
+            try:
+                _catalog = QuestionCatalog.load(db, stamp)
+            finally:
+                db.close()
+            print(f"✅ Soru kataloğu yüklendi: {len(_catalog)} soru ({_catalog.load_seconds * 1000:.0f} ms)")
+        return _catalog
@@ -0,0 +1,113 @@
+"""
+Test için soru seçimi: zorluğa göre katmanlı örnekleme, en zayıf sorular ve iadesiz çeşitlilik.
+
+Seçim aday sayısında doğrusaldır ve doğrusal kısım yalnızca birkaç NumPy
+geçişidir: katman büyüklükleri sayılır, en zayıf k soru tam sıralama
+yapmadan np.partition eşiğiyle bulunur. Rastgele çekimler çekilen soru
+sayısı kadar iş yapar (büyük katmanlarda rastgele konum deneyip
+reddetme); havuzlar karıştırılmaz, seçilenler bir kümede tutulur.
+Rastgelelik verilen random.Random nesnesinden gelir; aynı tohumla aynı
+test üretilir.
+
+Fonksiyonlar aday konumlarını (0..n-1) döndürür; soru nesneleri çağıranda kalır.
+"""
+import random
+
+import numpy as np
+
+TEST_SIZE = 30
+WEAK_SHARE = 0.7
+# Zorluk katmanları (sınırlar dahil): kolay, orta, zor
+DIFFICULTY_STRATA = ((None, 2), (3, 4), (5, None))
+
+
+def draw(rng, members, k):
+    """members dizisinden iadesiz k eleman (O(k))"""
+    k = min(k, len(members))
+    return members[rng.sample(range(len(members)), k)].tolist() if k else []
+
+
+def draw_excluding(rng, n, k, taken):
+    """0..n-1 içinden taken'da olmayan k farklı konum; seçilenler taken'a eklenir"""
+    k = min(k, n - len(taken))
+    if k <= 0:
+        return []
+    if n - len(taken) < 2 * k:
+        # Boşta az aday kaldı: reddetme yerine kalanlardan doğrudan çek
+        picks = rng.sample([i for i in range(n) if i not in taken], k)
+        taken.update(picks)
+        return picks
+    # Her deneme en az 1/2 olasılıkla kabul edilir: beklenen deneme < 2k
+    picks = []
+    while len(picks) < k:
+        i = rng.randrange(n)
+        if i not in taken:
+            taken.add(i)
+            picks.append(i)
+    return picks
+
+
+def _in_stratum(zorluk, low, high):
+    mask = np.ones(len(zorluk), dtype=bool)
+    if low is not None:
+        mask &= zorluk >= low
+    if high is not None:
+        mask &= zorluk <= high
+    return mask
+
+
+def stratified(rng, zorluk, per_stratum, taken):
+    """Her zorluk katmanından en fazla per_stratum konum (katman sırasıyla)"""
+    n = len(zorluk)
+    picks = []
+    for low, high in DIFFICULTY_STRATA:
+        mask = _in_stratum(zorluk, low, high)
+        size = int(np.count_nonzero(mask))
+        if size >= 4 * per_stratum and 4 * size >= n:
+            # Büyük katman: rastgele konum dene; beklenen deneme < 8 * per_stratum
+            stratum_picks = []
+            while len(stratum_picks) < per_stratum:
+                i = rng.randrange(n)
+                if mask[i] and i not in taken:
+                    taken.add(i)
+                    stratum_picks.append(i)
+        else:
+            stratum_picks = draw(rng, np.flatnonzero(mask), per_stratum)
+            taken.update(stratum_picks)
+        picks.extend(stratum_picks)
+    return picks
+
+
+def weakest(scores, k):
+    """En düşük skorlu k konum, artan skor sırasıyla; eşit skorlarda küçük konum önce
+
+    Sonuç kararlı sıralamanın ilk k elemanıyla aynıdır: k'ıncı en küçük skor
+    eşik olur, eşiğin altındakilerin hepsi alınır, kalan yer eşik skorlu
+    konumlardan artan sırayla doldurulur (O(n) seçim + O(k log k) sıralama).
+    """
+    scores = np.asarray(scores)
+    k = min(k, len(scores))
+    if k <= 0:
+        return []
+    threshold = np.partition(scores, k - 1)[k - 1]
+    below = np.flatnonzero(scores < threshold)
+    tied = np.flatnonzero(scores == threshold)[:k - len(below)]
+    candidates = np.concatenate((below, tied))
+    return candidates[np.lexsort((candidates, scores[candidates]))].tolist()
+
+
+def select_test(zorluk, scores, experienced, size=TEST_SIZE, rng=None):
+    """size soruluk test için aday konumları
+
+    Yeni kullanıcı: her zorluk katmanından eşit sayıda rastgele soru, kalanı rastgele.
+    Deneyimli kullanıcı: en düşük skorlu %70 (zayıf noktalar), kalanı rastgele çeşitlilik.
+    """
+    rng = rng or random.Random()
+    taken = set()
+    if experienced:
+        selected = weakest(scores, int(size * WEAK_SHARE))
+        taken.update(selected)
+    else:
+        selected = stratified(rng, zorluk, size // len(DIFFICULTY_STRATA), taken)
+    selected.extend(draw_excluding(rng, len(zorluk), size - len(selected), taken))
+    return selected
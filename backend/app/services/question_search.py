@@ -0,0 +1,278 @@
+"""
+Soru bankasında tam metin arama (SQLite FTS5).
+
+question_search sanal tablosu her soru için (rowid = soru_id) soru metni,
+doğru cevap açıklaması ve etiketleri tutar. Metin yazılmadan önce Türkçe
+katlanır: küçük harf, ç/ğ/ı/ö/ş/ü ve şapkalı harfler Latin karşılıklarına
+çevrilir. Sorgular da aynı şekilde katlanır. Böylece "IŞIK", "ışık" ve
+"isik" aynı terimdir; unicode61 tek başına I → i, ı → ı çevirdiği için
+bunları eşleştiremezdi. Sıralama bm25 ile yapılır (etiket ve soru metni
+açıklamadan ağır); çok yaygın bağlaçlar ("ve", "bir", "hangisi"...)
+sorgudan düşülür, yoksa neredeyse her soruyu sıralamak gerekirdi. Ders
+filtresi indekslenmiş bir "d<ders_id>" terimidir; eşleşme kümesini FTS5
+daraltır. Eşleşmeler bm25'e göre en iyi SEARCH_RESULT_CAP tanesiyle
+sınırlanır; sayım ve sayfalama bu küme üzerinde tek sorguda yapılır. Daha
+yaygın terimlerde toplam "en az" anlamına gelir (toplam_kesin false), ama
+ilk sayfalar her zaman en yüksek skorlu sorulardır. Özetler (snippet)
+katlanmış tablodan değil, soru kataloğundaki özgün metinden Python'da
+üretilir. Sonuçlardaki zorluk /batch ile aynı, elle verilen etikettir;
+kalibre seviye (varsa) kalibre_zorluk alanındadır.
+
+Tablo içe aktarmada aynı işlemde güncellenir (sync_question_search).
+Sunucu başlangıcında satır sayısı soru sayısından farklıysa tablo baştan
+kurulur.
+
+Kullanım (backend dizininden; tabloyu baştan kurar):
+    python -m app.services.question_search
+    python -m app.services.question_search --db app/core/database.db
+"""
+import argparse
+import html
+import re
+import sqlite3
+import time
+
+from sqlalchemy import text
+
+from app.services.question_tags import split_tags
+
+SEARCH_TABLE = "question_search"
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 50
+MAX_QUERY_TERMS = 8
+SEARCH_RESULT_CAP = 1000    # sayılan ve sıralanan en fazla eşleşme
+SNIPPET_TOKENS = 24
+# bm25 sütun ağırlıkları: soru metni, açıklama, etiketler, ders (sadece filtre)
+RANK_WEIGHTS = (1.0, 0.5, 2.0, 0.0)
+TEXT_COLUMNS = "{soru_metin dogru_cevap_aciklamasi etiket}"
+# Katlanmış biçimde; sorgu sadece bunlardan oluşuyorsa düşülmez
+STOPWORDS = frozenset(
+    "ve veya ile bir bu su o de da ki mi mu icin gibi daha en cok her hangi hangisi hangileri "
+    "asagidakilerden asagidaki yukaridaki olan olarak ise ya hem ne nedir kac".split()
+)
+
+SEARCH_TABLE_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+    soru_metin, dogru_cevap_aciklamasi, etiket, ders,
+    tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+)
+"""
+
+_FOLD = str.maketrans("çğıöşüâîûÇĞIİÖŞÜÂÎÛ", "cgiosuaiucgiiosuaiu")
+# unicode61 ayırıcılarıyla uyumlu: harf ve rakam dizileri
+_TOKEN = re.compile(r"[^\W_]+")
+
+
+def fold(value):
+    """Arama için Türkçe katlama: küçük harf, Türkçe harfler Latin karşılıklarıyla"""
+    return (value or "").translate(_FOLD).lower()
+
+
+def ders_token(ders_id):
+    return f"d{ders_id}"
+
+
+def search_row(soru_id, ders_id, soru_metin, aciklama, tags):
+    return soru_id, fold(soru_metin), fold(aciklama), " ".join(fold(tag) for tag in tags), ders_token(ders_id)
+
+
+def _table_exists(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (SEARCH_TABLE,)
+    ).fetchone() is not None
+
+
+def rebuild_question_search(db_path=None):
+    """question_search tablosunu soru tablosundan tek işlemde baştan kur; yazılan soru sayısı"""
+    if db_path is None:
+        from app.core.database import db_path
+
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        conn.execute(SEARCH_TABLE_SQL)
+        # question_tags'te satırı olmayan sorular için etiket sütunu (katalogla aynı kural)
+        has_tags = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'question_tags'").fetchone()
+        tag_column = "(SELECT group_concat(t.etiket, ',') FROM question_tags t WHERE t.soru_id = q.soru_id)" if has_tags else "NULL"
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = [
+                search_row(soru_id, ders_id, soru_metin, aciklama, split_tags(table_tags or etiket))
+                for soru_id, ders_id, soru_metin, aciklama, etiket, table_tags in conn.execute(
+                    f"SELECT q.soru_id, q.ders_id, q.soru_metin, q.dogru_cevap_aciklamasi, q.etiket, {tag_column} FROM questions q"
+                )
+            ]
+            conn.execute(f"DELETE FROM {SEARCH_TABLE}")
+            conn.executemany(
+                f"INSERT INTO {SEARCH_TABLE} (rowid, soru_metin, dogru_cevap_aciklamasi, etiket, ders) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        # Parçalı b-ağaçlarını birleştir: sorgular tek segment okur
+        conn.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+    finally:
+        conn.close()
+    return len(rows)
+
+
+def ensure_question_search(db_path=None):
+    """Tablo yoksa veya soru sayısıyla uyuşmuyorsa baştan kur (sunucu başlangıcında)"""
+    if db_path is None:
+        from app.core.database import db_path
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        indexed = conn.execute(f"SELECT COUNT(*) FROM {SEARCH_TABLE}").fetchone()[0] if _table_exists(conn) else None
+        questions = conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+    finally:
+        conn.close()
+    if indexed == questions:
+        return
+    started = time.perf_counter()
+    count = rebuild_question_search(db_path)
+    print(f"✅ Arama dizini kuruldu: {count} soru ({time.perf_counter() - started:.1f} sn)")
+
+
+def sync_question_search(db, questions):
+    """Soruların arama satırlarını yeniden yaz (commit çağırana ait); tablo yoksa başlangıçta kurulur"""
+    if not questions or not db.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": SEARCH_TABLE}
+    ).first():
+        return
+    rows = [search_row(q.soru_id, q.ders_id, q.soru_metin, q.dogru_cevap_aciklamasi, split_tags(q.etiket)) for q in questions]
+    db.execute(text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = :soru_id"), [{"soru_id": row[0]} for row in rows])
+    db.execute(
+        text(f"INSERT INTO {SEARCH_TABLE} (rowid, soru_metin, dogru_cevap_aciklamasi, etiket, ders) "
+             "VALUES (:soru_id, :soru_metin, :aciklama, :etiket, :ders)"),
+        [{"soru_id": r[0], "soru_metin": r[1], "aciklama": r[2], "etiket": r[3], "ders": r[4]} for r in rows]
+    )
+
+
+def parse_search_query(query, ders_id=None):
+    """Kullanıcı metni → (FTS5 MATCH ifadesi, tam terimler, önek terimi); kelime yoksa None
+
+    Tüm kelimeler aranır (VE); yazarken arama için son kelime önek olarak eşleşir.
+    """
+    terms = _TOKEN.findall(fold(query))
+    terms = [term for term in terms if term not in STOPWORDS] or terms
+    terms = terms[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    *exact, last = terms
+    prefix = last if len(last) >= 2 else None
+    match = " ".join([f'"{term}"' for term in exact] + [f'"{last}"*' if prefix else f'"{last}"'])
+    # Kullanıcı terimleri sadece metin sütunlarında; ders terimi filtre
+    match = f"{TEXT_COLUMNS} : ({match})"
+    if ders_id is not None:
+        match = f'{match} AND ders : "{ders_token(int(ders_id))}"'
+    return match, set(exact) if prefix else set(terms), prefix
+
+
+def snippet(value, terms, prefix, width=SNIPPET_TOKENS):
+    """İlk eşleşmenin çevresinden width kelimelik özet; eşleşmeler <b> içinde, gerisi HTML kaçışlı"""
+    tokens = list(_TOKEN.finditer(value or ""))
+    hits = [
+        i for i, token in enumerate(tokens)
+        if (folded := fold(token.group())) in terms or (prefix and folded.startswith(prefix))
+    ]
+    if not hits:
+        return None
+    start = max(0, min(hits[0] - width // 3, len(tokens) - width))
+    end = min(len(tokens), start + width)
+    hit_set = set(hits)
+    parts = ["…" if start > 0 else ""]
+    cursor = tokens[start].start() if start > 0 else 0
+    for i in range(start, end):
+        token = tokens[i]
+        parts.append(html.escape(value[cursor:token.start()]))
+        parts.append(f"<b>{html.escape(token.group())}</b>" if i in hit_set else html.escape(token.group()))
+        cursor = token.end()
+    parts.append("…" if end < len(tokens) else html.escape(value[cursor:]))
+    return "".join(parts)
+
+
+def leading(value, width=SNIPPET_TOKENS):
+    """Metnin ilk width kelimesi, HTML kaçışlı"""
+    tokens = list(_TOKEN.finditer(value or ""))
+    if len(tokens) <= width:
+        return html.escape(value or "")
+    return html.escape(value[:tokens[width - 1].end()]) + "…"
+
+
+def search_questions(db, catalog, query, ders_id=None, page=1, page_size=SEARCH_PAGE_SIZE):
+    """Sıralı arama sonuçları ve toplam eşleşme (en fazla SEARCH_RESULT_CAP); sorguda kelime yoksa ValueError"""
+    parsed = parse_search_query(query, ders_id)
+    if parsed is None:
+        raise ValueError("Arama metni en az bir kelime içermeli.")
+    match, terms, prefix = parsed
+
+    # bm25'e göre en iyi SEARCH_RESULT_CAP + 1 eşleşme (SQLite top-N sıralaması): fazlası varsa toplam kesin değil.
+    # Sayım (pencere fonksiyonu) ve sayfalama aynı sınırlı küme üzerinde, tek sorguda.
+    weights = ", ".join(map(str, RANK_WEIGHTS))
+    offset = (page - 1) * page_size
+    rows = db.execute(
+        text(f"SELECT rowid, score, COUNT(*) OVER () FROM ("
+             f"SELECT rowid, bm25({SEARCH_TABLE}, {weights}) AS score FROM {SEARCH_TABLE} "
+             f"WHERE {SEARCH_TABLE} MATCH :match ORDER BY score LIMIT :cap"
+             f") ORDER BY score LIMIT :limit OFFSET :offset"),
+        {"match": match, "cap": SEARCH_RESULT_CAP + 1, "limit": page_size, "offset": offset}
+    ).fetchall()
+    if rows:
+        matched = rows[0][2]
+    else:
+        # Son sayfanın ötesi: toplam ayrıca (yine sınırlı) sayılır
+        matched = db.execute(
+            text(f"SELECT COUNT(*) FROM (SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match LIMIT :cap)"),
+            {"match": match, "cap": SEARCH_RESULT_CAP + 1}
+        ).scalar()
+    exact = matched <= SEARCH_RESULT_CAP
+    # Sınırı aşıldığını anlamak için fazladan okunan satır gösterilmez
+    rows = rows[:max(0, SEARCH_RESULT_CAP - offset)]
+
+    results = []
+    for soru_id, score, _ in rows:
+        question = catalog.get(soru_id)
+        if question is None:
+            continue
+        payload = question.payload
+        field, text_snippet = "soru_metin", snippet(payload["soru_metin"], terms, prefix)
+        if text_snippet is None:
+            field, text_snippet = "dogru_cevap_aciklamasi", snippet(payload["dogru_cevap_aciklamasi"], terms, prefix)
+        if text_snippet is None:
+            # Sadece etiket eşleşti: soru metninin başı
+            field, text_snippet = "etiket", leading(payload["soru_metin"])
+        results.append({
+            "soru_id": soru_id,
+            "ders_id": question.ders_id,
+            "konu_id": question.konu_id,
+            "altbaslik_id": question.altbaslik_id,
+            "zorluk": payload["zorluk"],
+            "kalibre_zorluk": question.zorluk,
+            "etiket": payload["etiket"],
+            "eslesen_alan": field,
+            "ozet": text_snippet,
+            "skor": round(-score, 4),
+        })
+    return {
+        "toplam": min(matched, SEARCH_RESULT_CAP),
+        "toplam_kesin": exact,
+        "sayfa": page,
+        "boyut": page_size,
+        "sonuclar": results
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="question_search tam metin arama tablosunu baştan kur")
+    parser.add_argument("--db", default=None, help="SQLite veritabanı yolu (varsayılan: app/core/database.db)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    count = rebuild_question_search(args.db)
+    print(f"✅ {count} soru arama dizinine yazıldı ({time.perf_counter() - started:.1f} sn)")
+
+
+if __name__ == "__main__":
+    main()
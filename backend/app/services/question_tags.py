@@ -0,0 +1,190 @@
+"""
+Soru etiketleri: normalleştirme, question_tags tablosu ve ters indeks.
+
+Questions.etiket, import_questions.py'nin virgülle birleştirdiği serbest
+metindir. Etiketler Türkçe küçük harfe çevrilir, boşlukları sadeleştirilir
+ve question_tags tablosuna (soru_id, etiket) satırları olarak yazılır.
+Soru kataloğu bu tablodan etiket → sıralı soru konumları ters indeksini
+kurar. Bir etiketin soruları tek sözlük aramasıyla, bir dersin içindekiler
+ikili aramayla bulunur. Tabloda satırı olmayan sorular (tablo henüz
+doldurulmamış eski veritabanları) için etiket sütunu okunur.
+
+Sorgu sözdiziminde virgül VE, dikey çizgi VEYA demektir; VE önce bağlanır:
+    "tyt"                tyt etiketli sorular
+    "tyt,geometri"       iki etiketi birden taşıyanlar
+    "tyt|ayt"            en az birini taşıyanlar
+    "tyt,geometri|ayt"   (tyt VE geometri) VEYA ayt
+
+Kullanım (backend dizininden; tabloyu Questions.etiket'ten yeniden doldurur):
+    python -m app.services.question_tags
+    python -m app.services.question_tags --db app/core/database.db
+"""
+import argparse
+import sqlite3
+
+import numpy as np
+
+TAG_TABLE = "question_tags"
+
+TAG_TABLE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {TAG_TABLE} (
+    soru_id INTEGER NOT NULL,
+    etiket TEXT NOT NULL,
+    PRIMARY KEY (soru_id, etiket),
+    FOREIGN KEY (soru_id) REFERENCES questions (soru_id)
+)
+"""
+TAG_INDEX_SQL = f"CREATE INDEX IF NOT EXISTS ix_question_tags_etiket ON {TAG_TABLE} (etiket)"
+
+# str.lower() Türkçe büyük I ve İ'yi yanlış çevirir
+_TURKISH_LOWER = str.maketrans({"I": "ı", "İ": "i"})
+_EMPTY = np.zeros(0, dtype=np.int64)
+
+
+def normalize_tag(tag):
+    """Türkçe küçük harf, baş/son boşluksuz, iç boşluklar tek"""
+    return " ".join(tag.translate(_TURKISH_LOWER).lower().split())
+
+
+def split_tags(etiket):
+    """Virgülle ayrılmış etiket metninden sıralı, tekrarsız normal etiketler"""
+    if not etiket:
+        return ()
+    return tuple(sorted({tag for tag in map(normalize_tag, etiket.split(",")) if tag}))
+
+
+def parse_tag_query(expression):
+    """Sorgu metni → VEYA ile bağlı VE grupları; boş sorgu boş demet"""
+    groups = []
+    for group in (expression or "").split("|"):
+        tags = split_tags(group)
+        if tags and tags not in groups:
+            groups.append(tags)
+    return tuple(groups)
+
+
+def format_tag_query(groups):
+    return "|".join(",".join(group) for group in groups)
+
+
+class TagIndex:
+    """Etiket → artan sıralı soru konumları (katalog sırası)"""
+
+    def __init__(self, question_tags):
+        postings = {}
+        for position, tags in enumerate(question_tags):
+            for tag in tags:
+                postings.setdefault(tag, []).append(position)
+        self.postings = {tag: np.array(positions, dtype=np.int64) for tag, positions in postings.items()}
+
+    def __len__(self):
+        return len(self.postings)
+
+    def lookup(self, tag):
+        return self.postings.get(normalize_tag(tag), _EMPTY)
+
+    def _posting(self, tag, start, end):
+        positions = self.postings.get(tag, _EMPTY)
+        if end is None:
+            return positions
+        low, high = np.searchsorted(positions, (start, end))
+        return positions[low:high]
+
+    def match_all(self, tags, start=0, end=None):
+        """Etiketlerin hepsini taşıyan konumlar: en kısa listeyi diğerlerinde ikili aramayla süz"""
+        postings = sorted((self._posting(tag, start, end) for tag in tags), key=len)
+        if not postings:
+            return _EMPTY
+        result = postings[0]
+        for other in postings[1:]:
+            if not len(result):
+                break
+            found = np.searchsorted(other, result)
+            result = result[other[np.minimum(found, len(other) - 1)] == result]
+        return result
+
+    def query(self, groups, start=0, end=None):
+        """parse_tag_query gruplarına uyan konumlar, artan sırada; verilirse [start, end) aralığında"""
+        matches = [self.match_all(group, start, end) for group in groups]
+        if not matches:
+            return _EMPTY
+        if len(matches) == 1:
+            return matches[0]
+        # Gruplar ayrı ayrı sıralı: birleştirip sırala, tekrarları at
+        merged = np.sort(np.concatenate(matches), kind="mergesort")
+        return merged[np.concatenate(([True], merged[1:] != merged[:-1]))]
+
+    def counts(self, start=0, end=None):
+        """[start, end) konum aralığındaki {etiket: soru sayısı}"""
+        counts = {}
+        for tag, positions in self.postings.items():
+            count = len(self._posting(tag, start, end))
+            if count:
+                counts[tag] = count
+        return counts
+
+
+def question_tags(db):
+    """{soru_id: etiketler} question_tags tablosundan"""
+    from app.core.models import QuestionTag
+
+    tags = {}
+    for soru_id, etiket in db.query(QuestionTag.soru_id, QuestionTag.etiket).order_by(QuestionTag.soru_id, QuestionTag.etiket):
+        tags.setdefault(soru_id, []).append(etiket)
+    return {soru_id: tuple(values) for soru_id, values in tags.items()}
+
+
+def sync_question_tags(db, questions):
+    """Soruların question_tags satırlarını etiket sütunundan yeniden yaz
+
+    soru_id'ler atanmış olmalı (flush); commit çağırana aittir.
+    """
+    from app.core.models import QuestionTag
+
+    soru_ids = [q.soru_id for q in questions]
+    if not soru_ids:
+        return
+    db.query(QuestionTag).filter(QuestionTag.soru_id.in_(soru_ids)).delete(synchronize_session=False)
+    db.bulk_insert_mappings(QuestionTag, [
+        {"soru_id": q.soru_id, "etiket": tag} for q in questions for tag in split_tags(q.etiket)
+    ])
+
+
+def rebuild_question_tags(db_path=None):
+    """question_tags tablosunu Questions.etiket'ten tek işlemde yeniden doldur; (soru, satır) sayıları"""
+    from app.services.question_catalog import invalidate_question_catalog
+
+    if db_path is None:
+        from app.core.database import db_path
+
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    try:
+        conn.execute(TAG_TABLE_SQL)
+        conn.execute(TAG_INDEX_SQL)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            questions = conn.execute("SELECT soru_id, etiket FROM questions").fetchall()
+            rows = [(soru_id, tag) for soru_id, etiket in questions for tag in split_tags(etiket)]
+            conn.execute(f"DELETE FROM {TAG_TABLE}")
+            conn.executemany(f"INSERT INTO {TAG_TABLE} (soru_id, etiket) VALUES (?, ?)", rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+    invalidate_question_catalog(db_path)
+    return len(questions), len(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="question_tags tablosunu soruların etiket sütunundan yeniden doldur")
+    parser.add_argument("--db", default=None, help="SQLite veritabanı yolu (varsayılan: app/core/database.db)")
+    args = parser.parse_args(argv)
+
+    num_questions, num_rows = rebuild_question_tags(args.db)
+    print(f"✅ {num_questions} soru için {num_rows} etiket satırı yazıldı")
+
+
+if __name__ == "__main__":
+    main()
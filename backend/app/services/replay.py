@@ -0,0 +1,390 @@
+"""
+Submission tablosundan SimpleAIModel ve EnhancedPracticeModel kullanıcı
+istatistiklerini yeniden oluşturur.
+
+Cevaplar questions tablosuyla birleştirilip parça parça okunur ve her parça
+satır satır update() çağırmak yerine NumPy gruplamalarıyla işlenir. Sönümlü
+sayaçlarda her cevabın ağırlığı kullanıcının o parçadaki son cevabına göre
+2^(-yaş/yarı_ömür) olarak hesaplanır; önceki parçalardan gelen değerler de
+aynı oranda küçültülür, böylece sonuç UserStats.record ile aynıdır.
+
+Kullanım (backend dizininden, sunucu kapalıyken):
+    python -m app.services.replay
+    python -m app.services.replay --db app/core/database.db --chunk-size 200000 --dry-run
+    python -m app.services.replay --half-life 500
+"""
+import argparse
+import os
+import sqlite3
+import time
+from array import array
+from datetime import datetime, timezone, timedelta
+
+import numpy as np
+
+from app.services.item_calibration import calibrated_zorluk_sql
+from app.services.learning_curve import LearningCurve, BUCKET_RESOLUTIONS, bucket_starts
+from app.services.user_stats import UserStats, CURRICULUM, DEFAULT_HALF_LIFE, SUBJECT, TOPIC, DIFFICULTY
+from app.services.user_stats_store import UserStatsStore
+
+CHUNK_SIZE = 200_000
+RECENT_PERFORMANCE_SIZE = 10
+TURKEY_TZ = timezone(timedelta(hours=3))
+ROW_WIDTH = CURRICULUM.size * 2
+
+# answered_at Türkiye saatiyle ve saat dilimi bilgisi olmadan saklanıyor; epoch saniyesine çevir
+# (julianday milisaniye hassasiyetindedir, öğrenme eğrisi için yeterli).
+# Sıralama birincil anahtara göre yapılır (ekleme sırası = cevap sırası), ek sıralama maliyeti yok.
+# Zorluk, canlı kayıtla aynı olsun diye varsa question_calibration'daki kalibre seviyedir.
+# Boş bırakılan ve sonucu olmayan cevaplar, kalibrasyondaki gibi (RESPONSE_FILTER) atlanır.
+REPLAY_QUERY = """
+SELECT s.user_id,
+       COALESCE(q.ders_id, -1),
+       COALESCE(q.konu_id, -1),
+       COALESCE({zorluk}, -1),
+       s.is_correct,
+       COALESCE(ROUND((julianday(s.answered_at) - 2440587.5) * 86400.0, 3) - 10800.0, 0)
+FROM submissions s
+JOIN questions q ON q.soru_id = s.question_id
+{calibration_join}
+WHERE s.user_id IS NOT NULL
+  AND s.is_correct IS NOT NULL AND COALESCE(s.is_skipped, 0) = 0
+ORDER BY s.id
+"""
+
+
+def _tail_mask(group_ends, group_of, n):
+    """Her grubun son n elemanı için True; gruplar ardışık olmalı"""
+    positions = np.arange(len(group_of))
+    return group_ends[group_of] - positions < n
+
+
+class ReplayAccumulator:
+    """Kullanıcı başına sayaçları yoğun NumPy dizilerinde biriktirir"""
+
+    def __init__(self, track_learning_curve=True, half_life=DEFAULT_HALF_LIFE):
+        self.track_learning_curve = track_learning_curve
+        self.half_life = half_life
+        self.slots = {}
+        self.user_ids = []
+        self.capacity = 0
+        self.counts = np.zeros((0, ROW_WIDTH), dtype=np.float64)  # Sönümlü, son cevabın ağırlığı 1
+        self.weighted_totals = np.zeros(0, dtype=np.float64)
+        self.weighted_corrects = np.zeros(0, dtype=np.float64)
+        self.totals = np.zeros(0, dtype=np.int64)
+        self.corrects = np.zeros(0, dtype=np.int64)
+        self.last_ts = np.zeros(0, dtype=np.float64)
+        self.extra = {}    # slot -> {(kind, key): [total, correct]}
+        self.recent = _TailBuffer(RECENT_PERFORMANCE_SIZE)
+        self.curve_points = _TailBuffer(LearningCurve.RECENT_SIZE)
+        self.curve_buckets = {
+            resolution: _TailBuffer(getattr(LearningCurve, f"{resolution.upper()}_SIZE"), merge=True)
+            for resolution in BUCKET_RESOLUTIONS
+        }
+        self.rows_processed = 0
+
+    def _grow(self, needed):
+        if needed <= self.capacity:
+            return
+        capacity = max(needed, self.capacity * 2, 1024)
+        extra_rows = capacity - self.capacity
+        self.counts = np.vstack([self.counts, np.zeros((extra_rows, ROW_WIDTH), dtype=np.float64)])
+        self.weighted_totals = np.concatenate([self.weighted_totals, np.zeros(extra_rows, dtype=np.float64)])
+        self.weighted_corrects = np.concatenate([self.weighted_corrects, np.zeros(extra_rows, dtype=np.float64)])
+        self.totals = np.concatenate([self.totals, np.zeros(extra_rows, dtype=np.int64)])
+        self.corrects = np.concatenate([self.corrects, np.zeros(extra_rows, dtype=np.int64)])
+        self.last_ts = np.concatenate([self.last_ts, np.zeros(extra_rows, dtype=np.float64)])
+        self.capacity = capacity
+
+    def _slots_for(self, user_ids):
+        slots = np.empty(len(user_ids), dtype=np.int64)
+        for i, user_id in enumerate(user_ids.tolist()):
+            slot = self.slots.get(user_id)
+            if slot is None:
+                slot = len(self.user_ids)
+                self.slots[user_id] = slot
+                self.user_ids.append(user_id)
+            slots[i] = slot
+        self._grow(len(self.user_ids))
+        return slots
+
+    def add_chunk(self, rows):
+        data = np.array(rows, dtype=np.float64)
+        n = len(data)
+        if n == 0:
+            return
+
+        # Parça içinde kullanıcıya göre kararlı sırala: her kullanıcının cevapları ardışık ve kronolojik kalır
+        order = np.argsort(data[:, 0], kind="stable")
+        data = data[order]
+        user_id = data[:, 0].astype(np.int64)
+        ders_id = data[:, 1].astype(np.int64)
+        konu_id = data[:, 2].astype(np.int64)
+        zorluk = data[:, 3].astype(np.int64)
+        correct = (data[:, 4] != 0).astype(np.int64)
+        ts = data[:, 5]
+
+        unique_users, starts, sizes = np.unique(user_id, return_index=True, return_counts=True)
+        slots = self._slots_for(unique_users)
+        local = np.repeat(np.arange(len(unique_users)), sizes)
+        ends = starts + sizes - 1
+
+        # Önceki değerler bu parçadaki cevap sayısı kadar sönümlenir; yeni cevaplar yaşlarına göre ağırlıklanır
+        decay = np.exp2(-sizes / self.half_life)
+        weight = np.exp2(-(ends[local] - np.arange(n)) / self.half_life)
+        weighted_correct = weight * correct
+        self.counts[slots] *= decay[:, None]
+        self.weighted_totals[slots] = self.weighted_totals[slots] * decay + np.add.reduceat(weight, starts)
+        self.weighted_corrects[slots] = self.weighted_corrects[slots] * decay + np.add.reduceat(weighted_correct, starts)
+        self._decay_extra(slots, decay)
+
+        # Ders/konu/zorluk sayaçları: tek bincount ile (kullanıcı, satır, total/correct) hücrelerine topla
+        subject_row = CURRICULUM.rows_for(SUBJECT, ders_ids=ders_id)
+        topic_row = CURRICULUM.rows_for(TOPIC, ders_ids=ders_id, konu_ids=konu_id)
+        difficulty_row = CURRICULUM.rows_for(DIFFICULTY, zorluk=zorluk)
+
+        cells = len(unique_users) * ROW_WIDTH
+        block = np.zeros(cells, dtype=np.float64)
+        for kind, key_rows in ((SUBJECT, subject_row), (TOPIC, topic_row), (DIFFICULTY, difficulty_row)):
+            on_grid = key_rows >= 0
+            index = local[on_grid] * ROW_WIDTH + 2 * key_rows[on_grid]
+            block += np.bincount(index, weights=weight[on_grid], minlength=cells)
+            block += np.bincount(index + 1, weights=weighted_correct[on_grid], minlength=cells)
+            self._add_off_grid(kind, np.flatnonzero(~on_grid), slots[local], ders_id, konu_id, zorluk, correct, weight)
+        self.counts[slots] += block.reshape(len(unique_users), ROW_WIDTH)
+
+        # Genel toplamlar ve her cevaptan sonraki kümülatif doğruluk
+        prior_totals = self.totals[slots]
+        prior_corrects = self.corrects[slots]
+        correct_cumsum = np.cumsum(correct)
+        group_offset = correct_cumsum[starts] - correct[starts]
+        running_total = prior_totals[local] + np.arange(n) - starts[local] + 1
+        running_correct = prior_corrects[local] + correct_cumsum - group_offset[local]
+
+        self.totals[slots] += sizes
+        self.corrects[slots] += running_correct[ends] - prior_corrects
+        self.last_ts[slots] = np.maximum(self.last_ts[slots], np.maximum.reduceat(ts, starts))
+
+        # Son cevaplar: her kullanıcının sadece son RECENT_PERFORMANCE_SIZE cevabı gerekir
+        tail = _tail_mask(ends, local, RECENT_PERFORMANCE_SIZE)
+        self.recent.add(slots[local[tail]], ts[tail], correct[tail])
+
+        if self.track_learning_curve:
+            self._add_learning_curve(slots, local, ends, ts, running_correct / running_total)
+
+        self.rows_processed += n
+
+    def _decay_extra(self, slots, decay):
+        if not self.extra:
+            return
+        for slot, factor in zip(slots.tolist(), decay.tolist()):
+            entries = self.extra.get(slot)
+            if entries:
+                for entry in entries.values():
+                    entry[0] *= factor
+                    entry[1] *= factor
+
+    def _add_off_grid(self, kind, indices, row_slots, ders_id, konu_id, zorluk, correct, weight):
+        """Izgara dışı anahtarlar (ör. konu_id'si olmayan sorular) nadirdir; tek tek işlenir"""
+        for i in indices.tolist():
+            if kind == SUBJECT:
+                key = int(ders_id[i])
+            elif kind == TOPIC:
+                key = (int(ders_id[i]), int(konu_id[i]) if konu_id[i] >= 0 else None)
+            else:
+                key = int(zorluk[i]) if zorluk[i] >= 0 else None
+            entry = self.extra.setdefault(int(row_slots[i]), {}).setdefault((kind, key), [0.0, 0.0])
+            entry[0] += float(weight[i])
+            if correct[i]:
+                entry[1] += float(weight[i])
+
+    def _add_learning_curve(self, slots, local, ends, ts, accuracy):
+        tail = _tail_mask(ends, local, LearningCurve.RECENT_SIZE)
+        self.curve_points.add(slots[local[tail]], ts[tail], accuracy[tail])
+
+        for resolution in BUCKET_RESOLUTIONS:
+            starts_of = bucket_starts(resolution, ts)
+            boundary = np.ones(len(ts), dtype=bool)
+            boundary[1:] = (local[1:] != local[:-1]) | (starts_of[1:] != starts_of[:-1])
+            segment_starts = np.flatnonzero(boundary)
+            segment_local = local[segment_starts]
+
+            # Deque zaten sınırlı; sadece her kullanıcının tutulacak son kovalarını sakla
+            last_segment = np.ones(len(segment_starts), dtype=bool)
+            last_segment[:-1] = segment_local[1:] != segment_local[:-1]
+            segment_ends = np.zeros(len(slots), dtype=np.int64)
+            segment_ends[segment_local[last_segment]] = np.flatnonzero(last_segment)
+            keep = _tail_mask(segment_ends, segment_local, self.curve_buckets[resolution].maxlen)
+
+            self.curve_buckets[resolution].add(
+                slots[segment_local[keep]],
+                starts_of[segment_starts[keep]],
+                np.add.reduceat(accuracy, segment_starts)[keep],
+                np.diff(np.append(segment_starts, len(ts)))[keep].astype(np.float64)
+            )
+
+    def build(self, learning_curve=True, tz=None):
+        """Biriken sayaçlardan {user_id: UserStats} oluştur"""
+        counts = self.counts[:len(self.user_ids)]
+        recent = self.recent.by_slot()
+        if learning_curve:
+            curve_points = self.curve_points.by_slot()
+            curve_buckets = {resolution: buffer.by_slot() for resolution, buffer in self.curve_buckets.items()}
+
+        user_stats = {}
+        for slot, user_id in enumerate(self.user_ids):
+            user_data = UserStats(learning_curve=None, half_life=self.half_life)
+            user_data.total_questions = int(self.totals[slot])
+            user_data.correct_answers = int(self.corrects[slot])
+            user_data.weighted_total = float(self.weighted_totals[slot])
+            user_data.weighted_correct = float(self.weighted_corrects[slot])
+            user_data.counts = array('d', counts[slot].tobytes())
+            extra = self.extra.get(slot)
+            user_data.extra = {key: list(value) for key, value in extra.items()} if extra else None
+            user_data.recent_performance = [int(correct) for _, correct in recent.get(slot, [])]
+            if learning_curve:
+                curve = LearningCurve()
+                curve.recent.extend(curve_points.get(slot, []))
+                for resolution, buckets in curve_buckets.items():
+                    getattr(curve, resolution).extend(
+                        [start, accuracy_sum, int(count)] for start, accuracy_sum, count in buckets.get(slot, [])
+                    )
+                user_data.learning_curve = curve
+            if self.last_ts[slot] > 0:
+                user_data.last_activity = datetime.fromtimestamp(float(self.last_ts[slot]), tz)
+            user_stats[user_id] = user_data
+        return user_stats
+
+
+class _TailBuffer:
+    """Her kullanıcı için son maxlen kaydı NumPy dizilerinde tutar.
+
+    Kayıtlar (slot, anahtar, değerler...) olarak eklenir; merge=True ise aynı
+    kullanıcının ardışık aynı anahtarlı kayıtları (aynı kova) toplanarak birleştirilir.
+    Sıkıştırma, bekleyen kayıtlar tutulanların birkaç katına çıkınca yapılır.
+    """
+
+    def __init__(self, maxlen, merge=False):
+        self.maxlen = maxlen
+        self.merge = merge
+        self.parts = []
+        self.pending = 0
+        self.kept = 0
+
+    def add(self, slots, key, *values):
+        if len(slots) == 0:
+            return
+        self.parts.append((slots, key) + values)
+        self.pending += len(slots)
+        if self.pending > max(4 * self.kept, CHUNK_SIZE):
+            self.compact()
+
+    def compact(self):
+        if not self.parts:
+            return
+        columns = [np.concatenate(column) for column in zip(*self.parts)]
+        # Kararlı sıralama: her kullanıcının kayıtları geliş (kronolojik) sırasında kalır
+        order = np.argsort(columns[0], kind="stable")
+        columns = [column[order] for column in columns]
+        slots, keys = columns[0], columns[1]
+
+        if self.merge and len(slots) > 1:
+            boundary = np.ones(len(slots), dtype=bool)
+            boundary[1:] = (slots[1:] != slots[:-1]) | (keys[1:] != keys[:-1])
+            segment_starts = np.flatnonzero(boundary)
+            columns = [slots[segment_starts], keys[segment_starts]] + [
+                np.add.reduceat(column, segment_starts) for column in columns[2:]
+            ]
+            slots = columns[0]
+
+        last = np.ones(len(slots), dtype=bool)
+        last[:-1] = slots[1:] != slots[:-1]
+        group_ends = np.flatnonzero(last)
+        group_of = np.cumsum(np.concatenate(([0], last[:-1]))).astype(np.int64)
+        keep = _tail_mask(group_ends, group_of, self.maxlen)
+
+        self.parts = [tuple(column[keep] for column in columns)]
+        self.kept = self.pending = int(keep.sum())
+
+    def by_slot(self):
+        """{slot: [(anahtar, değerler...), ...]} döndür"""
+        self.compact()
+        if not self.parts:
+            return {}
+        slots = self.parts[0][0]
+        rows = list(zip(*(column.tolist() for column in self.parts[0][1:])))
+        unique_slots, starts, sizes = np.unique(slots, return_index=True, return_counts=True)
+        return {
+            slot: rows[start:start + size]
+            for slot, start, size in zip(unique_slots.tolist(), starts.tolist(), sizes.tolist())
+        }
+
+
+def replay_submissions(db_path, chunk_size=CHUNK_SIZE, track_learning_curve=True, half_life=DEFAULT_HALF_LIFE):
+    """Tüm cevapları parça parça okuyup biriktiriciye işle"""
+    accumulator = ReplayAccumulator(track_learning_curve=track_learning_curve, half_life=half_life)
+    conn = sqlite3.connect(db_path)
+    try:
+        zorluk, calibration_join = calibrated_zorluk_sql(conn)
+        cursor = conn.execute(REPLAY_QUERY.format(zorluk=zorluk, calibration_join=calibration_join))
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            accumulator.add_chunk(rows)
+    finally:
+        conn.close()
+    return accumulator
+
+
+def rebuild_user_stats(db_path=None, storage_dir=None, chunk_size=CHUNK_SIZE, dry_run=False, half_life=DEFAULT_HALF_LIFE):
+    """Submission tablosundan iki modelin kullanıcı istatistiklerini yeniden yaz"""
+    if db_path is None:
+        from app.core.database import db_path
+    storage_dir = storage_dir or os.path.dirname(__file__)
+
+    started = time.perf_counter()
+    accumulator = replay_submissions(db_path, chunk_size=chunk_size, half_life=half_life)
+    replay_seconds = time.perf_counter() - started
+
+    # Modeller last_activity'yi farklı tutuyor: Simple Türkiye saatiyle, Enhanced yerel saatle
+    simple_stats = accumulator.build(learning_curve=False, tz=TURKEY_TZ)
+    enhanced_stats = accumulator.build(learning_curve=True)
+
+    if not dry_run:
+        for table, user_stats in (("simple_user_stats", simple_stats), ("enhanced_user_stats", enhanced_stats)):
+            store = UserStatsStore(os.path.join(storage_dir, "user_stats.db"), table)
+            try:
+                store.replace_all(user_stats.items())
+            finally:
+                store.close()
+
+    total_seconds = time.perf_counter() - started
+    return {
+        "submissions": accumulator.rows_processed,
+        "users": len(accumulator.user_ids),
+        "replay_seconds": replay_seconds,
+        "total_seconds": total_seconds,
+        "rows_per_minute": accumulator.rows_processed / replay_seconds * 60 if replay_seconds > 0 else 0,
+        "written": not dry_run,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Model istatistiklerini submissions tablosundan yeniden oluştur")
+    parser.add_argument("--db", default=None, help="SQLite veritabanı yolu (varsayılan: app/core/database.db)")
+    parser.add_argument("--storage-dir", default=None, help="Model dosyalarının dizini (varsayılan: app/services)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="Sadece hesapla, dosyalara yazma")
+    parser.add_argument("--half-life", type=float, default=DEFAULT_HALF_LIFE, help="Sayaçların yarı ömrü (cevap sayısı)")
+    args = parser.parse_args(argv)
+
+    result = rebuild_user_stats(args.db, args.storage_dir, args.chunk_size, args.dry_run, args.half_life)
+    print(f"✅ {result['submissions']:,} cevap, {result['users']:,} kullanıcı yeniden işlendi "
+          f"({result['replay_seconds']:.2f} sn, dakikada {result['rows_per_minute']:,.0f} cevap)")
+    if not result["written"]:
+        print("ℹ️ --dry-run: dosyalara yazılmadı")
+
+
+if __name__ == "__main__":
+    main()
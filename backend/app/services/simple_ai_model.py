@@ -1,143 +1,156 @@
 import os
-import pickle
+import threading
 import numpy as np
 from datetime import datetime, timezone, timedelta
-from collections import defaultdict
+
+from app.services.user_stats import UserStats, EMPTY_USER_STATS, DEFAULT_HALF_LIFE, SUBJECT, TOPIC, DIFFICULTY, decay_parameters
+from app.services.user_stats_cache import UserStatsCache
+from app.services.user_stats_store import UserStatsStore
+from app.services.write_behind import WriteBehindFlusher
 
 class SimpleAIModel:
-    def __init__(self):
-        self.user_stats_path = os.path.join(os.path.dirname(__file__), "simple_user_stats.pkl")
+    def __init__(self, storage_dir=None, write_behind=True, flush_interval=5.0, flush_every=100, cache_size=10_000,
+                 half_life=DEFAULT_HALF_LIFE, shared=False):
+        storage_dir = storage_dir or os.path.dirname(__file__)
+        self.user_stats_path = os.path.join(storage_dir, "simple_user_stats.pkl")
+        self.store = UserStatsStore(os.path.join(storage_dir, "user_stats.db"), "simple_user_stats")
+        self.cache_size = cache_size
+        self.half_life = half_life  # Sayaçların yarı ömrü (cevap sayısı)
+        # shared: depo birden çok worker süreciyle paylaşılır; her güncelleme satırı atomik
+        # olarak günceller, okumalar satır sürümü değiştiyse önbelleği tazeler
+        self.shared = shared
+        if shared:
+            write_behind = False  # Bellekte bekleyen kopya diğer worker'ların güncellemelerini ezerdi
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
         self.user_stats = self.load_user_stats()
-        self.data_cleanup_threshold = 1000  # Veri temizleme eşiği
-        self.data_cleanup_percentage = 0.25  # Silinecek veri yüzdesi (%25)
+        
+        self.flusher = None
+        if write_behind:
+            self.flusher = WriteBehindFlusher(
+                self._flush_dirty_users,
+                flush_interval=flush_interval,
+                max_pending_updates=flush_every,
+                name="simple-ai-flusher"
+            )
+            self.flusher.start()
     
     def load_user_stats(self):
-        if os.path.exists(self.user_stats_path):
-            try:
-                with open(self.user_stats_path, "rb") as f:
-                    return pickle.load(f)
-            except:
-                pass
+        # Eski simple_user_stats.pkl varsa bir kereliğine SQLite deposuna taşı
+        if self.store.count() == 0 and os.path.exists(self.user_stats_path):
+            if self.store.migrate_from_pickle(self.user_stats_path, self._restore_user_data) == 0:
+                print("ℹ️ İstatistikler cevaplardan yeniden oluşturulabilir: python -m app.services.replay")
         
-        return defaultdict(self._create_user_data)
+        # Kullanıcılar ilk erişimde tek tek yüklenir; bellekte sadece son aktif olanlar tutulur
+        return UserStatsCache(self._load_user, capacity=self.cache_size)
+    
+    def _load_user(self, user_id):
+        data, version = self.store.load_versioned(user_id)
+        if data is None:
+            return None
+        data = self._restore_user_data(data)
+        data.version = version
+        return data
+    
+    def _restore_user_data(self, data):
+        """Diskten okunan veriyi kompakt kullanıcı kaydına çevir (eski dict düzeni dahil)"""
+        if not isinstance(data, UserStats):
+            data = UserStats.from_legacy(data)
+        data.set_half_life(self.half_life)
+        return data
     
     def _create_user_data(self):
-        return {
-            'total_questions': 0,
-            'correct_answers': 0,
-            'subject_performance': defaultdict(self._create_performance_data),
-            'topic_performance': defaultdict(self._create_performance_data),
-            'difficulty_performance': defaultdict(self._create_performance_data),
-            'recent_performance': [],
-            'last_activity': None,
-            'question_history': [],  # Soru geçmişini takip etmek için
-            'last_cleanup_at': 0  # Son temizleme yapılan soru sayısı
-        }
+        return UserStats(half_life=self.half_life)
     
     def _create_performance_data(self):
+        # Eski pickle dosyalarındaki defaultdict'ler bu metoda referans verir; okuyabilmek için korunuyor
         return {'total': 0, 'correct': 0}
     
+    def _get_user(self, user_id):
+        """Yazma için kullanıcı kaydını getir, yoksa oluştur"""
+        user_data = self.user_stats.get(user_id)
+        if user_data is None:
+            user_data = self._create_user_data()
+            self.user_stats[user_id] = user_data
+        return user_data
+    
+    def _peek_user(self, user_id):
+        """Okuma için kullanıcı kaydını getir; bilinmeyen kullanıcı için kayıt eklemez"""
+        user_data = self.user_stats.get(user_id, EMPTY_USER_STATS)
+        if self.shared and self.store.cached_version(user_id) != user_data.version:
+            # Başka bir worker satırı güncellemiş: yeni sürümü yükle
+            fresh = self._load_user(user_id)
+            if fresh is not None:
+                self.user_stats[user_id] = fresh
+                user_data = fresh
+        return user_data
+    
     def save_user_stats(self):
+        """Bekleyen tüm kullanıcıları hemen diske yaz"""
         try:
-            with open(self.user_stats_path, "wb") as f:
-                pickle.dump(self.user_stats, f)
+            self._flush_dirty_users(None)
         except Exception as e:
             print(f"User stats kaydetme hatası: {e}")
-            pass
-    
-    def cleanup_old_data(self, user_id):
-        """Kullanıcı her 1000'in katına ulaştığında en eski %25 veriyi temizle"""
-        user_data = self.user_stats[user_id]
-        
-        # Her 1000'in katında temizleme yap
-        if user_data['total_questions'] > 0 and user_data['total_questions'] % self.data_cleanup_threshold == 0:
-            # Son temizleme yapılan yerden farklı olmalı
-            if user_data['last_cleanup_at'] != user_data['total_questions']:
-                print(f"🧹 Veri temizleme başlatılıyor - Kullanıcı {user_id}: {user_data['total_questions']} soru (1000'in katı)")
-                
-                # En eski %25 soruyu temizle
-                questions_to_remove = int(user_data['total_questions'] * self.data_cleanup_percentage)
-                
-                # Genel istatistikleri güncelle
-                user_data['total_questions'] -= questions_to_remove
-                
-                # Doğru cevap sayısını orantılı olarak azalt
-                # Bu yaklaşım genel başarı oranını korur
-                overall_accuracy = user_data['correct_answers'] / (user_data['total_questions'] + questions_to_remove)
-                user_data['correct_answers'] = int(user_data['total_questions'] * overall_accuracy)
-                
-                # Konu bazlı performansı güncelle
-                for ders_id, subject_data in user_data['subject_performance'].items():
-                    if subject_data['total'] > 0:
-                        # Her konudan orantılı olarak veri çıkar
-                        subject_accuracy = subject_data['correct'] / subject_data['total']
-                        remove_from_subject = min(questions_to_remove // len(user_data['subject_performance']), subject_data['total'])
-                        
-                        subject_data['total'] -= remove_from_subject
-                        subject_data['correct'] = int(subject_data['total'] * subject_accuracy)
-                
-                # Konu bazlı performansı güncelle
-                for topic_key, topic_data in user_data['topic_performance'].items():
-                    if topic_data['total'] > 0:
-                        topic_accuracy = topic_data['correct'] / topic_data['total']
-                        remove_from_topic = min(questions_to_remove // len(user_data['topic_performance']), topic_data['total'])
-                        
-                        topic_data['total'] -= remove_from_topic
-                        topic_data['correct'] = int(topic_data['total'] * topic_accuracy)
-                
-                # Zorluk bazlı performansı güncelle
-                for difficulty, diff_data in user_data['difficulty_performance'].items():
-                    if diff_data['total'] > 0:
-                        diff_accuracy = diff_data['correct'] / diff_data['total']
-                        remove_from_diff = min(questions_to_remove // len(user_data['difficulty_performance']), diff_data['total'])
-                        
-                        diff_data['total'] -= remove_from_diff
-                        diff_data['correct'] = int(diff_data['total'] * diff_accuracy)
-                
-                # Son performans listesini koru (en son 10 veri)
-                if len(user_data['recent_performance']) > 10:
-                    user_data['recent_performance'] = user_data['recent_performance'][-10:]
-                
-                # Son temizleme yapılan yeri kaydet
-                user_data['last_cleanup_at'] = user_data['total_questions'] + questions_to_remove
-                
-                print(f"✅ Veri temizleme tamamlandı - Kullanıcı {user_id}: {user_data['total_questions']} soru kaldı")
-                print(f"📊 Temizleme sonrası başarı oranı: %{user_data['correct_answers'] / user_data['total_questions'] * 100:.1f}")
-                
-                # Güncellenmiş verileri kaydet
-                self.save_user_stats()
+    
+    def _mark_dirty(self, user_id):
+        self.user_stats.mark_dirty(user_id)
+        if self.flusher is None:
+            self.save_user_stats()
+        else:
+            self.flusher.mark_dirty(user_id)
+    
+    def _flush_dirty_users(self, user_ids):
+        # Kayıtlar sırayla yazılsın; eski bir kopya yenisinin üzerine yazılmasın
+        with self._flush_lock:
+            # Model kilidi altında sadece kirli kullanıcıları kopyala, satırlar kilit dışında yazılsın
+            with self._lock:
+                items = self.user_stats.take_dirty(user_ids)
+            try:
+                self.store.save_many(items)
+            except Exception:
+                for user_id, _ in items:
+                    self.user_stats.mark_dirty(user_id)
+                raise
+            finally:
+                self.user_stats.written([user_id for user_id, _ in items])
+    
+    def shutdown(self):
+        """Bekleyen güncellemeleri diske yaz"""
+        if self.flusher is not None:
+            self.flusher.stop()
+        else:
+            self.save_user_stats()
+        self.store.close()
+    
+    def get_persistence_metrics(self):
+        if self.flusher is None:
+            return {"write_behind": False, "cache": self.user_stats.metrics()}
+        return {"write_behind": True, **self.flusher.metrics(), "cache": self.user_stats.metrics()}
+    
+    def decay_parameters(self):
+        """Sönümlü sayaçların ayarları"""
+        return decay_parameters(self.half_life)
     
     def predict(self, X):
         user_id = X.get('user_id', 1)
-        user_data = self.user_stats[user_id]
+        user_data = self._peek_user(user_id)
         
         difficulty = X.get('zorluk', 3)
         ders_id = X.get('ders_id', 1)
         konu_id = X.get('konu_id', 1)
         
-        user_accuracy = 0.5
-        if user_data['total_questions'] > 0:
-            user_accuracy = user_data['correct_answers'] / user_data['total_questions']
+        user_accuracy = user_data.overall_accuracy()
         
-        subject_accuracy = 0.5
-        subject_data = user_data['subject_performance'][ders_id]
-        if subject_data['total'] > 0:
-            subject_accuracy = subject_data['correct'] / subject_data['total']
+        subject_accuracy = user_data.accuracy(SUBJECT, ders_id)
         
-        topic_accuracy = 0.5
         topic_key = (ders_id, konu_id)
-        topic_data = user_data['topic_performance'][topic_key]
-        if topic_data['total'] > 0:
-            topic_accuracy = topic_data['correct'] / topic_data['total']
+        topic_accuracy = user_data.accuracy(TOPIC, topic_key)
         
-        print(f"DEBUG AI Predict - User: {user_id}, Total: {user_data['total_questions']}, Correct: {user_data['correct_answers']}")
+        print(f"DEBUG AI Predict - User: {user_id}, Total: {user_data.total_questions}, Correct: {user_data.correct_answers}")
         print(f"DEBUG AI Predict - User Accuracy: {user_accuracy:.2f}, Subject: {subject_accuracy:.2f}, Topic: {topic_accuracy:.2f}")
-        print(f"DEBUG AI Predict - Topic Key: {topic_key}, Topic Data: {topic_data}")
+        print(f"DEBUG AI Predict - Topic Key: {topic_key}, Topic Data: {user_data.get_counts(TOPIC, topic_key)}")
         
-        difficulty_accuracy = 0.5
-        difficulty_data = user_data['difficulty_performance'][difficulty]
-        if difficulty_data['total'] > 0:
-            difficulty_accuracy = difficulty_data['correct'] / difficulty_data['total']
+        difficulty_accuracy = user_data.accuracy(DIFFICULTY, difficulty)
         
         base_score = 0.5
         
@@ -158,84 +171,84 @@ class SimpleAIModel:
         return max(0.0, min(1.0, score))
     
     def update(self, X, y):
-        user_id = X.get('user_id', 1)
-        user_data = self.user_stats[user_id]
-        
-        print(f"DEBUG AI Update - User: {user_id}, Correct: {y}, Before - Total: {user_data['total_questions']}, Correct: {user_data['correct_answers']}")
-        
-        user_data['total_questions'] += 1
-        if y:
-            user_data['correct_answers'] += 1
-        
-        ders_id = X.get('ders_id', 1)
-        subject_data = user_data['subject_performance'][ders_id]
-        subject_data['total'] += 1
-        if y:
-            subject_data['correct'] += 1
-        
-        konu_id = X.get('konu_id', 1)
-        topic_key = (ders_id, konu_id)
-        topic_data = user_data['topic_performance'][topic_key]
-        topic_data['total'] += 1
-        if y:
-            topic_data['correct'] += 1
+        with self._lock:
+            self._update(X, y)
+    
+    def apply_answers(self, user_id, answers):
+        """Kullanıcının sıradaki cevaplarını tek seferde işle; kayıt parti başına bir kez"""
+        with self._lock:
+            self._apply(user_id, answers)
+    
+    def _update(self, X, y):
+        self._apply(X.get('user_id', 1), [(X, y)])
+    
+    def _apply(self, user_id, answers):
+        if not self.shared:
+            user_data = self._get_user(user_id)
+            for X, y in answers:
+                self._record(user_id, user_data, X, y)
+            self._mark_dirty(user_id)
+            return
         
-        difficulty = X.get('zorluk', 3)
-        difficulty_data = user_data['difficulty_performance'][difficulty]
-        difficulty_data['total'] += 1
-        if y:
-            difficulty_data['correct'] += 1
+        # Paylaşımlı depo: oku-değiştir-yaz tek yazma işleminde, diğer worker'ların güncellemeleri kaybolmaz
+        def apply(data):
+            user_data = self._restore_user_data(data) if data is not None else self._create_user_data()
+            for X, y in answers:
+                self._record(user_id, user_data, X, y)
+            return user_data
         
-        user_data['recent_performance'].append(y)
-        if len(user_data['recent_performance']) > 10:
-            user_data['recent_performance'].pop(0)
+        user_data, version = self.store.update(user_id, apply)
+        user_data.version = version
+        self.user_stats[user_id] = user_data
+    
+    def _record(self, user_id, user_data, X, y):
+        print(f"DEBUG AI Update - User: {user_id}, Correct: {y}, Before - Total: {user_data.total_questions}, Correct: {user_data.correct_answers}")
         
-        user_data['last_activity'] = datetime.now(timezone(timedelta(hours=3)))  # Türkiye saati
+        user_data.record(X.get('ders_id', 1), X.get('konu_id', 1), X.get('zorluk', 3), y)
         
-        print(f"DEBUG AI Update - After - Total: {user_data['total_questions']}, Correct: {user_data['correct_answers']}")
+        user_data.recent_performance.append(y)
+        if len(user_data.recent_performance) > 10:
+            user_data.recent_performance.pop(0)
         
-        # Veri temizleme kontrolü
-        self.cleanup_old_data(user_id)
+        user_data.last_activity = datetime.now(timezone(timedelta(hours=3)))  # Türkiye saati
         
-        self.save_user_stats()
+        print(f"DEBUG AI Update - After - Total: {user_data.total_questions}, Correct: {user_data.correct_answers}")
     
     def get_user_insights(self, user_id):
         """Kullanıcı içgörüleri"""
-        user_data = self.user_stats[user_id]
+        user_data = self._peek_user(user_id)
         
-        if user_data['total_questions'] == 0:
+        if user_data.total_questions == 0:
             return {
                 'message': 'Henüz soru çözülmemiş',
                 'recommendations': ['İlk testinizi çözmeye başlayın!']
             }
 
-        overall_accuracy = user_data['correct_answers'] / user_data['total_questions']
+        overall_accuracy = user_data.correct_answers / user_data.total_questions
         
         best_subject = None
         best_accuracy = 0
-        for ders_id, data in user_data['subject_performance'].items():
-            if data['total'] > 0:
-                accuracy = data['correct'] / data['total']
-                if accuracy > best_accuracy:
-                    best_accuracy = accuracy
-                    best_subject = ders_id
+        for ders_id, total, correct in user_data.items(SUBJECT):
+            accuracy = correct / total
+            if accuracy > best_accuracy:
+                best_accuracy = accuracy
+                best_subject = ders_id
         
         worst_subject = None
         worst_accuracy = 1
-        for ders_id, data in user_data['subject_performance'].items():
-            if data['total'] > 0:
-                accuracy = data['correct'] / data['total']
-                if accuracy < worst_accuracy:
-                    worst_accuracy = accuracy
-                    worst_subject = ders_id
+        for ders_id, total, correct in user_data.items(SUBJECT):
+            accuracy = correct / total
+            if accuracy < worst_accuracy:
+                worst_accuracy = accuracy
+                worst_subject = ders_id
         
         recent_accuracy = 0
-        if len(user_data['recent_performance']) > 0:
-            recent_accuracy = sum(user_data['recent_performance']) / len(user_data['recent_performance'])
+        if len(user_data.recent_performance) > 0:
+            recent_accuracy = sum(user_data.recent_performance) / len(user_data.recent_performance)
         
         insights = {
             'overall_accuracy': overall_accuracy,
-            'total_questions': user_data['total_questions'],
+            'total_questions': user_data.total_questions,
             'best_subject': best_subject,
             'best_accuracy': best_accuracy,
             'worst_subject': worst_subject,
@@ -0,0 +1,345 @@
+"""
+30 soruluk test partisinin üretimi ve kullanıcının sonraki partisinin önceden hazırlanması.
+
+build_batch /questions/batch'in seçim mantığıdır: cevaplanmamış adaylar,
+model skorları ve örnekleyici. BatchPrefetcher, kullanıcı testi bitirince
+(/questions/end-test) ya da kendisine verilen partinin son sorusunu
+cevaplayınca aynı ders ve etiket için sonraki partiyi arka plandaki bir iş
+parçacığında üretir. /batch önce bu önbelleğe bakar. Çoğu durumda sayım
+sorguları, skorlama ve örnekleme istek yolundan çıkar.
+
+Önbellekteki parti tek kullanımlıktır ve şu durumlarda kullanılmaz:
+- süresi (PREFETCH_TTL) dolmuşsa,
+- üretildikten sonra kullanıcı yeni bir cevap göndermişse (kullanıcı
+  başına nesil sayacı),
+- model sürümü ya da soru kataloğu değişmişse.
+Önbellek süreç içidir. Birden fazla worker'da başka sürece düşen istek
+normal yoldan üretilir.
+
+/questions/batch/stream aynı partiyi NDJSON ya da SSE olarak akıtır: önce
+hafif liste (soru_id, konu_id, zorluk), sonra her soru ayrı bir satırda.
+İstemci ilk soruyu 30 sorunun tamamı gelmeden gösterebilir.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from sqlalchemy import text
+
+from app.services.question_catalog import get_question_catalog
+from app.services.question_sampler import select_test
+from app.services.question_tags import format_tag_query, parse_tag_query
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 30
+PREFETCH_TTL = 600.0        # saniye
+PREFETCH_MAX_USERS = 10_000
+
+
+class NotEnoughQuestions(ValueError):
+    """Ders (ve etiket) için partiyi dolduracak kadar soru yok"""
+
+
+# Kullanıcı bağlamı tek sorguda. İlk satır: toplam ve yanlış cevap sayısı.
+# Diğer satırlar: dersin cevaplanmış her sorusu ve cevap sayısı.
+# Hepsi (user_id, question_id, is_correct) kapsayan indeksinden, tabloya gitmeden okunur.
+# Ders kısmı dersin soruları üzerinden aranır; maliyet kullanıcının tüm geçmişiyle büyümez.
+BATCH_CONTEXT_SQL = text("""
+SELECT NULL,
+       (SELECT COUNT(*) FROM submissions WHERE user_id = :user_id),
+       (SELECT COUNT(*) FROM submissions WHERE user_id = :user_id AND is_correct = 0)
+UNION ALL
+SELECT s.question_id, COUNT(*), NULL
+FROM submissions s
+WHERE s.user_id = :user_id AND s.question_id IN (SELECT soru_id FROM questions WHERE ders_id = :ders_id)
+GROUP BY s.question_id
+""")
+
+
+class BatchContext:
+    """Parti seçimi için kullanıcı bağlamı: dersteki cevaplanan sorular ve sayımlar"""
+
+    __slots__ = ("answered_ids", "total", "wrong", "subject_count")
+
+    def __init__(self, answered_ids, total, wrong, subject_count):
+        self.answered_ids = answered_ids    # dersin cevaplanmış soru_id'leri (np.int64)
+        self.total = total                  # tüm cevaplar
+        self.wrong = wrong                  # yanlış cevaplar
+        self.subject_count = subject_count  # bu dersteki cevaplar
+
+
+def load_batch_context(db, user_id, ders_id):
+    """Kullanıcının /batch bağlamı tek toplu sorguyla (BATCH_CONTEXT_SQL)"""
+    rows = db.execute(BATCH_CONTEXT_SQL, {"user_id": user_id, "ders_id": ders_id}).fetchall()
+    _, total, wrong = rows[0]
+    answered_ids = np.fromiter((row[0] for row in rows[1:]), dtype=np.int64, count=len(rows) - 1)
+    subject_count = sum(row[1] for row in rows[1:])
+    return BatchContext(answered_ids, total, wrong, subject_count)
+
+
+def build_batch(db, models, catalog, user_id, ders_id, etiket=None, rng=None):
+    """Kullanıcı için BATCH_SIZE soruluk parti (API yanıt sözlükleri); veritabanına tek sorgu"""
+    context = load_batch_context(db, user_id, ders_id)
+
+    # etiket sorgusu ters indeksle çözülür: virgül VE, "|" VEYA (app/services/question_tags.py)
+    positions = catalog.positions(ders_id, etiket)
+    unanswered_positions = positions[~np.isin(catalog.soru_ids[positions], context.answered_ids)]
+    # Cevaplanmamış soru azsa dersin (etiketin) tüm soruları aday olur
+    if len(unanswered_positions) >= BATCH_SIZE:
+        positions = unanswered_positions
+    qs = catalog.take(positions)
+
+    if len(qs) < BATCH_SIZE:
+        raise NotEnoughQuestions(f"Ders ID {ders_id} için yeterli soru bulunamadı. Toplam {len(qs)} soru mevcut.")
+
+    # AI model her zaman çalışır, sadece 30 soru sonrası kullanıcıya gösterilir
+    # Adayların skorları kullanıcının önceden hesaplanmış tahmin tablosundan okunur
+    try:
+        models.wait_for_updates(user_id)
+        scores = models.predictions.combined_many(user_id, qs)
+    except Exception:
+        logger.exception("AI model batch prediction error (user %s)", user_id)
+        scores = np.full(len(qs), 0.5)
+
+    # Yeni kullanıcı (ilk 30 soru): zorluk katmanlarından eşit ve rastgele
+    # Deneyimli kullanıcı: %70 zayıf noktalar (en düşük skor) + %30 rastgele çeşitlilik
+    experienced = context.subject_count >= BATCH_SIZE
+    selected = select_test(catalog.zorluk[positions], scores, experienced, BATCH_SIZE, rng)
+    selected_questions = [qs[i] for i in selected]
+
+    logger.debug(
+        "Batch for user %s, ders %s, etiket %r: %d candidates (%d unanswered), %d answers in subject, %s selection",
+        user_id, ders_id, etiket, len(qs), len(unanswered_positions), context.subject_count,
+        "experienced" if experienced else "new"
+    )
+    return [q.payload for q in selected_questions]
+
+
+def next_batch(db, models, user_id, ders_id, etiket=None):
+    """/batch ve /batch/stream için parti: hazır parti geçerliyse o, yoksa istek içinde üretilir"""
+    catalog = get_question_catalog()
+    prefetcher = get_batch_prefetcher()
+    batch = prefetcher.take(user_id, ders_id, etiket, models.version, catalog.stamp)
+    if batch is None:
+        batch = build_batch(db, models, catalog, user_id, ders_id, etiket)
+    prefetcher.served(user_id, ders_id, etiket, batch)
+    return batch
+
+
+def batch_events(batch):
+    """Akış olayları: (tür, veri); önce hafif liste, sonra sırayla sorular, en son bitiş"""
+    yield "parti", {
+        "soru_sayisi": len(batch),
+        "sorular": [{"soru_id": q["soru_id"], "konu_id": q["konu_id"], "zorluk": q["zorluk"]} for q in batch],
+    }
+    for sira, question in enumerate(batch):
+        yield "soru", {"sira": sira, "soru": question}
+    yield "son", {"soru_sayisi": len(batch)}
+
+
+def ndjson_lines(events):
+    """Her olay bir JSON satırı; tür "tur" alanında"""
+    for event, data in events:
+        yield json.dumps({"tur": event, **data}, ensure_ascii=False) + "\n"
+
+
+def sse_messages(events):
+    """Her olay bir SSE mesajı (event: tür, data: JSON)"""
+    for event, data in events:
+        yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def batch_key(ders_id, etiket):
+    """(ders_id, normal etiket sorgusu): " TYT ,ayt" ile "ayt,tyt" aynı partidir"""
+    return ders_id, format_tag_query(parse_tag_query(etiket))
+
+
+class _Entry:
+    __slots__ = ("key", "batch", "generation", "version", "stamp", "created_at")
+
+    def __init__(self, key, batch, generation, version, stamp):
+        self.key = key
+        self.batch = batch
+        self.generation = generation
+        self.version = version
+        self.stamp = stamp
+        self.created_at = time.monotonic()
+
+
+class BatchPrefetcher:
+    """Kullanıcı başına önceden üretilmiş tek parti; üretim tek bir arka plan iş parçacığında
+
+    build_fn(user_id, ders_id, etiket) -> (parti, model sürümü, katalog damgası)
+    """
+
+    def __init__(self, build_fn=None, ttl=PREFETCH_TTL, max_users=PREFETCH_MAX_USERS):
+        self.build_fn = build_fn or _build_with_active_models
+        self.ttl = ttl
+        self.max_users = max_users
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # user_id -> _Entry
+        self._generation = {}          # user_id -> cevap sayacı (her cevapta artar)
+        self._outstanding = {}         # user_id -> (key, verilen partinin cevaplanmamış soru_id'leri)
+        self._pending = {}             # user_id -> üretimi sırada bekleyen key
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="batch-prefetch")
+        self._stopped = False
+
+        self.scheduled = 0
+        self.built = 0
+        self.discarded = 0
+        self.failed = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.last_error = None
+        self.last_build_seconds = 0.0
+
+    def schedule(self, user_id, ders_id, etiket=None):
+        """Sonraki partiyi arka planda üret; aynı kullanıcı ve key için zaten sırada ya da hazırsa bir şey yapma"""
+        key = batch_key(ders_id, etiket)
+        with self._lock:
+            if self._stopped or self._pending.get(user_id) == key:
+                return False
+            entry = self._entries.get(user_id)
+            if entry is not None and entry.key == key and entry.generation == self._generation.get(user_id, 0):
+                return False
+            self._pending[user_id] = key
+            generation = self._generation.get(user_id, 0)
+            self.scheduled += 1
+        self._executor.submit(self._build, user_id, key, generation)
+        return True
+
+    def _build(self, user_id, key, generation):
+        started = time.perf_counter()
+        try:
+            batch, version, stamp = self.build_fn(user_id, key[0], key[1] or None)
+        except NotEnoughQuestions:
+            batch = None
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+                self.last_error = repr(e)
+            logger.warning("Sonraki parti hazırlanamadı (kullanıcı %s): %s", user_id, e)
+            batch = None
+        with self._lock:
+            if self._pending.get(user_id) == key:
+                del self._pending[user_id]
+            if batch is None:
+                return
+            self.last_build_seconds = time.perf_counter() - started
+            # Üretim sürerken yeni cevap geldiyse parti eski bilgiyle seçilmiştir
+            if self._generation.get(user_id, 0) != generation:
+                self.discarded += 1
+                return
+            self._entries[user_id] = _Entry(key, batch, generation, version, stamp)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+            self.built += 1
+
+    def take(self, user_id, ders_id, etiket, version, stamp):
+        """Geçerli hazır parti varsa onu döndür (tek kullanımlık); yoksa None"""
+        key = batch_key(ders_id, etiket)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry.key != key:
+                self.misses += 1
+                return None
+            del self._entries[user_id]
+            if (entry.generation != self._generation.get(user_id, 0) or entry.version != version
+                    or entry.stamp != stamp or time.monotonic() - entry.created_at > self.ttl):
+                self.stale += 1
+                return None
+            self.hits += 1
+            return entry.batch
+
+    def served(self, user_id, ders_id, etiket, batch):
+        """Kullanıcıya verilen parti: son sorusu cevaplanınca sonraki parti hazırlanır"""
+        with self._lock:
+            self._outstanding[user_id] = (batch_key(ders_id, etiket), {q["soru_id"] for q in batch})
+            if len(self._outstanding) > self.max_users:
+                self._outstanding.pop(next(iter(self._outstanding)))
+
+    def record_submission(self, user_id, soru_id):
+        """Yeni cevap: hazır parti geçersiz; verilen partinin son sorusuysa sonrakini hazırla"""
+        with self._lock:
+            self._generation[user_id] = self._generation.get(user_id, 0) + 1
+            self._entries.pop(user_id, None)
+            outstanding = self._outstanding.get(user_id)
+            if outstanding is None:
+                return
+            key, remaining = outstanding
+            remaining.discard(soru_id)
+            if remaining:
+                return
+            del self._outstanding[user_id]
+        self.schedule(user_id, *key)
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.stale
+            return {
+                "entries": len(self._entries),
+                "pending": len(self._pending),
+                "scheduled": self.scheduled,
+                "built": self.built,
+                "discarded": self.discarded,
+                "failed": self.failed,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "last_build_seconds": self.last_build_seconds,
+                "last_error": self.last_error,
+            }
+
+    def wait_idle(self, timeout=None):
+        """Sıradaki üretimlerin bitmesini bekle (testler ve ölçümler için)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return True
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.005)
+
+    def shutdown(self):
+        with self._lock:
+            self._stopped = True
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _build_with_active_models(user_id, ders_id, etiket):
+    """Arka plan üretimi: kendi oturumu ve etkin model kümesiyle"""
+    from app.core.database import SessionLocal
+    from app.services.model_registry import get_model_manager
+
+    manager = get_model_manager()
+    registry = manager.acquire()
+    db = SessionLocal()
+    try:
+        catalog = get_question_catalog()
+        return build_batch(db, registry, catalog, user_id, ders_id, etiket), registry.version, catalog.stamp
+    finally:
+        db.close()
+        manager.release(registry)
+
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_batch_prefetcher():
+    global _prefetcher
+    if _prefetcher is None:
+        with _prefetcher_lock:
+            if _prefetcher is None:
+                _prefetcher = BatchPrefetcher()
+    return _prefetcher
@@ -0,0 +1,182 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class ModelUpdateQueue:
+    """Model güncellemelerini istek yolundan alan, boyutu sınırlı süreç içi kuyruk.
+
+    Güncellemeler kullanıcıya göre gruplanır: aynı kullanıcının art arda gelen
+    güncellemeleri tek partide, geliş sırasıyla apply_fn(user_id, items) ile
+    uygulanır. Bir kullanıcının partisi aynı anda tek bir yerde uygulanır, bu
+    yüzden kullanıcı başına sıra korunur.
+
+    Geri basınç: kuyruk doluysa çağıran en fazla block_timeout saniye yer
+    açılmasını bekler; hâlâ doluysa güncellemeyi kendisi uygular (caller-runs).
+    Hiçbir güncelleme düşürülmez.
+
+    apply_fn hata verirse parti kullanıcının bekleyenlerinin başına geri konur
+    ve sıra diğer kullanıcılara geçtikten sonra tekrar denenir; max_attempts
+    denemeden sonra hâlâ başarısızsa loglanır ve failed sayacına eklenir.
+    """
+
+    def __init__(self, apply_fn, max_pending=10_000, block_timeout=1.0, name="model-update-worker", max_attempts=3):
+        self.apply_fn = apply_fn
+        self.max_pending = max_pending
+        self.block_timeout = block_timeout
+        self.name = name
+        self.max_attempts = max_attempts
+
+        self._cond = threading.Condition()
+        self._pending = OrderedDict()  # user_id -> [(item, enqueued_at, deneme_sayısı), ...]
+        self._active = set()  # Partisi şu an uygulanan kullanıcılar
+        self._size = 0
+        self._stopped = False
+        self._thread = None
+
+        self.enqueued = 0
+        self.applied = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+        self.blocked = 0
+        self.caller_runs = 0
+        self.max_depth = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.last_error = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def put(self, user_id, item):
+        """Güncellemeyi kuyruğa ekle; kuyruk doluysa bekle, sonra gerekirse kendin uygula"""
+        with self._cond:
+            if self._size >= self.max_pending and not self._stopped:
+                self.blocked += 1
+                self._cond.wait_for(lambda: self._size < self.max_pending or self._stopped, self.block_timeout)
+            caller_runs = self._size >= self.max_pending or self._stopped
+            # Sıra korunsun diye caller-runs durumunda da önce kullanıcının listesine eklenir
+            self._pending.setdefault(user_id, []).append((item, time.monotonic(), 0))
+            self._size += 1
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, self._size)
+            self._cond.notify_all()
+            if not caller_runs:
+                return
+            self.caller_runs += 1
+        # Kuyruk hâlâ dolu (veya durduruldu): kullanıcının bekleyenlerini burada uygula
+        self._apply_user(user_id)
+
+    def wait_for_user(self, user_id, timeout=None):
+        """Kullanıcının bekleyen güncellemeleri uygulanana kadar bekle (read-your-writes)"""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: user_id not in self._pending and user_id not in self._active, timeout
+            )
+
+    def wait_idle(self, timeout=None):
+        """Kuyruktaki tüm güncellemeler uygulanana kadar bekle"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._active, timeout)
+
+    def _next_user(self):
+        for user_id in self._pending:
+            if user_id not in self._active:
+                return user_id
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopped or self._next_user() is not None)
+                user_id = self._next_user()
+                if user_id is None:
+                    return  # Durduruldu ve kuyruk boş
+            self._apply_user(user_id)
+
+    def _apply_user(self, user_id):
+        with self._cond:
+            # Aynı kullanıcının partisi başka yerde uygulanıyorsa sırayı korumak için bekle
+            self._cond.wait_for(lambda: user_id not in self._active)
+            entries = self._pending.pop(user_id, [])
+            self._size -= len(entries)
+            if not entries:
+                return
+            self._active.add(user_id)
+            self._cond.notify_all()
+
+        error = None
+        try:
+            self.apply_fn(user_id, [item for item, _, _ in entries])
+        except Exception as e:
+            error = e
+            logger.exception("%s güncelleme hatası (kullanıcı %s)", self.name, user_id)
+        finally:
+            lag = time.monotonic() - entries[0][1]
+            with self._cond:
+                self._active.discard(user_id)
+                self.batches += 1
+                if error is None:
+                    self.applied += len(entries)
+                    self.last_error = None
+                    self.last_lag = lag
+                    self.max_lag = max(self.max_lag, lag)
+                else:
+                    self.last_error = str(error)
+                    retry = [(item, enqueued_at, attempts + 1) for item, enqueued_at, attempts in entries
+                             if attempts + 1 < self.max_attempts]
+                    if retry:
+                        # Sıra korunur: başarısız parti, sonradan gelenlerin önüne geri konur
+                        self._pending[user_id] = retry + self._pending.pop(user_id, [])
+                        self._size += len(retry)
+                        self.retries += len(retry)
+                    dropped = len(entries) - len(retry)
+                    if dropped:
+                        self.failed += dropped
+                        logger.error("%s: kullanıcı %s için %d güncelleme %d denemeden sonra uygulanamadı",
+                                     self.name, user_id, dropped, self.max_attempts)
+                self._cond.notify_all()
+
+    def stop(self, timeout=30.0):
+        """Yeni işleri kapat, kuyruktakileri uygula ve iş parçacığını durdur"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        # İş parçacığı hiç başlamadıysa (veya zamanında bitmediyse) kalanları burada uygula
+        while True:
+            with self._cond:
+                user_id = next(iter(self._pending), None)
+            if user_id is None:
+                break
+            self._apply_user(user_id)
+
+    def metrics(self):
+        with self._cond:
+            oldest = min((entries[0][1] for entries in self._pending.values()), default=None)
+            return {
+                "max_pending": self.max_pending,
+                "queue_depth": self._size,
+                "pending_users": len(self._pending),
+                "max_depth": self.max_depth,
+                "lag_ms": round((time.monotonic() - oldest) * 1000, 3) if oldest is not None else 0,
+                "last_apply_lag_ms": round(self.last_lag * 1000, 3),
+                "max_apply_lag_ms": round(self.max_lag * 1000, 3),
+                "enqueued": self.enqueued,
+                "applied": self.applied,
+                "failed": self.failed,
+                "retries": self.retries,
+                "batches": self.batches,
+                "avg_batch_size": round(self.applied / self.batches, 2) if self.batches else 0,
+                "blocked": self.blocked,
+                "caller_runs": self.caller_runs,
+                "last_error": self.last_error,
+            }
@@ -0,0 +1,373 @@
+from array import array
+
+import numpy as np
+
+from app.services.learning_curve import LearningCurve
+
+TOTAL = 0
+CORRECT = 1
+
+SUBJECT = "subject"
+TOPIC = "topic"
+DIFFICULTY = "difficulty"
+
+# Müfredat ızgarası: 6 ders, her derste 3 konu, 5 zorluk seviyesi
+SUBJECT_IDS = (1, 2, 3, 4, 5, 6)
+TOPICS_PER_SUBJECT = 3
+DIFFICULTY_LEVELS = (1, 2, 3, 4, 5)
+
+# Sayaçların yarı ömrü (cevap sayısı): 500 cevap önceki bir cevap yarı ağırlıkla sayılır
+DEFAULT_HALF_LIFE = 500
+# scale bu değeri aşınca sayaçlar normalize edilir (float64 taşmasından çok uzak)
+MAX_SCALE = 2.0 ** 32
+STATE_VERSION = 2
+
+
+class CurriculumIndex:
+    """Ders/konu/zorluk anahtarlarını sayaç dizisindeki satırlara eşleyen paylaşılan harita.
+
+    Izgara sabit ve deterministik olduğu için diske yazılan sayaç dizileri
+    süreçler arasında aynı anlamı taşır. Izgara dışındaki anahtarlar
+    kullanıcının küçük taşma sözlüğünde tutulur.
+    """
+
+    def __init__(self, subject_ids=SUBJECT_IDS, topics_per_subject=TOPICS_PER_SUBJECT, difficulty_levels=DIFFICULTY_LEVELS):
+        self.subject_keys = list(subject_ids)
+        self.topic_keys = [(ders_id, konu_id) for ders_id in subject_ids for konu_id in range(1, topics_per_subject + 1)]
+        self.difficulty_keys = list(difficulty_levels)
+
+        self.rows = {SUBJECT: {}, TOPIC: {}, DIFFICULTY: {}}
+        self.keys = {SUBJECT: self.subject_keys, TOPIC: self.topic_keys, DIFFICULTY: self.difficulty_keys}
+        self.slices = {}
+
+        offset = 0
+        for kind in (SUBJECT, TOPIC, DIFFICULTY):
+            start = offset
+            for key in self.keys[kind]:
+                self.rows[kind][key] = offset
+                offset += 1
+            self.slices[kind] = slice(start, offset)
+        self.size = offset
+
+        # Vektörel arama tabloları: son eleman her zaman -1 (ızgara dışı)
+        self._subject_lut = self._build_lut(self.subject_keys, self.rows[SUBJECT])
+        self._difficulty_lut = self._build_lut(self.difficulty_keys, self.rows[DIFFICULTY])
+        self._topic_lut = np.full((max(subject_ids) + 2, topics_per_subject + 2), -1, dtype=np.int64)
+        for (ders_id, konu_id), topic_row in self.rows[TOPIC].items():
+            self._topic_lut[ders_id, konu_id] = topic_row
+
+        # Tahmin hücreleri: her (ders, konu, zorluk) üçlüsü; sıra konu satırı x zorluk satırı
+        self.cell_keys = [(ders_id, konu_id, zorluk) for ders_id, konu_id in self.topic_keys for zorluk in self.difficulty_keys]
+        self.cell_count = len(self.cell_keys)
+        self.cells = {key: cell for cell, key in enumerate(self.cell_keys)}
+        self.cell_ders_ids, self.cell_konu_ids, self.cell_zorluk = (
+            np.array(column, dtype=np.int64) for column in zip(*self.cell_keys)
+        )
+
+    @staticmethod
+    def _build_lut(keys, rows):
+        lut = np.full(max(keys) + 2, -1, dtype=np.int64)
+        for key in keys:
+            lut[key] = rows[key]
+        return lut
+
+    def row(self, kind, key):
+        return self.rows[kind].get(key)
+
+    def rows_for(self, kind, ders_ids=None, konu_ids=None, zorluk=None):
+        """NumPy tamsayı dizileri için satır indeksleri; ızgara dışı (veya eksik = -1) değerler -1 döner"""
+        if kind == DIFFICULTY:
+            return self._lookup(self._difficulty_lut, zorluk)
+        if kind == SUBJECT:
+            return self._lookup(self._subject_lut, ders_ids)
+        lut = self._topic_lut
+        valid = (ders_ids >= 0) & (ders_ids < lut.shape[0]) & (konu_ids >= 0) & (konu_ids < lut.shape[1])
+        return np.where(valid, lut[np.where(valid, ders_ids, 0), np.where(valid, konu_ids, 0)], -1)
+
+    def cell(self, ders_id, konu_id, zorluk):
+        return self.cells.get((ders_id, konu_id, zorluk))
+
+    def cells_for(self, ders_ids, konu_ids, zorluk):
+        """NumPy dizileri için hücre indeksleri; ızgara dışı üçlüler -1 döner"""
+        topic = self.rows_for(TOPIC, ders_ids=ders_ids, konu_ids=konu_ids) - self.slices[TOPIC].start
+        difficulty = self.rows_for(DIFFICULTY, zorluk=zorluk) - self.slices[DIFFICULTY].start
+        valid = (topic >= 0) & (difficulty >= 0)
+        return np.where(valid, topic * len(self.difficulty_keys) + difficulty, -1)
+
+    @staticmethod
+    def _lookup(lut, values):
+        return lut[np.where((values >= 0) & (values < len(lut)), values, len(lut) - 1)]
+
+
+CURRICULUM = CurriculumIndex()
+
+
+def decay_parameters(half_life):
+    """Yarı ömürden türetilen sönüm ayarları (API yanıtları için)"""
+    decay = 2.0 ** (-1.0 / half_life)
+    return {
+        "half_life_answers": half_life,
+        "decay_per_answer": decay,
+        # Sonsuz geçmişte toplam ağırlık: 1 / (1 - decay)
+        "effective_window_answers": 1.0 / (1.0 - decay),
+    }
+
+
+class UserStats:
+    """Bir kullanıcının sayaçlarını sabit boyutlu float64 dizisinde tutan kompakt kayıt.
+
+    counts düz bir array('d') tamponudur: satır i için [2*i] total, [2*i+1] correct.
+    Sayaçlar üstel olarak sönümlenir: k cevap önceki bir cevabın ağırlığı
+    2^(-k/half_life). Her cevapta tüm sayaçları küçültmek yerine yeni cevabın
+    ağırlığı (scale) büyütülür; gerçek değer saklanan / scale olur ve oranlar
+    scale'den bağımsızdır. scale çok büyüyünce tek seferde normalize edilir.
+    total_questions / correct_answers ise sönümlenmeyen ömür boyu sayılardır.
+    """
+
+    __slots__ = (
+        'total_questions',
+        'correct_answers',
+        'weighted_total',
+        'weighted_correct',
+        'scale',
+        'half_life',
+        'counts',
+        'extra',
+        'recent_performance',
+        'learning_curve',
+        'last_activity',
+        'version',
+    )
+
+    def __init__(self, learning_curve=None, half_life=DEFAULT_HALF_LIFE):
+        self.total_questions = 0
+        self.correct_answers = 0
+        self.weighted_total = 0.0  # Sönümlü genel sayaçlar (scale ölçeğinde)
+        self.weighted_correct = 0.0
+        self.scale = 1.0  # Bir sonraki cevabın ağırlığı bununla büyütülerek eklenir
+        self.half_life = half_life  # Cevap sayısı cinsinden yarı ömür
+        self.counts = array('d', bytes(CURRICULUM.size * 2 * 8))
+        self.extra = None  # Izgara dışı anahtarlar: {(kind, key): [total, correct]}
+        self.recent_performance = []
+        self.learning_curve = learning_curve
+        self.last_activity = None
+        self.version = 0  # Depodaki satır sürümü; kaydedilmez, yüklerken depodan atanır
+
+    def __getstate__(self):
+        return (
+            STATE_VERSION,
+            self.total_questions,
+            self.correct_answers,
+            self.weighted_total,
+            self.weighted_correct,
+            self.scale,
+            self.half_life,
+            self.counts.tobytes(),
+            self.extra,
+            self.recent_performance,
+            self.learning_curve,
+            self.last_activity,
+        )
+
+    def __setstate__(self, state):
+        self.version = 0
+        if len(state) == 8:
+            self._set_unweighted_state(state)
+            return
+        (
+            _,
+            self.total_questions,
+            self.correct_answers,
+            self.weighted_total,
+            self.weighted_correct,
+            self.scale,
+            self.half_life,
+            counts,
+            self.extra,
+            self.recent_performance,
+            self.learning_curve,
+            self.last_activity,
+        ) = state
+        self.counts = array('d')
+        self.counts.frombytes(counts)
+
+    def _set_unweighted_state(self, state):
+        """Sönümsüz int32 sayaçlı eski kaydı yükle; mevcut sayılar olduğu gibi başlangıç ağırlığı olur"""
+        (
+            self.total_questions,
+            self.correct_answers,
+            counts,
+            self.extra,
+            self.recent_performance,
+            self.learning_curve,
+            self.last_activity,
+            _,  # last_cleanup_at
+        ) = state
+        old_counts = array('i')
+        old_counts.frombytes(counts)
+        self.counts = array('d', old_counts)
+        if self.extra:
+            self.extra = {key: [float(total), float(correct)] for key, (total, correct) in self.extra.items()}
+        self.weighted_total = float(self.total_questions)
+        self.weighted_correct = float(self.correct_answers)
+        self.scale = 1.0
+        self.half_life = DEFAULT_HALF_LIFE
+
+    def copy(self):
+        """Canlı veriden bağımsız kopya"""
+        clone = UserStats.__new__(UserStats)
+        clone.__setstate__(self.__getstate__())
+        clone.extra = {k: list(v) for k, v in self.extra.items()} if self.extra else None
+        clone.recent_performance = list(self.recent_performance)
+        if self.learning_curve is not None:
+            clone.learning_curve = self.learning_curve.copy()
+        clone.version = self.version
+        return clone
+
+    def get_counts(self, kind, key):
+        """Sönümlü (total, correct) döndür; okuma hiçbir zaman yeni kayıt eklemez"""
+        row = CURRICULUM.row(kind, key)
+        scale = self.scale
+        if row is not None:
+            counts = self.counts
+            return counts[2 * row] / scale, counts[2 * row + 1] / scale
+        if self.extra:
+            total, correct = self.extra.get((kind, key), (0.0, 0.0))
+            return total / scale, correct / scale
+        return 0.0, 0.0
+
+    def counts_view(self):
+        """counts tamponunun (satır, 2) şekilli kopyasız NumPy görünümü (scale ölçeğinde)"""
+        return np.frombuffer(self.counts, dtype=np.float64).reshape(CURRICULUM.size, 2)
+
+    def decayed_counts(self):
+        """Izgaradaki sönümlü (total, correct) değerleri"""
+        return self.counts_view() / self.scale
+
+    def accuracy_table(self, default=0.5):
+        """Izgaradaki her satırın doğruluk oranı; verisi olmayan satırlar default"""
+        view = self.counts_view()
+        totals = view[:, TOTAL]
+        return np.divide(view[:, CORRECT], totals, out=np.full(len(totals), default), where=totals > 0)
+
+    def accuracy(self, kind, key, default=0.5):
+        # Oran scale'den bağımsız; saklanan değerler doğrudan kullanılır
+        row = CURRICULUM.row(kind, key)
+        if row is not None:
+            counts = self.counts
+            total = counts[2 * row]
+            if total > 0:
+                return counts[2 * row + 1] / total
+            return default
+        if self.extra:
+            total, correct = self.extra.get((kind, key), (0.0, 0.0))
+            if total > 0:
+                return correct / total
+        return default
+
+    def overall_accuracy(self, default=0.5):
+        """Sönümlü genel doğruluk oranı; yakın zamandaki cevaplar daha ağır basar"""
+        if self.weighted_total > 0:
+            return self.weighted_correct / self.weighted_total
+        return default
+
+    def effective_questions(self):
+        """Sönümlü toplam ağırlık: modelin şu an 'hatırladığı' cevap sayısı"""
+        return self.weighted_total / self.scale
+
+    def add(self, kind, key, correct):
+        weight = self.scale
+        row = CURRICULUM.row(kind, key)
+        if row is not None:
+            self.counts[2 * row] += weight
+            if correct:
+                self.counts[2 * row + 1] += weight
+            return
+        if self.extra is None:
+            self.extra = {}
+        entry = self.extra.setdefault((kind, key), [0.0, 0.0])
+        entry[TOTAL] += weight
+        if correct:
+            entry[CORRECT] += weight
+
+    def record(self, ders_id, konu_id, zorluk, correct):
+        """Bir cevabı genel, ders, konu ve zorluk sayaçlarına O(1) işle"""
+        scale = self.scale * 2.0 ** (1.0 / self.half_life)
+        if scale > MAX_SCALE:
+            self.normalize()
+            scale = 2.0 ** (1.0 / self.half_life)
+        self.scale = scale
+        self.total_questions += 1
+        self.weighted_total += scale
+        if correct:
+            self.correct_answers += 1
+            self.weighted_correct += scale
+        self.add(SUBJECT, ders_id, correct)
+        self.add(TOPIC, (ders_id, konu_id), correct)
+        self.add(DIFFICULTY, zorluk, correct)
+
+    def normalize(self):
+        """Saklanan değerleri scale'e bölüp scale'i 1'e çek (seyrek, taşmayı önlemek için)"""
+        scale = self.scale
+        if scale == 1.0:
+            return
+        view = self.counts_view()
+        view /= scale
+        if self.extra:
+            for entry in self.extra.values():
+                entry[TOTAL] /= scale
+                entry[CORRECT] /= scale
+        self.weighted_total /= scale
+        self.weighted_correct /= scale
+        self.scale = 1.0
+
+    def set_half_life(self, half_life):
+        """Yarı ömrü değiştir; o ana kadarki sönümlü değerler korunur"""
+        if half_life != self.half_life:
+            self.normalize()
+            self.half_life = half_life
+
+    def items(self, kind):
+        """Sönümlü total > 0 olan (anahtar, total, correct) üçlülerini döndür"""
+        scale = self.scale
+        block = self.counts_view()[CURRICULUM.slices[kind]] / scale
+        result = [
+            (key, total, correct)
+            for key, (total, correct) in zip(CURRICULUM.keys[kind], block.tolist())
+            if total > 0
+        ]
+        if self.extra:
+            for (entry_kind, key), (total, correct) in self.extra.items():
+                if entry_kind == kind and total > 0:
+                    result.append((key, total / scale, correct / scale))
+        return result
+
+    @classmethod
+    def from_legacy(cls, data, learning_curve=None):
+        """Eski iç içe dict düzenindeki kullanıcı verisini kompakt kayda çevir"""
+        user = cls(learning_curve=learning_curve)
+        user.total_questions = data.get('total_questions', 0)
+        user.correct_answers = data.get('correct_answers', 0)
+        user.weighted_total = float(user.total_questions)
+        user.weighted_correct = float(user.correct_answers)
+        for kind, field in ((SUBJECT, 'subject_performance'), (TOPIC, 'topic_performance'), (DIFFICULTY, 'difficulty_performance')):
+            for key, perf in data.get(field, {}).items():
+                if perf.get('total', 0) == 0:
+                    continue
+                row = CURRICULUM.row(kind, key)
+                if row is not None:
+                    user.counts[2 * row] = perf['total']
+                    user.counts[2 * row + 1] = perf.get('correct', 0)
+                else:
+                    if user.extra is None:
+                        user.extra = {}
+                    user.extra[(kind, key)] = [float(perf['total']), float(perf.get('correct', 0))]
+        user.recent_performance = list(data.get('recent_performance', []))
+        if learning_curve is not None:
+            user.learning_curve = LearningCurve.from_points(data.get('learning_curve', []))
+        user.last_activity = data.get('last_activity')
+        return user
+
+
+# Hiç cevabı olmayan kullanıcılar için okunur boş kayıt (değiştirilmemeli)
+EMPTY_USER_STATS = UserStats(learning_curve=LearningCurve())
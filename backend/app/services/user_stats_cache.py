@@ -0,0 +1,170 @@
+import threading
+from collections import OrderedDict
+
+# Depoda kaydı olmayan kullanıcılar da önbelleğe alınır; her tahminde tekrar sorgulanmasın
+_ABSENT = object()
+
+
+class _Load:
+    __slots__ = ("done", "stale")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.stale = False
+
+
+class UserStatsCache:
+    """Kullanıcı istatistiklerini ilk erişimde depodan yükleyen, boyutu sınırlı LRU önbellek.
+
+    UserStats kayıtları sabit boyutlu olduğu için kapasite (kullanıcı sayısı)
+    doğrudan bir bellek sınırıdır. Kirli (veya yazılmakta olan) bir kayıt
+    LRU'dan çıkarılınca kaybolmaz: written() ile yazıldığı bildirilene kadar
+    bekleme alanında tutulur ve okumalar onu görmeye devam eder. Böylece tüm
+    yazmalar sahibinin tek kayıt yolundan, sırayla geçer ve depodan eski veri okunmaz.
+
+    Depodan yükleme kilit dışında yapılır: yavaş bir okuma diğer
+    kullanıcıların isabetlerini bekletmez. Aynı kullanıcı için tek yükleme
+    çalışır, diğerleri onun sonucunu bekler. Yükleme sürerken kullanıcı
+    önbelleğe yazıldıysa yüklenen veri atılır; eklendikten sonra çıkarıldıysa
+    (artık eski olabilir) yükleme tekrarlanır.
+    """
+
+    def __init__(self, load, capacity=10_000):
+        self._load = load  # user_id -> veri veya None
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self._evicted = {}  # LRU'dan çıkmış ama henüz yazılmamış kirli kayıtlar
+        self._dirty = set()
+        self._in_flight = set()  # take_dirty ile alınmış, yazılması beklenen kayıtlar
+        self._loading = {}  # user_id -> _Load; depodan yüklenmekte olan kullanıcılar
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id, default=None):
+        while True:
+            with self._lock:
+                data = self._entries.get(user_id)
+                if data is not None:
+                    self.hits += 1
+                    self._entries.move_to_end(user_id)
+                    break
+                if user_id in self._evicted:
+                    self.hits += 1
+                    data = self._evicted.pop(user_id)
+                    self._insert(user_id, data)
+                    break
+                load = self._loading.get(user_id)
+                owner = load is None
+                if owner:
+                    load = self._loading[user_id] = _Load()
+            if not owner:
+                # Aynı kullanıcıyı başka bir istek yüklüyor: sonucu önbellekten okunur
+                load.done.wait()
+                continue
+
+            try:
+                data = self._load(user_id)
+            finally:
+                with self._lock:
+                    del self._loading[user_id]
+                    load.done.set()
+            with self._lock:
+                if user_id in self._entries or user_id in self._evicted or load.stale:
+                    continue  # Yükleme sırasında yazıldı ya da çıkarıldı: önbellekteki (veya yeniden yüklenen) geçerli
+                self.misses += 1
+                data = _ABSENT if data is None else data
+                self._insert(user_id, data)
+                break
+        return default if data is None or data is _ABSENT else data
+
+    def __getitem__(self, user_id):
+        data = self.get(user_id)
+        if data is None:
+            raise KeyError(user_id)
+        return data
+
+    def __setitem__(self, user_id, data):
+        with self._lock:
+            self._evicted.pop(user_id, None)
+            self._insert(user_id, data)
+
+    def __contains__(self, user_id):
+        return self.get(user_id) is not None
+
+    def __len__(self):
+        """Bellekte tutulan kullanıcı sayısı"""
+        with self._lock:
+            return self._resident_count()
+
+    def resident_items(self):
+        with self._lock:
+            items = [(user_id, data) for user_id, data in self._entries.items() if data is not _ABSENT]
+            return items + list(self._evicted.items())
+
+    def mark_dirty(self, user_id):
+        with self._lock:
+            if user_id in self._entries or user_id in self._evicted:
+                self._dirty.add(user_id)
+
+    def take_dirty(self, user_ids=None):
+        """Kirli kayıtların kopyalarını döndür; yazma bitince written() çağrılmalı"""
+        with self._lock:
+            selected = set(self._dirty) if user_ids is None else self._dirty.intersection(user_ids)
+            self._dirty -= selected
+            self._in_flight |= selected
+            items = []
+            for user_id in selected:
+                data = self._evicted.get(user_id)
+                if data is None:
+                    data = self._entries[user_id]
+                items.append((user_id, data.copy()))
+            return items
+
+    def written(self, user_ids):
+        """Yazılan kayıtları bildir; temiz kalan bekleme alanı kayıtları bırakılır"""
+        with self._lock:
+            for user_id in user_ids:
+                self._in_flight.discard(user_id)
+                if user_id not in self._dirty:
+                    self._evicted.pop(user_id, None)
+
+    def discard_clean(self):
+        """Yazılmayı beklemeyen kayıtları bırak; sonraki okumalar depodan yeniden yükler"""
+        with self._lock:
+            for user_id in [uid for uid in self._entries if uid not in self._dirty and uid not in self._in_flight]:
+                del self._entries[user_id]
+                self._mark_stale(user_id)
+
+    def _mark_stale(self, user_id):
+        load = self._loading.get(user_id)
+        if load is not None:
+            load.stale = True
+
+    def _insert(self, user_id, data):
+        self._entries[user_id] = data
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.capacity:
+            evicted_id, evicted_data = self._entries.popitem(last=False)
+            self.evictions += 1
+            self._mark_stale(evicted_id)
+            if evicted_id in self._dirty or evicted_id in self._in_flight:
+                self._evicted[evicted_id] = evicted_data
+
+    def _resident_count(self):
+        return sum(1 for data in self._entries.values() if data is not _ABSENT) + len(self._evicted)
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "capacity": self.capacity,
+                "resident_users": self._resident_count(),
+                "dirty_users": len(self._dirty),
+                "evicted_pending_write": len(self._evicted),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,211 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+
+class UserStatsStore:
+    """Kullanıcı istatistiklerini kullanıcı başına bir satır olarak tutan SQLite deposu.
+
+    Her güncelleme sadece ilgili kullanıcının satırını yazar; böylece kayıt
+    maliyeti toplam kullanıcı sayısından bağımsızdır. Veritabanı WAL
+    modunda açılır ve her satırın bir sürüm numarası vardır: aynı dosyayı
+    paylaşan süreçler update() ile satırı atomik olarak günceller ve
+    version() ile önbelleklerinin eskiyip eskimediğini anlar.
+    cached_version() aynı kullanıcı için version_ttl saniye içinde tekrar
+    sorgu çalıştırmaz; bir isteğin tekrarlanan okumaları tek sorguya iner.
+    """
+
+    def __init__(self, db_path, table, busy_timeout=30.0, version_ttl=0.5, max_checked=10_000):
+        self.db_path = db_path
+        self.table = table
+        self.version_ttl = version_ttl
+        self.max_checked = max_checked
+        self._lock = threading.Lock()
+        self._checked = {}  # user_id -> (sürüm, sorgu zamanı)
+        # timeout: başka bir süreç yazarken kilidin açılmasını bekle (SQLITE_BUSY yerine)
+        self._conn = sqlite3.connect(db_path, timeout=busy_timeout, check_same_thread=False)
+        # WAL: okuyucular yazanı beklemez; birden çok süreç aynı dosyayı güvenle paylaşır
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "user_id INTEGER PRIMARY KEY, "
+            "data BLOB NOT NULL, "
+            "updated_at REAL, "
+            "version INTEGER NOT NULL DEFAULT 0)"
+        )
+        columns = [row[1] for row in self._conn.execute(f"PRAGMA table_info({self.table})")]
+        if "version" not in columns:
+            # Sürüm sütunu olmadan oluşturulmuş eski tablo
+            self._conn.execute(f"ALTER TABLE {self.table} ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def load(self, user_id):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT data FROM {self.table} WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0])
+
+    def load_versioned(self, user_id):
+        """(veri, sürüm) döndür; satır yoksa (None, 0)"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT data, version FROM {self.table} WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        # Okunan sürüm cached_version() için de geçerli: yeni yüklenen kayıt hemen tekrar yüklenmez
+        self._remember(user_id, row[1] if row is not None else 0, time.monotonic())
+        if row is None:
+            return None, 0
+        return pickle.loads(row[0]), row[1]
+
+    def version(self, user_id):
+        """Satırın güncel sürümü (yoksa 0); önbellek geçerliliği için ucuz birincil anahtar sorgusu"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT version FROM {self.table} WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        return row[0] if row is not None else 0
+
+    def cached_version(self, user_id):
+        """version() gibi; satır son version_ttl saniyede sorgulandıysa ya da bu bağlantıyla yazıldıysa sorgusuz döner.
+
+        Başka bir sürecin yazdığı sürüm en geç version_ttl saniye sonra görülür.
+        """
+        now = time.monotonic()
+        checked = self._checked.get(user_id)
+        if checked is not None and now - checked[1] < self.version_ttl:
+            return checked[0]
+        version = self.version(user_id)
+        self._remember(user_id, version, now)
+        return version
+
+    def _remember(self, user_id, version, now):
+        if len(self._checked) >= self.max_checked:
+            # Süresi dolanları at; hâlâ doluysa hepsini unut
+            self._checked = {uid: entry for uid, entry in self._checked.items() if now - entry[1] < self.version_ttl}
+            if len(self._checked) >= self.max_checked:
+                self._checked = {}
+        self._checked[user_id] = (version, now)
+
+    def update(self, user_id, apply):
+        """Satırı süreçler arası atomik oku-değiştir-yaz; apply(eski_veri veya None) yeni veriyi döndürür.
+
+        BEGIN IMMEDIATE yazma kilidini baştan aldığı için aynı dosyayı
+        paylaşan süreçlerin güncellemeleri sıraya girer, hiçbiri kaybolmaz.
+        (yeni_veri, yeni_sürüm) döndürür.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    f"SELECT data, version FROM {self.table} WHERE user_id = ?", (user_id,)
+                ).fetchone()
+                data = apply(pickle.loads(row[0]) if row is not None else None)
+                version = (row[1] if row is not None else 0) + 1
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (user_id, data, updated_at, version) VALUES (?, ?, ?, ?)",
+                    (user_id, pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL), time.time(), version)
+                )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        self._remember(user_id, version, time.monotonic())
+        return data, version
+
+    def load_all(self):
+        with self._lock:
+            rows = self._conn.execute(f"SELECT user_id, data FROM {self.table}").fetchall()
+        return {user_id: pickle.loads(data) for user_id, data in rows}
+
+    def save(self, user_id, user_data):
+        self.save_many([(user_id, user_data)])
+
+    def save_many(self, items):
+        now = time.time()
+        rows = [
+            (user_id, pickle.dumps(user_data, protocol=pickle.HIGHEST_PROTOCOL), now)
+            for user_id, user_data in items
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT INTO {self.table} (user_id, data, updated_at, version) VALUES (?, ?, ?, 1) "
+                "ON CONFLICT(user_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at, "
+                "version = version + 1",
+                rows
+            )
+            self._conn.commit()
+        for user_id, _, _ in rows:
+            self._checked.pop(user_id, None)
+
+    def insert_missing(self, items):
+        """Sadece depoda olmayan kullanıcıları ekle; mevcut (belki daha yeni) satırlara dokunma"""
+        now = time.time()
+        rows = [
+            (user_id, pickle.dumps(user_data, protocol=pickle.HIGHEST_PROTOCOL), now)
+            for user_id, user_data in items
+        ]
+        with self._lock:
+            cursor = self._conn.executemany(
+                f"INSERT OR IGNORE INTO {self.table} (user_id, data, updated_at, version) VALUES (?, ?, ?, 1)",
+                rows
+            )
+            self._conn.commit()
+        for user_id, _, _ in rows:
+            self._checked.pop(user_id, None)
+        return cursor.rowcount
+
+    def replace_all(self, items):
+        """Tablodaki tüm satırları tek işlemde verilen kullanıcılarla değiştir"""
+        now = time.time()
+        rows = [
+            (user_id, pickle.dumps(user_data, protocol=pickle.HIGHEST_PROTOCOL), now)
+            for user_id, user_data in items
+        ]
+        with self._lock:
+            with self._conn:
+                # Sürümler önceki en büyük sürümün üstünden devam eder; çalışan süreçlerin önbellekleri eskimiş sayılır
+                next_version = self._conn.execute(f"SELECT COALESCE(MAX(version), 0) + 1 FROM {self.table}").fetchone()[0]
+                self._conn.execute(f"DELETE FROM {self.table}")
+                self._conn.executemany(
+                    f"INSERT INTO {self.table} (user_id, data, updated_at, version) VALUES (?, ?, ?, ?)",
+                    [row + (next_version,) for row in rows]
+                )
+        self._checked = {}
+        return len(rows)
+
+    def migrate_from_pickle(self, pickle_path, convert):
+        """Eski tam-pickle dosyasını bir kereliğine depoya aktar; convert her kullanıcı verisini yeni düzene çevirir"""
+        if not os.path.exists(pickle_path):
+            return 0
+
+        try:
+            with open(pickle_path, "rb") as f:
+                legacy_stats = pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ {os.path.basename(pickle_path)} okunamadı, taşıma atlandı: {e}")
+            return 0
+
+        # Aynı anda başlayan başka bir worker taşımış olabilir: mevcut satırlar ezilmez
+        inserted = self.insert_missing((user_id, convert(data)) for user_id, data in legacy_stats.items())
+        try:
+            os.replace(pickle_path, pickle_path + ".migrated")
+        except FileNotFoundError:
+            pass
+        print(f"✅ {inserted} kullanıcı {os.path.basename(pickle_path)} dosyasından {self.table} tablosuna taşındı")
+        return len(legacy_stats)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
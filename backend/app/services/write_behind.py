@@ -0,0 +1,130 @@
+import os
+import pickle
+import tempfile
+import threading
+import time
+
+
+def atomic_pickle_dump(obj, path):
+    """Geçici dosyaya yazıp rename et; çökme anında yarım pickle kalmaz"""
+    atomic_write_bytes(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL), path)
+
+
+def atomic_write_bytes(data, path):
+    """Önceden serileştirilmiş veriyi atomik olarak yaz (geçici dosya + fsync + rename)"""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        # mkstemp 0600 ile açar; mevcut dosyanın iznini koru
+        os.chmod(tmp_path, os.stat(path).st_mode & 0o777 if os.path.exists(path) else 0o644)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class WriteBehindFlusher:
+    """Kirli kullanıcıları biriktirip arka planda toplu olarak kaydeden yardımcı.
+
+    flush_fn, kirli kullanıcı id'lerinin kümesiyle çağrılır. Kayıt her
+    flush_interval saniyede bir ya da max_pending_updates güncellemede bir yapılır.
+    """
+
+    def __init__(self, flush_fn, flush_interval=5.0, max_pending_updates=100, name="write-behind"):
+        self.flush_fn = flush_fn
+        self.flush_interval = flush_interval
+        self.max_pending_updates = max_pending_updates
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._dirty = set()
+        self._pending_updates = 0
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.flush_count = 0
+        self.last_flush_duration = 0.0
+        self.total_flush_duration = 0.0
+        self.last_flush_at = None
+        self.last_error = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def mark_dirty(self, user_id):
+        with self._lock:
+            self._dirty.add(user_id)
+            self._pending_updates += 1
+            should_flush = self._pending_updates >= self.max_pending_updates
+        if should_flush:
+            self._wakeup.set()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                dirty = self._dirty
+                self._dirty = set()
+                self._pending_updates = 0
+            if not dirty:
+                return 0
+
+            start = time.perf_counter()
+            try:
+                self.flush_fn(dirty)
+                self.last_error = None
+            except Exception as e:
+                # Kaydedilemeyenleri bir sonraki turda tekrar dene
+                with self._lock:
+                    self._dirty |= dirty
+                self.last_error = str(e)
+                print(f"⚠️ {self.name} kaydetme hatası: {e}")
+                return 0
+
+            duration = time.perf_counter() - start
+            self.flush_count += 1
+            self.last_flush_duration = duration
+            self.total_flush_duration += duration
+            self.last_flush_at = time.time()
+            return len(dirty)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def stop(self):
+        """Arka plan iş parçacığını durdur ve son kaydı yap"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+            self._thread = None
+        self.flush()
+
+    def metrics(self):
+        with self._lock:
+            queue_depth = len(self._dirty)
+            pending_updates = self._pending_updates
+        return {
+            "flush_interval_seconds": self.flush_interval,
+            "max_pending_updates": self.max_pending_updates,
+            "queue_depth": queue_depth,
+            "pending_updates": pending_updates,
+            "flush_count": self.flush_count,
+            "last_flush_duration_ms": round(self.last_flush_duration * 1000, 3),
+            "avg_flush_duration_ms": round(self.total_flush_duration / self.flush_count * 1000, 3) if self.flush_count else 0,
+            "last_flush_at": self.last_flush_at,
+            "last_error": self.last_error
+        }
@@ -17,6 +17,9 @@ print(f"DEBUG: App dizini bulundu: {app_dir}")
 
 from app.core.database import SessionLocal
 from app.core.models import Questions
+from app.services.question_catalog import invalidate_question_catalog
+from app.services.question_search import sync_question_search
+from app.services.question_tags import sync_question_tags
 
 def import_questions_from_json(json_path):
     """
@@ -34,6 +37,7 @@ def import_questions_from_json(json_path):
 
     db: Session = SessionLocal()
     count = 0
+    imported = []
     try:
         for q in questions_data:
             required_fields = ["ders_id", "konu_id", "zorluk", "soru_metni", "secenekler", "dogru_cevap"]
@@ -57,9 +61,16 @@ def import_questions_from_json(json_path):
                 etiket=etiket_str
             )
             db.add(soru)
+            imported.append(soru)
             count += 1
         
+        # soru_id'ler atansın, sonra normalleştirilmiş etiketler ve arama dizini aynı işlemde yazılsın
+        db.flush()
+        sync_question_tags(db, imported)
+        sync_question_search(db, imported)
         db.commit()
+        # Çalışan sunucuların soru kataloğu yeni sorularla yeniden yüklenir
+        invalidate_question_catalog()
         print(f"Başarıyla {count} soru '{os.path.basename(json_path)}' dosyasından eklendi!")
 
     except Exception as e:
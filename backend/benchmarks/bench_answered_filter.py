@@ -0,0 +1,128 @@
+"""
+/questions/batch cevaplanmış soru filtresini ölçer: Python listesi + `not in` ile NOT EXISTS.
+
+Geçici bir SQLite veritabanına 50.000 cevabı olan bir kullanıcı (ve diğer
+kullanıcılar) yazılır. Eski yol kullanıcının tüm question_id'lerini listeye
+okuyup dersin her sorusu için listede doğrusal arama yapar. Yeni yol
+(user_id, question_id) indeksi üzerinde NOT EXISTS ile dersin cevaplanmamış
+soru_id'lerini döndürür ve aday soruları bir kümeyle süzer. NOT EXISTS
+indekssiz de ölçülür; sorgu planı raporlanır.
+
+Kullanım (backend dizininden):
+    python benchmarks/bench_answered_filter.py [cevap_sayısı]
+"""
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+with contextlib.redirect_stdout(open(os.devnull, "w")):
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base
+    from app.core.models import Questions, Submission
+
+NUM_SUBMISSIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+NUM_QUESTIONS = 20_000
+NUM_SUBJECTS = 6
+OTHER_USERS = 200
+OTHER_SUBMISSIONS = 200_000
+USER_ID = 1
+DERS_ID = 1
+REPEATS = 20
+
+
+def build_database(session, rng):
+    session.bulk_insert_mappings(Questions, [
+        {"soru_id": soru_id, "ders_id": rng.randint(1, NUM_SUBJECTS), "konu_id": 1, "altbaslik_id": 1, "zorluk": 3}
+        for soru_id in range(1, NUM_QUESTIONS + 1)
+    ])
+    # Ağır kullanıcı soruları tekrar tekrar cevaplar; diğer kullanıcılar tabloyu büyütür
+    rows = [{"user_id": USER_ID, "question_id": rng.randint(1, NUM_QUESTIONS), "is_correct": True}
+            for _ in range(NUM_SUBMISSIONS)]
+    rows += [{"user_id": rng.randint(2, OTHER_USERS + 1), "question_id": rng.randint(1, NUM_QUESTIONS), "is_correct": False}
+             for _ in range(OTHER_SUBMISSIONS)]
+    rng.shuffle(rows)
+    session.bulk_insert_mappings(Submission, rows)
+    session.commit()
+
+
+def old_path(session, candidates):
+    answered_ids = session.query(Submission.question_id).filter(Submission.user_id == USER_ID).all()
+    answered_ids = [id[0] for id in answered_ids]
+    return [q for q in candidates if q not in answered_ids]
+
+
+def anti_join_path(session, candidates):
+    answered = session.query(Submission.id).filter(
+        Submission.user_id == USER_ID,
+        Submission.question_id == Questions.soru_id
+    )
+    unanswered_ids = {
+        row[0] for row in session.query(Questions.soru_id).filter(Questions.ders_id == DERS_ID, ~answered.exists())
+    }
+    return [q for q in candidates if q in unanswered_ids]
+
+
+def timed(fn, *args, repeats=REPEATS):
+    samples = []
+    result = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000, result
+
+
+def query_plan(session):
+    rows = session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT soru_id FROM questions q WHERE q.ders_id = :ders_id AND NOT EXISTS "
+        "(SELECT 1 FROM submissions s WHERE s.user_id = :user_id AND s.question_id = q.soru_id)"
+    ), {"ders_id": DERS_ID, "user_id": USER_ID}).fetchall()
+    return [row[-1] for row in rows]
+
+
+def main():
+    rng = random.Random(19)
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_engine(f"sqlite:///{os.path.join(workdir, 'database.db')}")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        build_database(session, rng)
+        candidates = [row[0] for row in session.query(Questions.soru_id).filter(Questions.ders_id == DERS_ID)]
+
+        # Eski yol dersin her sorusu için 50.000 elemanlı listede arar; birkaç tekrar yeter
+        old_ms, old_result = timed(old_path, session, candidates, repeats=3)
+        new_ms, new_result = timed(anti_join_path, session, candidates)
+        indexed_plan = query_plan(session)
+
+        session.execute(text("DROP INDEX ix_submissions_user_question_correct"))
+        session.commit()
+        session.close()
+        # Bağlantının hazır ifade önbelleği eski planı tutmasın
+        engine.dispose()
+        session = sessionmaker(bind=engine)()
+        unindexed_ms, unindexed_result = timed(anti_join_path, session, candidates, repeats=1)
+        unindexed_plan = query_plan(session)
+        session.close()
+        engine.dispose()
+
+    print(f"Kullanıcı {NUM_SUBMISSIONS:,} cevap (+{OTHER_SUBMISSIONS:,} diğer), {NUM_QUESTIONS:,} soru, "
+          f"ders adayı {len(candidates):,}, cevaplanmamış {len(new_result):,}")
+    print(f"Liste + not in:          {old_ms:10.1f} ms / istek")
+    print(f"NOT EXISTS (indeksli):   {new_ms:10.2f} ms / istek ({old_ms / new_ms:.0f}x)")
+    print(f"NOT EXISTS (indekssiz):  {unindexed_ms:10.1f} ms / istek")
+    print(f"Aynı sonuç: {old_result == new_result == unindexed_result}")
+    print("Sorgu planı (indeksli):  " + " | ".join(indexed_plan))
+    print("Sorgu planı (indekssiz): " + " | ".join(unindexed_plan))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+/questions/batch'in veritabanı bağlamını ölçer: ayrı sayım sorguları ile tek toplu sorgu.
+
+Geçici bir SQLite veritabanına sentetik sorular, az ve çok cevabı olan
+kullanıcılar ve diğer kullanıcıların cevapları yazılır. Eski yol dört sorgu
+çalıştırır: toplam cevap, yanlış cevap, NOT EXISTS ile cevaplanmamış
+sorular, join ile dersteki cevap sayısı. Yeni yol load_batch_context'tir:
+toplamları ve dersin cevaplanmış sorularını tek sorguyla alır. Sorgular
+SQLAlchemy before_cursor_execute olayıyla sayılır. build_batch'in sorgu
+bütçesi (QUERY_BUDGET) aşılırsa ölçüm hata verir. İki yolun sonuçları
+karşılaştırılır.
+
+Kullanım (backend dizininden):
+    python benchmarks/bench_batch_context.py [ağır_kullanıcının_cevap_sayısı]
+"""
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+with contextlib.redirect_stdout(open(os.devnull, "w")):
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base
+    from app.core.models import Questions, Submission
+    from app.services.model_registry import ModelRegistry
+    from app.services.question_catalog import QuestionCatalog
+    from app.services.test_batches import build_batch, load_batch_context
+
+HEAVY_SUBMISSIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+NUM_QUESTIONS = 20_000
+NUM_SUBJECTS = 6
+OTHER_USERS = 200
+OTHER_SUBMISSIONS = 200_000
+USERS = ((1, "yeni", 10), (2, "orta", 1_000), (3, "ağır", HEAVY_SUBMISSIONS))
+DERS_ID = 1
+QUERY_BUDGET = 2
+REPEATS = 10
+
+
+def build_database(session, rng):
+    session.bulk_insert_mappings(Questions, [
+        {"soru_id": soru_id, "ders_id": rng.randint(1, NUM_SUBJECTS), "konu_id": 1, "altbaslik_id": 1,
+         "soru_metin": "", "secenekler": "{}", "dogru_cevap": "A", "dogru_cevap_aciklamasi": "",
+         "zorluk": rng.randint(1, 5), "etiket": "TYT"}
+        for soru_id in range(1, NUM_QUESTIONS + 1)
+    ])
+    rows = [{"user_id": user_id, "question_id": rng.randint(1, NUM_QUESTIONS), "is_correct": rng.random() < 0.6}
+            for user_id, _, count in USERS for _ in range(count)]
+    rows += [{"user_id": rng.randint(10, OTHER_USERS + 10), "question_id": rng.randint(1, NUM_QUESTIONS),
+              "is_correct": rng.random() < 0.6}
+             for _ in range(OTHER_SUBMISSIONS)]
+    rng.shuffle(rows)
+    session.bulk_insert_mappings(Submission, rows)
+    session.commit()
+
+
+def old_context(session, user_id):
+    """Önceki /batch: dört ayrı sorgu"""
+    total = session.query(Submission.id).filter(Submission.user_id == user_id).count()
+    wrong = session.query(Submission.id).filter(Submission.user_id == user_id, Submission.is_correct == False).count()
+    answered = session.query(Submission.id).filter(
+        Submission.user_id == user_id,
+        Submission.question_id == Questions.soru_id
+    )
+    unanswered_ids = [
+        row[0] for row in session.query(Questions.soru_id).filter(Questions.ders_id == DERS_ID, ~answered.exists())
+    ]
+    subject_count = session.query(Submission.id).join(Questions, Submission.question_id == Questions.soru_id).filter(
+        Submission.user_id == user_id,
+        Questions.ders_id == DERS_ID
+    ).count()
+    return total, wrong, unanswered_ids, subject_count
+
+
+def timed(fn, *args):
+    samples = []
+    result = None
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000, result
+
+
+def main():
+    rng = random.Random(25)
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_engine(f"sqlite:///{os.path.join(workdir, 'database.db')}")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        build_database(session, rng)
+        models = ModelRegistry(storage_dir=os.path.join(workdir, "models"), async_updates=False)
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            catalog = QuestionCatalog.load(session)
+
+        statements = []
+        event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+        def queries(fn, *args):
+            statements.clear()
+            fn(*args)
+            return len(statements)
+
+        print(f"{NUM_QUESTIONS:,} soru, {OTHER_SUBMISSIONS:,} başka cevap; ders {DERS_ID}, sorgu bütçesi {QUERY_BUDGET}")
+        print(f"{'kullanıcı':>14} | {'eski sorgu':>10} | {'eski ms':>8} | {'yeni sorgu':>10} | {'yeni ms':>8} | {'build_batch sorgu':>17}")
+        for user_id, name, count in USERS:
+            old_queries = queries(old_context, session, user_id)
+            new_queries = queries(load_batch_context, session, user_id, DERS_ID)
+            with contextlib.redirect_stdout(open(os.devnull, "w")):
+                batch_queries = queries(build_batch, session, models, catalog, user_id, DERS_ID)
+            assert batch_queries <= QUERY_BUDGET, f"build_batch {batch_queries} sorgu çalıştırdı (bütçe {QUERY_BUDGET})"
+
+            old_ms, (total, wrong, unanswered_ids, subject_count) = timed(old_context, session, user_id)
+            new_ms, context = timed(load_batch_context, session, user_id, DERS_ID)
+            start, end = catalog.subject_range(DERS_ID)
+            subject_ids = catalog.soru_ids[start:end]
+            assert (total, wrong, subject_count) == (context.total, context.wrong, context.subject_count)
+            assert sorted(unanswered_ids) == subject_ids[~np.isin(subject_ids, context.answered_ids)].tolist()
+            print(f"{f'{name} ({count:,})':>14} | {old_queries:10d} | {old_ms:8.2f} | {new_queries:10d} | {new_ms:8.2f} | {batch_queries:17d}")
+        print("Sayımlar ve cevaplanmamış sorular iki yolda aynı")
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
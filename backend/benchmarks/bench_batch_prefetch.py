@@ -0,0 +1,131 @@
+"""
+/questions/batch'i ölçer: isteğin içinde parti üretmek ile arka planda hazırlanmış partiyi okumak.
+
+Geçici bir SQLite veritabanına sentetik sorular ve çok cevabı olan bir
+kullanıcı yazılır. Parti üretimi (sayımlar, NOT EXISTS, skorlama,
+örnekleme) build_batch ile isteğin içinde ölçülür. Karşılaştırma
+BatchPrefetcher.take ile yapılır: end-test sonrası hazırlanan partiyi okur.
+Ayrıca end-test'ten sonra /batch'in belirli bir gecikmeyle geldiği akış
+simüle edilir ve her gecikme için isabet oranı raporlanır.
+
+Kullanım (backend dizininden):
+    python benchmarks/bench_batch_prefetch.py [soru_sayısı]
+"""
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+with contextlib.redirect_stdout(open(os.devnull, "w")):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base
+    from app.core.models import Questions, Submission
+    from app.services.model_registry import ModelRegistry
+    from app.services.question_catalog import QuestionCatalog
+    from app.services.test_batches import BatchPrefetcher, build_batch
+
+NUM_QUESTIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+NUM_SUBJECTS = 6
+NUM_SUBMISSIONS = 5_000
+USER_ID = 1
+DERS_ID = 1
+REPEATS = 20
+ROUNDS = 20
+DELAYS_MS = (0, 20, 100, 500)
+
+
+def build_database(session, rng):
+    session.bulk_insert_mappings(Questions, [
+        {"soru_id": soru_id, "ders_id": rng.randint(1, NUM_SUBJECTS), "konu_id": rng.randint(1, 20), "altbaslik_id": 1,
+         "soru_metin": "", "secenekler": "{}", "dogru_cevap": "A", "dogru_cevap_aciklamasi": "",
+         "zorluk": rng.randint(1, 5), "etiket": rng.choice(["TYT", "AYT", "TYT, AYT"])}
+        for soru_id in range(1, NUM_QUESTIONS + 1)
+    ])
+    session.bulk_insert_mappings(Submission, [
+        {"user_id": USER_ID, "question_id": rng.randint(1, NUM_QUESTIONS), "is_correct": rng.random() < 0.6}
+        for _ in range(NUM_SUBMISSIONS)
+    ])
+    session.commit()
+
+
+def median_ms(samples):
+    samples = sorted(samples)
+    return samples[len(samples) // 2] * 1000
+
+
+def main():
+    rng = random.Random(23)
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_engine(f"sqlite:///{os.path.join(workdir, 'database.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        session = Session()
+        build_database(session, rng)
+        models = ModelRegistry(storage_dir=os.path.join(workdir, "models"), async_updates=False)
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            catalog = QuestionCatalog.load(session)
+
+        def build_fn(user_id, ders_id, etiket):
+            db = Session()
+            try:
+                return build_batch(db, models, catalog, user_id, ders_id, etiket), models.version, catalog.stamp
+            finally:
+                db.close()
+
+        prefetcher = BatchPrefetcher(build_fn)
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            build_batch(session, models, catalog, USER_ID, DERS_ID)  # ısınma
+            inline = []
+            for _ in range(REPEATS):
+                t0 = time.perf_counter()
+                build_batch(session, models, catalog, USER_ID, DERS_ID)
+                inline.append(time.perf_counter() - t0)
+
+            cached = []
+            for _ in range(REPEATS):
+                prefetcher.schedule(USER_ID, DERS_ID)
+                prefetcher.wait_idle()
+                t0 = time.perf_counter()
+                batch = prefetcher.take(USER_ID, DERS_ID, None, models.version, catalog.stamp)
+                cached.append(time.perf_counter() - t0)
+                assert batch is not None and len(batch) == 30
+
+            # end-test → (kullanıcının beklemesi) → /batch: hazır değilse istek içinde üretilir
+            flow = {}
+            for delay_ms in DELAYS_MS:
+                hits = 0
+                samples = []
+                for _ in range(ROUNDS):
+                    prefetcher.schedule(USER_ID, DERS_ID)
+                    time.sleep(delay_ms / 1000)
+                    t0 = time.perf_counter()
+                    batch = prefetcher.take(USER_ID, DERS_ID, None, models.version, catalog.stamp)
+                    if batch is None:
+                        batch = build_batch(session, models, catalog, USER_ID, DERS_ID)
+                    else:
+                        hits += 1
+                    samples.append(time.perf_counter() - t0)
+                    prefetcher.wait_idle()
+                    prefetcher.record_submission(USER_ID, batch[0]["soru_id"])  # kalan hazır partiyi düşür
+                flow[delay_ms] = (hits / ROUNDS, median_ms(samples))
+        prefetcher.shutdown()
+
+        print(f"{NUM_QUESTIONS:,} soru, {NUM_SUBJECTS} ders; kullanıcının {NUM_SUBMISSIONS:,} cevabı")
+        print(f"İstek içinde üretim (build_batch): {median_ms(inline):8.2f} ms")
+        print(f"Hazır parti okuma (take):          {median_ms(cached):8.4f} ms")
+        print(f"{'end-test → /batch gecikmesi':>28} | {'isabet':>6} | {'/batch ms':>9}")
+        for delay_ms, (hit_rate, ms) in flow.items():
+            print(f"{f'{delay_ms} ms':>28} | {hit_rate:6.0%} | {ms:9.2f}")
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
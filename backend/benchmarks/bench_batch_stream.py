@@ -0,0 +1,85 @@
+"""
+/questions/batch ile /questions/batch/stream'in ilk soruya kadar geçen süresini karşılaştırır.
+
+Depodaki örnek soru dosyasından (400MATSORUSU.json) bellekte bir soru
+kataloğu kurulur ve 30 soruluk parti seçilir (veritabanı yok). JSON dizisini
+istemci ancak tamamı inince çözebilir. NDJSON'da ilk soru, hafif liste
+satırı ve ilk soru satırı inince hazırdır. İki biçimin bayt sayıları ve
+kodlama süreleri ölçülür. Yavaş mobil bağlantılarda ilk soruya kadar geçen
+süre tahmin edilir: gidiş-dönüş + baytlar / bant genişliği (sıkıştırmasız,
+TCP yavaş başlangıç yok sayılır).
+
+Kullanım (backend dizininden):
+    python benchmarks/bench_batch_stream.py
+"""
+import contextlib
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+with contextlib.redirect_stdout(open(os.devnull, "w")):
+    from app.services.question_catalog import QuestionCatalog
+    from app.services.question_sampler import select_test
+    from app.services.test_batches import batch_events, ndjson_lines
+
+QUESTIONS_FILE = os.path.join(backend_dir, "app", "utils", "ImportQuestions", "400MATSORUSU.json")
+REPEATS = 200
+# (ad, kbit/sn, gidiş-dönüş ms)
+LINKS = (("2G/EDGE", 200, 500), ("yavaş 3G", 400, 400), ("3G", 1600, 150), ("4G", 10_000, 60))
+
+
+def build_rows():
+    with open(QUESTIONS_FILE, encoding="utf-8") as f:
+        questions = json.load(f)
+    return [{
+        "soru_id": soru_id, "ders_id": q["ders_id"], "konu_id": q["konu_id"], "altbaslik_id": q["altbaslik_id"],
+        "soru_metin": q["soru_metni"], "secenekler": json.dumps(q["secenekler"], ensure_ascii=False),
+        "dogru_cevap": q["dogru_cevap"], "dogru_cevap_aciklamasi": q["dogru_cevap_aciklamasi"],
+        "zorluk": q["zorluk"], "etiket": ", ".join(q["etiketler"]),
+    } for soru_id, q in enumerate(questions, start=1)]
+
+
+def timed_us(fn):
+    samples = []
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return samples[len(samples) // 2] * 1e6
+
+
+def main():
+    catalog = QuestionCatalog(build_rows())
+    positions = catalog.positions(1)
+    qs = catalog.take(positions)
+    selected = select_test(catalog.zorluk[positions], np.full(len(qs), 0.5), False, rng=random.Random(24))
+    batch = [qs[i].payload for i in selected]
+
+    array_bytes = len(json.dumps(batch, ensure_ascii=False).encode())
+    lines = [line.encode() for line in ndjson_lines(batch_events(batch))]
+    stream_bytes = sum(map(len, lines))
+    first_bytes = len(lines[0]) + len(lines[1])
+    array_us = timed_us(lambda: json.dumps(batch, ensure_ascii=False))
+    stream_us = timed_us(lambda: list(ndjson_lines(batch_events(batch))))
+
+    print(f"Parti: {len(batch)} soru ({len(catalog.questions)} soruluk örnek dosyadan)")
+    print(f"JSON dizisi: {array_bytes:,} bayt, kodlama {array_us:.0f} µs")
+    print(f"NDJSON: {stream_bytes:,} bayt, kodlama {stream_us:.0f} µs; ilk soru {first_bytes:,} baytta hazır")
+    print(f"{'bağlantı':>10} | {'dizi: ilk soru ms':>17} | {'akış: ilk soru ms':>17} | {'akış: son soru ms':>17}")
+    for name, kbps, rtt_ms in LINKS:
+        def arrival_ms(size):
+            return rtt_ms + size * 8 / kbps
+        print(f"{name:>10} | {arrival_ms(array_bytes):17.0f} | {arrival_ms(first_bytes):17.0f} | {arrival_ms(stream_bytes):17.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Eski eşik tabanlı veri temizleme (her 1000 cevapta %25 kırpma) ile üstel
+sönümlü sayaçları karşılaştırır: cevap başına güncelleme gecikmesi ve
+doğruluk tahminindeki ardışık sıçramalar.
+
+Kullanıcının gerçek başarısı yarı yolda 0.3'ten 0.8'e çıkar; iyi bir sayaç
+buna kademeli ve temizleme anlarında sıçramadan uyum sağlamalıdır.
+
+Kullanım (backend dizininden):
+    python benchmarks/bench_decay.py [cevap_sayısı]
+"""
+import os
+import sys
+import random
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.services.user_stats import UserStats, DEFAULT_HALF_LIFE, SUBJECT, TOPIC, DIFFICULTY
+
+NUM_ANSWERS = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+WARMUP = 100  # İlk cevaplardaki doğal büyük sıçramalar karşılaştırmaya katılmaz
+CLEANUP_THRESHOLD = 1000
+CLEANUP_PERCENTAGE = 0.25
+
+
+def legacy_user():
+    return {
+        'total_questions': 0,
+        'correct_answers': 0,
+        SUBJECT: {},
+        TOPIC: {},
+        DIFFICULTY: {},
+        'last_cleanup_at': 0,
+    }
+
+
+def legacy_update(user, ders_id, konu_id, zorluk, correct):
+    """Eski update + cleanup_old_data davranışı"""
+    user['total_questions'] += 1
+    user['correct_answers'] += int(correct)
+    for kind, key in ((SUBJECT, ders_id), (TOPIC, (ders_id, konu_id)), (DIFFICULTY, zorluk)):
+        perf = user[kind].setdefault(key, {'total': 0, 'correct': 0})
+        perf['total'] += 1
+        perf['correct'] += int(correct)
+
+    total = user['total_questions']
+    if total % CLEANUP_THRESHOLD == 0 and user['last_cleanup_at'] != total:
+        remove = int(total * CLEANUP_PERCENTAGE)
+        accuracy = user['correct_answers'] / total
+        user['total_questions'] -= remove
+        user['correct_answers'] = int(user['total_questions'] * accuracy)
+        for kind in (SUBJECT, TOPIC, DIFFICULTY):
+            active = [perf for perf in user[kind].values() if perf['total'] > 0]
+            if active:
+                per_key = remove // len(active)
+                for perf in active:
+                    key_accuracy = perf['correct'] / perf['total']
+                    perf['total'] -= min(per_key, perf['total'])
+                    perf['correct'] = int(perf['total'] * key_accuracy)
+        user['last_cleanup_at'] = total
+
+
+def legacy_topic_accuracy(user, key):
+    perf = user[TOPIC].get(key)
+    if not perf or perf['total'] == 0:
+        return 0.5
+    return perf['correct'] / perf['total']
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+def run(update, accuracy, answers):
+    latencies = []
+    estimates = []
+    perf_counter = time.perf_counter
+    for row in answers:
+        t0 = perf_counter()
+        update(*row)
+        latencies.append((perf_counter() - t0) * 1e6)
+        estimates.append(accuracy())
+    jumps = [abs(b - a) for a, b in zip(estimates[WARMUP:], estimates[WARMUP + 1:])]
+    # Eski düzende temizlemenin tetiklendiği cevaplar
+    cleanup_latencies = latencies[CLEANUP_THRESHOLD - 1::CLEANUP_THRESHOLD]
+    return latencies, cleanup_latencies, estimates, jumps
+
+
+def main():
+    rng = random.Random(11)
+    answers = []
+    for i in range(NUM_ANSWERS):
+        skill = 0.3 if i < NUM_ANSWERS // 2 else 0.8
+        answers.append((1, 1, rng.randint(1, 5), rng.random() < skill))
+
+    legacy = legacy_user()
+    legacy_result = run(
+        lambda *row: legacy_update(legacy, *row),
+        lambda: legacy_topic_accuracy(legacy, (1, 1)),
+        answers
+    )
+
+    decayed = UserStats(half_life=DEFAULT_HALF_LIFE)
+    decay_result = run(decayed.record, lambda: decayed.accuracy(TOPIC, (1, 1)), answers)
+
+    # Değişimden 1000 cevap sonra gerçek başarıya (0.8) ne kadar yaklaşıldı
+    probe = min(NUM_ANSWERS - 1, NUM_ANSWERS // 2 + 1000)
+    print(f"{NUM_ANSWERS:,} cevap, yarı ömür {DEFAULT_HALF_LIFE} cevap")
+    print(f"{'':>10} | {'p50 µs':>8} | {'p99 µs':>8} | {'1000. cevap µs':>14} | {'max sıçrama':>11} | {'+1000 tahmin':>12}")
+    for name, (latencies, cleanup_latencies, estimates, jumps) in (("eşik", legacy_result), ("sönümlü", decay_result)):
+        print(f"{name:>10} | {percentile(latencies, 0.5):8.2f} | {percentile(latencies, 0.99):8.2f} | "
+              f"{sum(cleanup_latencies) / len(cleanup_latencies):14.2f} | {max(jumps):11.4f} | {estimates[probe]:12.3f}")
+
+
+if __name__ == "__main__":
+    main()
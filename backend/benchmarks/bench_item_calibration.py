@@ -0,0 +1,113 @@
+"""
+Soru kalibrasyon işinin hızını, belleğini ve doğruluğunu ölçer.
+
+Geçici bir SQLite veritabanına gerçek parametreleri bilinen (2PL) sentetik
+cevaplar yazar. Elle verilen zorluk etiketleri gerçek zorluğun gürültülü
+bir kopyasıdır. app.services.item_calibration ile parametreler kestirilir;
+gerçek değerlerle korelasyon, kalibre seviyelerin ve elle verilen
+etiketlerin gerçek seviyeye uyumu ve işin en yüksek bellek kullanımı
+(tracemalloc; NumPy dizileri dahil) raporlanır.
+
+Kullanım (backend dizininden):
+    python benchmarks/bench_item_calibration.py [cevap_sayısı]
+"""
+import contextlib
+import os
+import sys
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+with contextlib.redirect_stdout(open(os.devnull, "w")):
+    from app.services.item_calibration import calibrate, calibrated_levels_from_difficulty, MIN_RESPONSES
+
+NUM_SUBMISSIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+NUM_USERS = 20_000
+NUM_QUESTIONS = 2_000
+CHUNK_SIZE = 250_000
+
+
+def build_database(path, rng):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE questions (soru_id INTEGER PRIMARY KEY, ders_id INTEGER, konu_id INTEGER, zorluk INTEGER)")
+    conn.execute(
+        "CREATE TABLE submissions (id INTEGER PRIMARY KEY, user_id INTEGER, question_id INTEGER, "
+        "is_correct BOOLEAN, is_skipped BOOLEAN DEFAULT 0)"
+    )
+    true_b = rng.normal(0.0, 1.0, NUM_QUESTIONS)
+    true_a = np.exp(rng.normal(0.0, 0.3, NUM_QUESTIONS))
+    theta = rng.normal(0.0, 1.0, NUM_USERS)
+
+    # Elle verilen etiket: gerçek zorluğun gürültülü sıralaması (aynı seviye dağılımı)
+    true_levels = calibrated_levels_from_difficulty(true_b, np.repeat([1, 2, 3, 4, 5], NUM_QUESTIONS // 5), np.ones(NUM_QUESTIONS, bool))
+    hand_levels = calibrated_levels_from_difficulty(true_b + rng.normal(0.0, 0.8, NUM_QUESTIONS), true_levels, np.ones(NUM_QUESTIONS, bool))
+    conn.executemany(
+        "INSERT INTO questions VALUES (?, ?, ?, ?)",
+        [(i + 1, int(rng.integers(1, 7)), int(rng.integers(1, 4)), int(level)) for i, level in enumerate(hand_levels)]
+    )
+
+    # Etkinlik dengesiz: bazı kullanıcılar ve sorular çok daha sık
+    activity = rng.pareto(1.5, NUM_USERS) + 0.1
+    popularity = rng.pareto(2.0, NUM_QUESTIONS) + 0.2
+    for start in range(0, NUM_SUBMISSIONS, 500_000):
+        n = min(500_000, NUM_SUBMISSIONS - start)
+        users = rng.choice(NUM_USERS, size=n, p=activity / activity.sum())
+        items = rng.choice(NUM_QUESTIONS, size=n, p=popularity / popularity.sum())
+        p = 1 / (1 + np.exp(-true_a[items] * (theta[users] - true_b[items])))
+        correct = rng.random(n) < p
+        skipped = rng.random(n) < 0.02
+        conn.executemany(
+            "INSERT INTO submissions (user_id, question_id, is_correct, is_skipped) VALUES (?, ?, ?, ?)",
+            zip((users + 1).tolist(), (items + 1).tolist(),
+                [None if s else int(c) for c, s in zip(correct.tolist(), skipped.tolist())], skipped.astype(int).tolist())
+        )
+    conn.commit()
+    conn.close()
+    return true_b, true_a, true_levels, hand_levels
+
+
+def main():
+    rng = np.random.default_rng(11)
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, "database.db")
+        t0 = time.perf_counter()
+        true_b, true_a, true_levels, hand_levels = build_database(db_path, rng)
+        print(f"{NUM_SUBMISSIONS:,} cevap, {NUM_USERS:,} kullanıcı, {NUM_QUESTIONS:,} soru "
+              f"(veritabanı {time.perf_counter() - t0:.1f} sn)")
+
+        # Bellek ayrı, kısa bir çalıştırmada ölçülür (tracemalloc satır okumayı çok yavaşlatır);
+        # en yüksek değer ilk geçişlerde görülür, sonraki iterasyonlar aynı dizileri kullanır
+        tracemalloc.start()
+        calibrate(db_path, chunk_size=CHUNK_SIZE, max_iterations=2, dry_run=True)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"En yüksek bellek (tracemalloc): {peak / 2**20:.0f} MB, parça {CHUNK_SIZE:,} satır")
+
+        for model in ("rasch", "2pl"):
+            result = calibrate(db_path, model=model, chunk_size=CHUNK_SIZE)
+
+            ids = result["item_ids"] - 1
+            eligible = result["levels"] > 0
+            b_corr = np.corrcoef(result["difficulty"], true_b[ids])[0, 1]
+            a_corr = np.corrcoef(result["discrimination"], true_a[ids])[0, 1] if model == "2pl" else float("nan")
+            calibrated_match = np.mean(result["levels"][eligible] == true_levels[ids][eligible])
+            hand_match = np.mean(hand_levels[ids][eligible] == true_levels[ids][eligible])
+            print(f"{model:>6}: {result['total_seconds']:.1f} sn (okuma {result['read_seconds']:.1f} sn), "
+                  f"{result['iterations']} iterasyon, yakınsadı: {result['converged']}")
+            print(f"        korelasyon b: {b_corr:.3f}, a: {a_corr:.3f}; kalibre soru {eligible.sum()} (≥{MIN_RESPONSES} cevap)")
+            print(f"        gerçek seviyeye uyum: kalibre {calibrated_match:.1%}, elle verilen {hand_match:.1%}")
+
+        with sqlite3.connect(db_path) as conn:
+            stored = conn.execute("SELECT COUNT(*), COUNT(zorluk) FROM question_calibration").fetchone()
+        print(f"question_calibration: {stored[0]} satır, {stored[1]} kalibre seviye")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Öğrenme eğrisinin kullanıcı başına boyutunu ölçer: eski sınırsız liste ile
+halka tampon + saatlik/günlük/haftalık kovalı LearningCurve karşılaştırması.
+
+Kullanım (backend dizininden):
+    python benchmarks/bench_learning_curve.py
+"""
+import os
+import sys
+import pickle
+import time
+from datetime import datetime, timedelta
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.services.learning_curve import LearningCurve
+
+ANSWER_COUNTS = (1_000, 10_000, 100_000)
+# Bir kullanıcı ~2 yıl boyunca eşit aralıklarla soru çözüyor
+SPAN = timedelta(days=730)
+
+
+def main():
+    print(f"{'cevap':>8} | {'liste pickle':>13} | {'eğri pickle':>12} | {'ekleme µs':>9} | {'dump µs':>8}")
+    for n in ANSWER_COUNTS:
+        start = datetime(2024, 1, 1)
+        step = SPAN / n
+        legacy = []
+        curve = LearningCurve()
+
+        t0 = time.perf_counter()
+        for i in range(n):
+            ts = start + step * i
+            accuracy = (i % 7) / 7
+            curve.append(ts, accuracy)
+        append_us = (time.perf_counter() - t0) / n * 1e6
+
+        for i in range(n):
+            legacy.append({'timestamp': start + step * i, 'accuracy': (i % 7) / 7})
+
+        legacy_bytes = len(pickle.dumps(legacy, protocol=pickle.HIGHEST_PROTOCOL))
+        curve_bytes = len(pickle.dumps(curve, protocol=pickle.HIGHEST_PROTOCOL))
+
+        t0 = time.perf_counter()
+        for _ in range(200):
+            pickle.dumps(curve, protocol=pickle.HIGHEST_PROTOCOL)
+        dump_us = (time.perf_counter() - t0) / 200 * 1e6
+
+        # Kova ortalamaları ham noktaların ortalamasıyla tutarlı olmalı
+        weekly = curve.points("weekly")
+        assert sum(p['count'] for p in weekly) <= n
+        assert len(curve) == LearningCurve.RECENT_SIZE
+
+        print(f"{n:>8,} | {legacy_bytes:>11,} B | {curve_bytes:>10,} B | {append_us:>9.2f} | {dump_us:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Model sürümü geçişinin süren isteklere etkisini ölçer.
+
+İstemci iş parçacıkları ModelManager'dan küme kiralayıp tahmin ve cevap
+kaydı yaparken iki anlık görüntü arasında art arda geçiş yapılır. Hiçbir
+istek hata almamalı (kapatılmış bir kümeye erişim dahil), her istek
+başladığı sürümle bitmeli; geçiş süresi ve geçiş sırasındaki istek
+gecikmesi, geçişsiz durumla karşılaştırılır. Kullanıcı istatistikleri
+sürümler arasında ortak depodadır: sonunda depodaki total_questions,
+anlık görüntülerden önceki ve test sırasında kaydedilen cevap sayısıyla
+karşılaştırılır; fark geçişlerde kaybolan güncellemedir. Geçişlerden sonra
+.live altında en fazla iki çalışma kopyası kalmalıdır.
+
+Kullanım (backend dizininden):
+    python benchmarks/bench_model_reload.py [geçiş_sayısı]
+"""
+import contextlib
+import os
+import pickle
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.services.model_registry import ModelManager, ModelRegistry
+from app.services.model_snapshots import SnapshotStore
+
+NUM_RELOADS = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+NUM_USERS = 200
+CLIENT_THREADS = 8
+PHASE_SECONDS = 2.0
+
+
+def question(rng, user_id):
+    return {
+        "ders_id": rng.randint(1, 6),
+        "konu_id": rng.randint(1, 3),
+        "altbaslik_id": 1,
+        "zorluk": rng.randint(1, 5),
+        "user_id": user_id,
+    }
+
+
+def build_snapshot(snapshots, source_dir, stats_dir, version, rng, recorded):
+    """Kullanıcı geçmişi olan bir model dizini hazırla ve anlık görüntüsünü al"""
+    registry = ModelRegistry(storage_dir=source_dir, stats_dir=stats_dir, async_updates=False, shared_state=False,
+                             version=version)
+    for _ in range(NUM_USERS * 20):
+        user_id = rng.randint(1, NUM_USERS)
+        registry.apply_answers(user_id, [(question(rng, user_id), rng.random() < 0.6)])
+        recorded[user_id] = recorded.get(user_id, 0) + 1
+    registry.flush()
+    registry.shutdown()
+    snapshots.create(source_dir, version)
+
+
+def lost_updates(stats_dir, recorded):
+    """Tablo başına (kaydedilen cevap - depodaki total_questions) toplamı"""
+    lost = {}
+    with sqlite3.connect(os.path.join(stats_dir, "user_stats.db")) as conn:
+        for table in ("simple_user_stats", "enhanced_user_stats"):
+            stored = {
+                user_id: pickle.loads(data).total_questions
+                for user_id, data in conn.execute(f"SELECT user_id, data FROM {table}")
+            }
+            lost[table] = sum(count - stored.get(user_id, 0) for user_id, count in recorded.items())
+    return lost
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000 if ordered else 0.0
+
+
+def main():
+    devnull = open(os.devnull, "w")
+    with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(devnull):
+        snapshots = SnapshotStore(os.path.join(root, "snapshots"))
+        stats_dir = os.path.join(root, "stats")
+        os.makedirs(stats_dir)
+        recorded = {}
+        for version in ("v1", "v2"):
+            source_dir = os.path.join(root, f"train-{version}")
+            os.makedirs(source_dir)
+            build_snapshot(snapshots, source_dir, stats_dir, version, random.Random(version), recorded)
+        snapshots.activate("v1")
+        manager = ModelManager(snapshots=snapshots, watch_interval=0, stats_dir=stats_dir)
+        manager.registry.warm_up()
+
+        stop = threading.Event()
+        reloading = threading.Event()
+        lock = threading.Lock()
+        steady, during = [], []
+        errors = []
+        version_changes = 0
+
+        def client(index):
+            nonlocal version_changes
+            rng = random.Random(index)
+            while not stop.is_set():
+                user_id = rng.randint(1, NUM_USERS)
+                X = question(rng, user_id)
+                in_reload = reloading.is_set()
+                t0 = time.perf_counter()
+                registry = manager.acquire()
+                try:
+                    version = registry.version
+                    registry.wait_for_updates(user_id)
+                    registry.predictions.predict(user_id, X)
+                    registry.record_answer(X, rng.random() < 0.6)
+                    with lock:
+                        recorded[user_id] = recorded.get(user_id, 0) + 1
+                    # Bir istek içinde sürüm değişmemeli
+                    if registry.version != version:
+                        with lock:
+                            version_changes += 1
+                except Exception as e:
+                    with lock:
+                        errors.append(repr(e))
+                finally:
+                    manager.release(registry)
+                elapsed = time.perf_counter() - t0
+                with lock:
+                    (during if in_reload else steady).append(elapsed)
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(CLIENT_THREADS)]
+        for thread in threads:
+            thread.start()
+
+        reload_seconds = []
+        try:
+            time.sleep(PHASE_SECONDS)
+            for i in range(NUM_RELOADS):
+                reloading.set()
+                t0 = time.perf_counter()
+                manager.activate("v2" if i % 2 == 0 else "v1", wait=True)
+                reload_seconds.append(time.perf_counter() - t0)
+                reloading.clear()
+                time.sleep(0.2)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        status = manager.status()
+        manager.shutdown()
+        live_dirs = len(os.listdir(os.path.join(snapshots.root, ".live")))
+        lost = lost_updates(stats_dir, recorded)
+
+    print(f"{NUM_RELOADS} geçiş, {CLIENT_THREADS} istemci iş parçacığı, {NUM_USERS} kullanıcı")
+    print(f"Geçiş (kopya + yükleme + ısıtma + devir): ort. {sum(reload_seconds) / len(reload_seconds) * 1000:.1f} ms, "
+          f"en fazla {max(reload_seconds) * 1000:.1f} ms")
+    print(f"{'':>12} | {'istek':>7} | {'p50 ms':>7} | {'p99 ms':>7}")
+    for name, values in (("geçişsiz", steady), ("geçiş anında", during)):
+        print(f"{name:>12} | {len(values):7d} | {percentile(values, 0.5):7.3f} | {percentile(values, 0.99):7.3f}")
+    print(f"Hatalı istek: {len(errors)}, istek içinde sürüm değişimi: {version_changes}, "
+          f"etkin sürüm: {status['active_version']}, toplam geçiş: {status['reloads']}")
+    print(f".live altında kalan çalışma kopyası: {live_dirs} (etkin ve bir önceki)")
+    print(f"Kaydedilen cevap: {sum(recorded.values()):,}; kayıp simple: {lost['simple_user_stats']}, "
+          f"kayıp enhanced: {lost['enhanced_user_stats']}")
+    if errors:
+        print(f"  ilk hata: {errors[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+PracticeModel güncelleme maliyetini ölçer: her örnekte learn_one + tam pickle
+(eski davranış) ile tamponlu mini-batch + periyodik atomik checkpoint karşılaştırması.
+Ayrıca toplu eğitim hızını ve iki yolun aynı modeli ürettiğini kontrol eder.
+
+Kullanım (backend dizininden):
+    python benchmarks/bench_practice_model.py
+"""
+import os
+import sys
+import random
+import tempfile
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.services.ml_model import PracticeModel
+
+SAMPLES = 2_000
+
+
+def make_samples(n, rng):
+    samples = []
+    for _ in range(n):
+        X = {"ders_id": rng.randint(1, 6), "konu_id": rng.randint(1, 3), "altbaslik_id": rng.randint(1, 4),
+             "zorluk": rng.randint(1, 5), "user_id": rng.randint(1, 5_000)}
+        samples.append((X, rng.random() < 0.6))
+    return samples
+
+
+def timed_updates(model, samples):
+    timings = []
+    for X, y in samples:
+        start = time.perf_counter()
+        model.update(X, y)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return sum(timings), timings[len(timings) // 2], timings[int(len(timings) * 0.99)]
+
+
+def main():
+    rng = random.Random(5)
+    samples = make_samples(SAMPLES, rng)
+    probe = make_samples(200, rng)
+
+    with tempfile.TemporaryDirectory() as legacy_dir, tempfile.TemporaryDirectory() as buffered_dir:
+        legacy = PracticeModel(storage_dir=legacy_dir, buffered=False)
+        legacy_total, legacy_p50, legacy_p99 = timed_updates(legacy, samples)
+
+        buffered = PracticeModel(storage_dir=buffered_dir, checkpoint_every=500, checkpoint_interval=60.0)
+        buffered_total, buffered_p50, buffered_p99 = timed_updates(buffered, samples)
+        buffered.shutdown()
+        checkpoints = buffered.checkpointer.flush_count
+
+        print(f"{'mod':>22} | {'toplam':>9} | {'p50':>9} | {'p99':>9}")
+        print(f"{'her örnekte pickle':>22} | {legacy_total * 1000:>6.0f} ms | {legacy_p50 * 1e6:>6.0f} µs | {legacy_p99 * 1e6:>6.0f} µs")
+        print(f"{'tampon + checkpoint':>22} | {buffered_total * 1000:>6.0f} ms | {buffered_p50 * 1e6:>6.0f} µs | {buffered_p99 * 1e6:>6.0f} µs")
+        print(f"checkpoint sayısı: {checkpoints} ({SAMPLES:,} örnek)")
+
+        # Diskten yeniden açılan tamponlu model, her örnekte kaydedilen modelle aynı tahmini vermeli
+        reloaded = PracticeModel(storage_dir=buffered_dir, buffered=False)
+        max_diff = max(
+            abs(legacy.predict(X).get(True, 0) - reloaded.predict(X).get(True, 0))
+            for X, _ in probe
+        )
+        print(f"max tahmin farkı (yeniden yüklenmiş checkpoint): {max_diff:.1e}")
+
+        bulk = PracticeModel(storage_dir=buffered_dir, buffered=False)
+        bulk.model = bulk.create_model()
+        many = make_samples(20_000, rng)
+        start = time.perf_counter()
+        bulk.learn_batch(many)
+        bulk.checkpoint()
+        elapsed = time.perf_counter() - start
+        print(f"toplu eğitim: {len(many) / elapsed * 60:,.0f} örnek/dk")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+/questions/batch skorlamasını ölçer: soru başına EnhancedPracticeModel.predict
+döngüsü ile tek geçişte predict_many karşılaştırması (1k, 10k, 100k aday soru).
+predict_arrays sütunu, sütun dizileri hazır olduğunda (nesnelerden okuma hariç) süreyi gösterir.
+
+Kullanım (backend dizininden):
+    python benchmarks/bench_predict_many.py
+"""
+import os
+import sys
+import random
+import tempfile
+import time
+
+import numpy as np
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.services.enhanced_ml_model import EnhancedPracticeModel
+
+QUESTION_COUNTS = [1_000, 10_000, 100_000]
+USER_ID = 1
+
+
+class Question:
+    __slots__ = ("soru_id", "ders_id", "konu_id", "altbaslik_id", "zorluk")
+
+    def __init__(self, soru_id, ders_id, konu_id, zorluk):
+        self.soru_id = soru_id
+        self.ders_id = ders_id
+        self.konu_id = konu_id
+        self.altbaslik_id = 1
+        self.zorluk = zorluk
+
+
+def make_questions(n, rng):
+    questions = []
+    for soru_id in range(1, n + 1):
+        # Gerçek veride olduğu gibi bazı soruların konusu yok
+        konu_id = None if soru_id % 200 == 0 else rng.randint(1, 3)
+        questions.append(Question(soru_id, rng.randint(1, 6), konu_id, rng.randint(1, 5)))
+    return questions
+
+
+def main():
+    rng = random.Random(3)
+    with tempfile.TemporaryDirectory() as tmp:
+        model = EnhancedPracticeModel(storage_dir=tmp)
+        user_data = model._get_user(USER_ID)
+        for _ in range(500):
+            user_data.record(rng.randint(1, 6), rng.choice([1, 2, 3, None]), rng.randint(1, 5), rng.random() < 0.6)
+
+        print(f"{'soru':>8} | {'predict döngüsü':>16} | {'predict_many':>13} | {'predict_arrays':>14} | {'hızlanma':>8} | {'max fark':>9}")
+        for n in QUESTION_COUNTS:
+            questions = make_questions(n, rng)
+
+            start = time.perf_counter()
+            looped = [
+                model.predict({"ders_id": q.ders_id, "konu_id": q.konu_id, "altbaslik_id": q.altbaslik_id,
+                               "zorluk": q.zorluk, "user_id": USER_ID})
+                for q in questions
+            ]
+            loop_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            batched = model.predict_many(USER_ID, questions)
+            batch_seconds = time.perf_counter() - start
+
+            ders_ids = np.array([q.ders_id for q in questions])
+            konu_ids = np.array([-1 if q.konu_id is None else q.konu_id for q in questions])
+            zorluk = np.array([q.zorluk for q in questions])
+            start = time.perf_counter()
+            model.predict_arrays(USER_ID, ders_ids, konu_ids, zorluk)
+            arrays_seconds = time.perf_counter() - start
+
+            max_diff = max(abs(a - b) for a, b in zip(looped, batched.tolist()))
+            print(f"{n:>8,} | {loop_seconds * 1000:>13.1f} ms | {batch_seconds * 1000:>10.2f} ms | {arrays_seconds * 1000:>11.2f} ms | "
+                  f"{loop_seconds / batch_seconds:>7.0f}x | {max_diff:>9.1e}")
+        model.shutdown()
+
+
+if __name__ == "__main__":
+    main()
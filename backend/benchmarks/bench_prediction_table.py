@@ -0,0 +1,165 @@
+"""
+Kullanıcı başına önceden hesaplanmış tahmin tablosunu (PredictionTables)
+skaler formüllerle karşılaştırır.
+
+Tutarlılık: farklı deneyim seviyelerindeki kullanıcılar için her müfredat
+hücresinde (ve birkaç ızgara dışı soruda) tablo değeri,
+get_simple_model_prediction / get_enhanced_model_prediction /
+combine_predictions ile birebir aynı olmalıdır.
+Gecikme: /answers/predict başına skaler hesap ile tablo okuması, 30 soruluk test
+için /answers/predict-batch (predict_many), /questions/batch adayları için skaler
+döngü ile combined_many, ve güncelleme başına tablo yenileme.
+Paylaşımlı depo (birden çok worker): tablo okuması başına çalışan SQLite
+sorguları sayılır; sürüm kontrolü kullanıcı başına version_ttl saniyede bir
+sorguya iner. Başka bir worker'ın güncellemesinin en geç version_ttl sonra
+görüldüğü de kontrol edilir.
+
+Kullanım (backend dizininden):
+    python benchmarks/bench_prediction_table.py
+"""
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.services.enhanced_ml_model import EnhancedPracticeModel
+from app.services.predictions import (
+    PredictionTables, get_simple_model_prediction, get_enhanced_model_prediction, combine_predictions
+)
+from app.services.simple_ai_model import SimpleAIModel
+from app.services.user_stats import CURRICULUM
+
+# Ağırlık eşikleri (10, 30) ve konu düzeltmesi (>5) etrafındaki geçmiş uzunlukları
+HISTORY_LENGTHS = [0, 1, 5, 9, 10, 11, 29, 30, 31, 60, 200, 1500]
+USERS_PER_LENGTH = 5
+BATCH_SIZE = 500
+TEST_SIZE = 30
+REPEAT = 2_000
+
+
+def scalar_predict(simple, enhanced, user_id, X):
+    simple_pred = get_simple_model_prediction(simple, user_id, X)
+    enhanced_pred = get_enhanced_model_prediction(enhanced, user_id, X)
+    return simple_pred, enhanced_pred, combine_predictions(simple, simple_pred, enhanced_pred, user_id, X)
+
+
+def question(rng, user_id, off_grid=False):
+    X = {
+        "ders_id": rng.randint(1, 6),
+        "konu_id": rng.randint(1, 3),
+        "altbaslik_id": rng.randint(1, 4),
+        "zorluk": rng.randint(1, 5),
+        "user_id": user_id,
+    }
+    if off_grid:
+        X["konu_id"] = rng.choice([4, 7])
+    return X
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    rng = random.Random(5)
+    devnull = open(os.devnull, "w")
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(devnull):
+        simple = SimpleAIModel(storage_dir=tmp, write_behind=False)
+        enhanced = EnhancedPracticeModel(storage_dir=tmp)
+        tables = PredictionTables(simple, enhanced)
+
+        user_ids = []
+        for length in HISTORY_LENGTHS:
+            for _ in range(USERS_PER_LENGTH):
+                user_id = len(user_ids) + 1
+                user_ids.append(user_id)
+                skill = rng.random()
+                # Bazı kullanıcılar tek bir konuya yoğunlaşır: konu düzeltmesi tetiklensin
+                focused = rng.random() < 0.5
+                for _ in range(length):
+                    X = question(rng, user_id, off_grid=rng.random() < 0.02)
+                    if focused:
+                        X["ders_id"], X["konu_id"] = 1, 1
+                    y = rng.random() < skill
+                    simple._update(X, y)
+                    enhanced.update_user_stats(user_id, X, y)
+                tables.refresh(user_id)
+
+        mismatches = 0
+        checked = 0
+        for user_id in user_ids + [10_000]:  # Son kullanıcı hiç cevap vermemiş
+            queries = [
+                {"ders_id": d, "konu_id": k, "altbaslik_id": 1, "zorluk": z, "user_id": user_id}
+                for d, k, z in CURRICULUM.cell_keys
+            ]
+            queries += [question(rng, user_id, off_grid=True) for _ in range(5)]
+            for X in queries:
+                checked += 1
+                mismatches += tables.predict(user_id, X) != scalar_predict(simple, enhanced, user_id, X)
+            mismatches += int((tables.predict_many(user_id, queries).T != [tables.predict(user_id, X) for X in queries]).any())
+        assert mismatches == 0, f"Tablo {mismatches} tahminde skaler formüllerden farklı ({checked} tahmin)"
+
+        user_id = user_ids[-1]
+        X = question(rng, user_id)
+        scalar_us = timed(lambda: scalar_predict(simple, enhanced, user_id, X), REPEAT)
+        table_us = timed(lambda: tables.predict(user_id, X), REPEAT)
+        refresh_us = timed(lambda: tables.refresh(user_id), REPEAT)
+
+        test = [question(rng, user_id) for _ in range(TEST_SIZE)]
+        test_scalar_us = timed(lambda: [scalar_predict(simple, enhanced, user_id, X) for X in test], 200)
+        test_single_us = timed(lambda: [tables.predict(user_id, X) for X in test], 200)
+        test_many_us = timed(lambda: tables.predict_many(user_id, test).T.tolist(), 2_000)
+
+        candidates = [question(rng, user_id) for _ in range(BATCH_SIZE)]
+        batch_scalar_ms = timed(lambda: [scalar_predict(simple, enhanced, user_id, X)[2] for X in candidates], 20) / 1000
+        batch_table_ms = timed(lambda: tables.combined_many(user_id, candidates), 200) / 1000
+
+        simple.shutdown()
+        enhanced.shutdown()
+
+        # Aynı depoyu paylaşan iki worker
+        shared_simple = SimpleAIModel(storage_dir=tmp, shared=True)
+        shared_enhanced = EnhancedPracticeModel(storage_dir=tmp, shared=True)
+        shared_tables = PredictionTables(shared_simple, shared_enhanced)
+        other_worker = SimpleAIModel(storage_dir=tmp, shared=True)
+        statements = []
+        for model in (shared_simple, shared_enhanced):
+            model.store._conn.set_trace_callback(statements.append)
+        shared_tables.predict(user_id, X)
+        statements.clear()
+        shared_table_us = timed(lambda: shared_tables.predict(user_id, X), REPEAT)
+        shared_queries = len(statements)
+        shared_elapsed = REPEAT * shared_table_us / 1e6
+        ttl = shared_simple.store.version_ttl
+
+        before = shared_tables.predict(user_id, X)
+        for _ in range(20):
+            other_worker._update(X, False)
+        time.sleep(ttl)
+        stale_rows = int(shared_tables.predict(user_id, X) == before)
+        assert stale_rows == 0, f"Başka worker'ın güncellemesi {ttl} sn sonra hâlâ görülmüyor"
+        for model in (shared_simple, shared_enhanced, other_worker):
+            model.shutdown()
+
+    print(f"Tutarlılık: {mismatches} uyumsuz / {checked} tahmin ({len(user_ids) + 1} kullanıcı)")
+    print(f"/answers/predict: skaler {scalar_us:.1f} µs, tablo {table_us:.2f} µs ({scalar_us / table_us:.0f}x)")
+    print(f"{TEST_SIZE} soruluk test: {TEST_SIZE} x skaler {test_scalar_us:.0f} µs, {TEST_SIZE} x tablo {test_single_us:.1f} µs, "
+          f"predict_many {test_many_us:.1f} µs")
+    print(f"Güncelleme başına tablo yenileme: {refresh_us:.1f} µs ({CURRICULUM.cell_count} hücre)")
+    print(f"/questions/batch {BATCH_SIZE} aday: skaler {batch_scalar_ms:.2f} ms, tablo {batch_table_ms:.3f} ms")
+    print(f"Paylaşımlı depo: tablo {shared_table_us:.2f} µs; {REPEAT} okumada {shared_queries} SQLite sorgusu "
+          f"({shared_elapsed:.3f} sn, sürüm kontrolü {ttl} sn'de bir)")
+    print(f"Başka worker'ın güncellemesi {ttl} sn sonra görülmeyen tahmin: {stale_rows}")
+
+
+if __name__ == "__main__":
+    main()
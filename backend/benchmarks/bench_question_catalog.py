@@ -0,0 +1,116 @@
+"""
+/questions/batch soru içeriği yolunu ölçer: veritabanı + ORM + json.loads ile bellekteki katalog.
+
+Geçici bir SQLite veritabanına gerçekçi uzunlukta metinlerle sorular yazar.
+Eski yol her istekte dersin tüm sorularını ORM nesnesi olarak okuyup
+seçilen 30 sorunun seçeneklerini json.loads ile çözer. Katalog yolu dersin
+aralığını bulur, soruları alır ve hazır yanıt sözlüklerini döndürür.
+Katalog yükleme süresi de raporlanır.
+
+Kullanım (backend dizininden):
+    python benchmarks/bench_question_catalog.py [soru_sayısı]
+"""
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+with contextlib.redirect_stdout(open(os.devnull, "w")):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base
+    from app.core.models import Questions
+    from app.services.question_catalog import QuestionCatalog
+
+NUM_QUESTIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+NUM_SUBJECTS = 6
+BATCH_SIZE = 30
+REPEATS = 50
+
+
+def build_database(session, rng):
+    words = ["denklem", "fonksiyon", "olasılık", "hücre", "tepkime", "kuvvet", "osmanlı", "paragraf", "grafik", "oran"]
+    rows = []
+    for soru_id in range(1, NUM_QUESTIONS + 1):
+        text = " ".join(rng.choice(words) for _ in range(60))
+        rows.append({
+            "soru_id": soru_id,
+            "ders_id": rng.randint(1, NUM_SUBJECTS),
+            "konu_id": rng.randint(1, 3),
+            "altbaslik_id": rng.randint(1, 4),
+            "soru_metin": text,
+            "secenekler": json.dumps({k: " ".join(rng.choice(words) for _ in range(6)) for k in "ABCDE"}, ensure_ascii=False),
+            "dogru_cevap": rng.choice("ABCDE"),
+            "dogru_cevap_aciklamasi": " ".join(rng.choice(words) for _ in range(40)),
+            "zorluk": rng.randint(1, 5),
+            "etiket": ", ".join(rng.sample(["tyt", "ayt", "temel", "ileri"], 2)),
+        })
+    session.bulk_insert_mappings(Questions, rows)
+    session.commit()
+
+
+def old_path(session, ders_id, rng):
+    questions = session.query(Questions).filter(Questions.ders_id == ders_id).all()
+    selected = rng.sample(questions, BATCH_SIZE)
+    for q in selected:
+        q.secenekler = json.loads(q.secenekler) if q.secenekler else {}
+    return selected
+
+
+def catalog_path(catalog, ders_id, rng):
+    questions = catalog.take(catalog.positions(ders_id))
+    return [q.payload for q in rng.sample(questions, BATCH_SIZE)]
+
+
+def timed(fn, *args):
+    samples = []
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000
+
+
+def main():
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as workdir:
+        engine = create_engine(f"sqlite:///{os.path.join(workdir, 'database.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(bind=engine)
+        session = Session()
+        build_database(session, rng)
+
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            catalog = QuestionCatalog.load(session)
+        load_ms = (time.perf_counter() - t0) * 1000
+
+        # Her istek kendi oturumunu açar; kimlik haritası ısınmış olmasın
+        def old_request():
+            s = Session()
+            try:
+                old_path(s, 1, rng)
+            finally:
+                s.close()
+
+        old_ms = timed(old_request)
+        catalog_ms = timed(catalog_path, catalog, 1, rng)
+        session.close()
+        engine.dispose()
+
+    print(f"{NUM_QUESTIONS:,} soru, {NUM_SUBJECTS} ders (ders başına ~{NUM_QUESTIONS // NUM_SUBJECTS:,}), {BATCH_SIZE} soru seçimi")
+    print(f"Katalog yükleme: {load_ms:.0f} ms (sunucu başlangıcında ve soru tablosu değişince)")
+    print(f"Veritabanı + ORM + json.loads: {old_ms:8.2f} ms / istek")
+    print(f"Katalog:                       {catalog_ms:8.3f} ms / istek ({old_ms / catalog_ms:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
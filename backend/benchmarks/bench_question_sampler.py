@@ -0,0 +1,117 @@
+"""
+30 soruluk test seçimini ölçer: eski liste tabanlı seçim ile app.services.question_sampler.
+
+Eski yol /questions/batch'teki gibi zorluk havuzlarını ve kalan soruları
+tamamen karıştırır, `q not in selected_questions` ile listede arar ve
+deneyimli kullanıcıda tüm adayları skora göre sıralar. Örnekleyici aynı
+kuralları doğrusal zamanda uygular. Her iki kullanıcı türü için süre,
+seçim dağılımı ve aynı tohumla tekrarlanabilirlik raporlanır. Zayıf
+soruların konumları (eşit skorlar dahil) eski kararlı sıralamayla
+karşılaştırılır.
+
+Kullanım (backend dizininden):
+    python benchmarks/bench_question_sampler.py [aday_sayısı]
+"""
+import os
+import random
+import sys
+import time
+from random import shuffle
+
+import numpy as np
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.services.question_sampler import select_test, weakest, DIFFICULTY_STRATA, TEST_SIZE, WEAK_SHARE
+
+NUM_CANDIDATES = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+REPEATS = 200
+
+
+class Candidate:
+    __slots__ = ("soru_id", "zorluk")
+
+    def __init__(self, soru_id, zorluk):
+        self.soru_id = soru_id
+        self.zorluk = zorluk
+
+
+def old_selection(qs, scores, experienced):
+    scored = list(zip(qs, scores))
+    selected_questions = []
+    if not experienced:
+        easy_questions = [q for q, _ in scored if q.zorluk <= 2]
+        medium_questions = [q for q, _ in scored if 3 <= q.zorluk <= 4]
+        hard_questions = [q for q, _ in scored if q.zorluk >= 5]
+        shuffle(easy_questions)
+        shuffle(medium_questions)
+        shuffle(hard_questions)
+        selected_questions.extend(easy_questions[:10])
+        selected_questions.extend(medium_questions[:10])
+        selected_questions.extend(hard_questions[:10])
+        remaining = [q for q, _ in scored if q not in selected_questions]
+        shuffle(remaining)
+        selected_questions.extend(remaining[:TEST_SIZE - len(selected_questions)])
+    else:
+        scored.sort(key=lambda x: x[1])
+        weak_questions_count = int(TEST_SIZE * WEAK_SHARE)
+        selected_questions.extend(q for q, _ in scored[:weak_questions_count])
+        remaining_questions = [q for q, _ in scored[weak_questions_count:]]
+        shuffle(remaining_questions)
+        selected_questions.extend(remaining_questions[:TEST_SIZE - len(selected_questions)])
+    return selected_questions
+
+
+def new_selection(qs, zorluk, scores, experienced, rng):
+    return [qs[i] for i in select_test(zorluk, scores, experienced, rng=rng)]
+
+
+def timed(fn, *args, repeats=REPEATS):
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return samples[len(samples) // 2] * 1e6
+
+
+def main():
+    rng = np.random.default_rng(20)
+    zorluk = rng.integers(1, 6, NUM_CANDIDATES)
+    scores = np.round(rng.random(NUM_CANDIDATES), 2)
+    qs = [Candidate(i, int(z)) for i, z in enumerate(zorluk.tolist())]
+    score_list = scores.tolist()
+
+    print(f"{NUM_CANDIDATES:,} aday, {TEST_SIZE} soruluk test (medyan süre)")
+    for experienced, name in ((False, "yeni kullanıcı"), (True, "deneyimli")):
+        old_us = timed(old_selection, qs, score_list, experienced, repeats=5)
+        new_us = timed(new_selection, qs, zorluk, scores, experienced, random.Random(1))
+        selected = new_selection(qs, zorluk, scores, experienced, random.Random(7))
+        again = new_selection(qs, zorluk, scores, experienced, random.Random(7))
+        levels = [sum(1 for q in selected if (low is None or q.zorluk >= low) and (high is None or q.zorluk <= high))
+                  for low, high in DIFFICULTY_STRATA]
+        old_selected = old_selection(qs, score_list, experienced)
+        weak = int(TEST_SIZE * WEAK_SHARE)
+        same_weak = [q.soru_id for q in old_selected[:weak]] == [q.soru_id for q in selected[:weak]]
+        print(f"{name:>15}: eski {old_us / 1000:9.2f} ms, örnekleyici {new_us:8.1f} µs ({old_us / new_us:.0f}x)")
+        print(f"{'':>15}  farklı soru {len({q.soru_id for q in selected})}, kolay/orta/zor {levels}, "
+              f"aynı tohum aynı test: {selected == again}"
+              + (f", zayıf {weak} soru eskiyle aynı: {same_weak}" if experienced else ""))
+
+    # Skorlar az sayıda hücreden gelir: çok sayıda eşit skor
+    tie_cases = {
+        "hepsi eşit": np.zeros(NUM_CANDIDATES),
+        "onluk bloklar": np.repeat(rng.random(NUM_CANDIDATES // 10), 10),
+        "90 hücre": rng.integers(0, 90, NUM_CANDIDATES) / 90,
+    }
+    for name, tied in tie_cases.items():
+        for k in (1, 21, 30, 1000):
+            assert weakest(tied, k) == np.argsort(tied, kind="stable")[:k].tolist(), (name, k)
+    print(f"Eşit skorlarda zayıf seçim kararlı sıralamayla aynı: {', '.join(tie_cases)}")
+
+
+if __name__ == "__main__":
+    main()
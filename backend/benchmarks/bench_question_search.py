@@ -0,0 +1,144 @@
+"""
+/questions/search tam metin aramasını ölçer (SQLite FTS5).
+
+Geçici bir SQLite veritabanına Zipf dağılımlı bir sözlükten (bağlaçlar,
+konu kelimeleri, uydurma kelimeler) sentetik sorular yazılır; arama
+tablosu rebuild_question_search ile kurulur. Yaygın, nadir,
+çok kelimeli, önekli ve büyük harfli sorgular için ilk sayfa ve derin
+sayfa süresi (sayım, bm25 sıralaması ve özetler dahil) raporlanır.
+Karşılaştırma için iki eski yol ölçülür. Birincisi tüm soruları okuyup
+metinde aramaktır. İkincisi sınırsız FTS5'tir: ayrı COUNT(*) ve tüm
+eşleşmelerin bm25 sıralaması. Sınırlı aramanın ilk sayfası sınırsız
+sıralamanın ilk sayfasıyla aynı olmalıdır (en iyi skorlar sınırda kesilmez).
+
+Kullanım (backend dizininden):
+    python benchmarks/bench_question_search.py [soru_sayısı]
+"""
+import contextlib
+import itertools
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+with contextlib.redirect_stdout(open(os.devnull, "w")):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.core.database import Base
+    from app.core.models import Questions
+    from app.services.question_catalog import QuestionCatalog
+    from sqlalchemy import text
+    from app.services.question_search import (
+        RANK_WEIGHTS, SEARCH_TABLE, parse_search_query, rebuild_question_search, search_questions
+    )
+
+NUM_QUESTIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+NUM_SUBJECTS = 6
+REPEATS = 20
+WORDS = ("denklem fonksiyon olasılık hücre tepkime kuvvet paragraf grafik oran ışık hız ivme enerji "
+         "türev integral limit çember üçgen açı alan hacim kümeler mantık sayılar bölünebilme asal "
+         "çarpan kök üslü mutlak değer eşitsizlik polinom logaritma dizi seri permütasyon kombinasyon "
+         "istatistik ortalama medyan elektrik manyetizma dalga optik mercek ayna atom molekül iyon "
+         "asit baz tuz çözelti karbon organik enzim protein gen kromozom mitoz mayoz ekosistem "
+         "osmanlı cumhuriyet inkılap anlam cümle sözcük yazım noktalama şiir roman hikaye").split()
+
+
+def vocabulary(rng):
+    """Zipf sıralı sözlük: en başta bağlaçlar, sonra konu kelimeleri, sonra uydurma kelimeler"""
+    syllables = "ba be bi bo bu ka ke ki ko ku la le li lo lu ma me mi mo mu ra re ri ro ru sa se si so su ta te ti to tu".split()
+    filler = sorted({"".join(rng.choices(syllables, k=rng.randint(2, 4))) for _ in range(25_000)} - set(WORDS))
+    rng.shuffle(filler)
+    return ["ve", "bir", "bu", "ile", "hangisi", "aşağıdakilerden", "için", "olan"] + WORDS + filler
+
+
+def build_database(path, rng):
+    # Kelime sıklığı Zipf dağılımı (sıra r → 1/r): gerçek metindeki gibi az sayıda çok yaygın kelime
+    words = vocabulary(rng)
+    cum_weights = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(words))))
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    rows = []
+    for soru_id in range(1, NUM_QUESTIONS + 1):
+        rows.append({
+            "soru_id": soru_id, "ders_id": rng.randint(1, NUM_SUBJECTS), "konu_id": 1, "altbaslik_id": 1,
+            "soru_metin": " ".join(rng.choices(words, cum_weights=cum_weights, k=60)).capitalize() + "?",
+            "secenekler": "{}", "dogru_cevap": "A",
+            "dogru_cevap_aciklamasi": " ".join(rng.choices(words, cum_weights=cum_weights, k=40)),
+            "zorluk": rng.randint(1, 5), "etiket": ", ".join(rng.sample(["TYT", "AYT", "KPSS", "ALES"], 2)),
+        })
+    session.bulk_insert_mappings(Questions, rows)
+    session.commit()
+    return engine, session
+
+
+def old_scan(path, query):
+    conn = sqlite3.connect(path)
+    try:
+        query = query.lower()
+        return [row[0] for row in conn.execute("SELECT soru_id, soru_metin FROM questions") if query in row[1].lower()]
+    finally:
+        conn.close()
+
+
+def unbounded_fts(session, query):
+    """Sınırsız FTS5: her eşleşme sayılır ve bm25 ile sıralanır (ilk sayfa)"""
+    match = parse_search_query(query)[0]
+    total = session.execute(text(f"SELECT COUNT(*) FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :m"), {"m": match}).scalar()
+    rows = session.execute(
+        text(f"SELECT rowid, bm25({SEARCH_TABLE}, {', '.join(map(str, RANK_WEIGHTS))}) AS score FROM {SEARCH_TABLE} "
+             f"WHERE {SEARCH_TABLE} MATCH :m ORDER BY score LIMIT 20"), {"m": match}
+    ).fetchall()
+    return total, rows
+
+
+def timed(fn, *args, repeats=REPEATS):
+    samples = []
+    result = None
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000, result
+
+
+def main():
+    rng = random.Random(22)
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "database.db")
+        engine, session = build_database(path, rng)
+        t0 = time.perf_counter()
+        rebuild_question_search(path)
+        build_s = time.perf_counter() - t0
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            catalog = QuestionCatalog.load(session)
+
+        print(f"{NUM_QUESTIONS:,} soru; arama dizini kurma {build_s:.1f} sn, veritabanı {os.path.getsize(path) / 2**20:.0f} MB")
+        scan_ms, _ = timed(old_scan, path, "mitoz", repeats=3)
+        print(f"Karşılaştırma: tüm soru metinlerini okuyup aramak {scan_ms:.0f} ms")
+        print(f"{'sorgu':>31} | {'eşleşme':>7} | {'toplam':>7} | {'sınırsız ms':>11} | {'1. sayfa ms':>11} | {'50. sayfa ms':>12} | {'ders 1 ms':>9}")
+        queries = ("denklem", "ŞİİR", "mitoz mayoz", "çember üçgen alan", "türe", "osmanlı cumhuriyet",
+                   "kpss hikaye", "aşağıdakilerden hangisi denklem", "hangisi")
+        for query in queries:
+            unbounded_ms, (matched, best) = timed(unbounded_fts, session, query, repeats=5)
+            first_ms, result = timed(search_questions, session, catalog, query, None, 1, 20)
+            assert [row["skor"] for row in result["sonuclar"]] == [round(-score, 4) for _, score in best], query
+            deep_ms, _ = timed(search_questions, session, catalog, query, None, 50, 20)
+            subject_ms, _ = timed(search_questions, session, catalog, query, 1, 1, 20)
+            total = f"{result['toplam']}{'' if result['toplam_kesin'] else '+'}"
+            print(f"{query:>31} | {matched:7d} | {total:>7} | {unbounded_ms:11.2f} | {first_ms:11.2f} | {deep_ms:12.2f} | {subject_ms:9.2f}")
+        example = search_questions(session, catalog, "mitoz", None, 1, 1)["sonuclar"][0]
+        print(f"Örnek özet: {example['ozet']}")
+        session.close()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Replay motorunun hızını ve doğruluğunu ölçer.
+
+Geçici bir SQLite veritabanına sentetik cevaplar yazar, app.services.replay ile
+istatistikleri yeniden oluşturur ve örnek kullanıcıları satır satır
+UserStats.record / LearningCurve.append ile hesaplanan sonuçla karşılaştırır.
+
+Kullanım (backend dizininden):
+    python benchmarks/bench_replay.py [cevap_sayısı]
+"""
+import os
+import sys
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.services.learning_curve import LearningCurve
+from app.services.replay import replay_submissions, RECENT_PERFORMANCE_SIZE, TURKEY_TZ
+from app.services.user_stats import UserStats
+
+NUM_SUBMISSIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+NUM_USERS = 20_000
+NUM_QUESTIONS = 400
+CHECK_USERS = 300
+START = datetime(2025, 1, 1)
+SPAN_SECONDS = 180 * 24 * 3600
+
+
+def build_database(path, rng):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE questions (soru_id INTEGER PRIMARY KEY, ders_id INTEGER, konu_id INTEGER, zorluk INTEGER)")
+    conn.execute(
+        "CREATE TABLE submissions (id INTEGER PRIMARY KEY, user_id INTEGER, question_id INTEGER, "
+        "is_correct BOOLEAN, is_skipped BOOLEAN, answered_at DATETIME)"
+    )
+    questions = []
+    for soru_id in range(1, NUM_QUESTIONS + 1):
+        ders_id = int(rng.integers(1, 7))
+        # Gerçek veride olduğu gibi birkaç sorunun konusu yok
+        konu_id = None if soru_id % 97 == 0 else int(rng.integers(1, 4))
+        questions.append((soru_id, ders_id, konu_id, int(rng.integers(1, 6))))
+    conn.executemany("INSERT INTO questions VALUES (?, ?, ?, ?)", questions)
+
+    offsets = np.sort(rng.integers(0, SPAN_SECONDS, NUM_SUBMISSIONS))
+    user_ids = rng.integers(1, NUM_USERS + 1, NUM_SUBMISSIONS)
+    question_ids = rng.integers(1, NUM_QUESTIONS + 1, NUM_SUBMISSIONS)
+    is_correct = rng.random(NUM_SUBMISSIONS) < 0.6
+    # Bazı cevaplar boş bırakılmış, bazılarının sonucu yok: replay bunları atlamalı
+    outcome = rng.random(NUM_SUBMISSIONS)
+    rows = (
+        (int(u), int(q), None if r < 0.01 else int(c), int(r > 0.97),
+         (START + timedelta(seconds=int(o))).strftime("%Y-%m-%d %H:%M:%S.%f"))
+        for u, q, c, r, o in zip(user_ids, question_ids, is_correct, outcome, offsets)
+    )
+    conn.executemany(
+        "INSERT INTO submissions (user_id, question_id, is_correct, is_skipped, answered_at) VALUES (?, ?, ?, ?, ?)", rows
+    )
+    conn.commit()
+    conn.close()
+    return {soru_id: (ders_id, konu_id, zorluk) for soru_id, ders_id, konu_id, zorluk in questions}
+
+
+def sequential_reference(path, questions, user_ids):
+    """update() ile aynı sırada, satır satır hesaplanan referans"""
+    conn = sqlite3.connect(path)
+    reference = {user_id: UserStats(learning_curve=LearningCurve()) for user_id in user_ids}
+    placeholders = ",".join("?" * len(user_ids))
+    for user_id, question_id, is_correct, answered_at in conn.execute(
+        f"SELECT user_id, question_id, is_correct, answered_at FROM submissions WHERE user_id IN ({placeholders}) "
+        "AND is_correct IS NOT NULL AND is_skipped = 0 ORDER BY id",
+        list(user_ids)
+    ):
+        user_data = reference[user_id]
+        ders_id, konu_id, zorluk = questions[question_id]
+        user_data.record(ders_id, konu_id, zorluk, is_correct)
+        user_data.recent_performance.append(is_correct)
+        if len(user_data.recent_performance) > RECENT_PERFORMANCE_SIZE:
+            user_data.recent_performance.pop(0)
+        # answered_at Türkiye saatiyle saklanıyor
+        ts = datetime.strptime(answered_at, "%Y-%m-%d %H:%M:%S.%f").replace(tzinfo=TURKEY_TZ).timestamp()
+        user_data.learning_curve.append(ts, user_data.correct_answers / user_data.total_questions)
+    conn.close()
+    return reference
+
+
+def decayed_extra(user_data):
+    return {
+        key: (total / user_data.scale, correct / user_data.scale)
+        for key, (total, correct) in (user_data.extra or {}).items()
+    }
+
+
+def counters_match(a, b):
+    """Sönümlü sayaçlar: replay üstel ağırlıkları doğrudan, record() ise scale ile hesaplar"""
+    if not np.allclose(a.decayed_counts(), b.decayed_counts(), rtol=1e-9, atol=1e-12):
+        return False
+    if not np.isclose(a.effective_questions(), b.effective_questions(), rtol=1e-9):
+        return False
+    if not np.isclose(a.overall_accuracy(), b.overall_accuracy(), rtol=1e-9):
+        return False
+    extra_a, extra_b = decayed_extra(a), decayed_extra(b)
+    return extra_a.keys() == extra_b.keys() and all(
+        np.allclose(extra_a[key], extra_b[key], rtol=1e-9) for key in extra_a
+    )
+
+
+def curves_match(a, b):
+    for resolution in ("recent", "hourly", "daily", "weekly"):
+        pa, pb = a.points(resolution), b.points(resolution)
+        if len(pa) != len(pb):
+            return False
+        for x, y in zip(pa, pb):
+            if abs(x['accuracy'] - y['accuracy']) > 1e-9 or x.get('count') != y.get('count'):
+                return False
+            # SQLite tarih fonksiyonları milisaniye hassasiyetinde
+            if abs((x['timestamp'] - y['timestamp']).total_seconds()) > 0.001:
+                return False
+    return True
+
+
+def main():
+    rng = np.random.default_rng(7)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "replay.db")
+        t0 = time.perf_counter()
+        questions = build_database(path, rng)
+        print(f"Veritabanı hazır: {NUM_SUBMISSIONS:,} cevap, {NUM_USERS:,} kullanıcı ({time.perf_counter() - t0:.1f} sn)")
+
+        t0 = time.perf_counter()
+        accumulator = replay_submissions(path)
+        replay_seconds = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        rebuilt = accumulator.build(learning_curve=True)
+        build_seconds = time.perf_counter() - t0
+        print(f"Replay: {accumulator.rows_processed:,} cevap (boş ve sonuçsuz olanlar atlandı), {replay_seconds:.2f} sn "
+              f"({accumulator.rows_processed / replay_seconds * 60:,.0f} cevap/dk), "
+              f"UserStats oluşturma: {build_seconds:.2f} sn")
+
+        check_ids = list(range(1, CHECK_USERS + 1))
+        t0 = time.perf_counter()
+        reference = sequential_reference(path, questions, check_ids)
+        sequential_seconds = time.perf_counter() - t0
+        checked_rows = sum(user_data.total_questions for user_data in reference.values())
+        print(f"Satır satır referans: {checked_rows / sequential_seconds * 60:,.0f} cevap/dk")
+
+        mismatches = 0
+        for user_id in check_ids:
+            expected, actual = reference[user_id], rebuilt.get(user_id)
+            if actual is None:
+                mismatches += expected.total_questions > 0
+                continue
+            same = (
+                expected.total_questions == actual.total_questions
+                and expected.correct_answers == actual.correct_answers
+                and counters_match(expected, actual)
+                and expected.recent_performance == actual.recent_performance
+                and curves_match(expected.learning_curve, actual.learning_curve)
+            )
+            mismatches += not same
+        print(f"Uyumsuz kullanıcı: {mismatches} / {CHECK_USERS}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+EnhancedPracticeModel.update_user_stats gecikmesini farklı kullanıcı sayılarında ölçer.
+
+Kullanım (backend dizininden):
+    python benchmarks/bench_submit_latency.py
+"""
+import os
+import sys
+import pickle
+import random
+import tempfile
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.services.enhanced_ml_model import EnhancedPracticeModel
+
+USER_COUNTS = [1_000, 10_000, 100_000]
+SUBMITS = 200
+
+
+def make_user(model, rng):
+    user_data = model._create_user_data()
+    for _ in range(30):
+        user_data.record(rng.randint(1, 6), rng.randint(1, 3), rng.randint(1, 5), rng.random() < 0.6)
+    return user_data
+
+
+def run(num_users):
+    rng = random.Random(42)
+    with tempfile.TemporaryDirectory() as tmp:
+        model = EnhancedPracticeModel(storage_dir=tmp)
+        template = make_user(model, rng)
+        model.store.save_many((user_id, template) for user_id in range(1, num_users + 1))
+        model = EnhancedPracticeModel(storage_dir=tmp)
+
+        timings = []
+        for _ in range(SUBMITS):
+            user_id = rng.randint(1, num_users)
+            X = {"ders_id": rng.randint(1, 6), "konu_id": rng.randint(1, 3), "altbaslik_id": 1,
+                 "zorluk": rng.randint(1, 5), "user_id": user_id}
+            start = time.perf_counter()
+            model.update(X, rng.random() < 0.6)
+            timings.append(time.perf_counter() - start)
+
+        # Eski davranış: her cevapta tüm kullanıcıları pickle'la
+        legacy_stats = model.store.load_all()
+        legacy_path = os.path.join(tmp, "legacy.pkl")
+        start = time.perf_counter()
+        with open(legacy_path, "wb") as f:
+            pickle.dump(legacy_stats, f)
+        legacy = time.perf_counter() - start
+        model.store.close()
+
+    timings.sort()
+    return timings[len(timings) // 2], timings[int(len(timings) * 0.95)], legacy
+
+
+if __name__ == "__main__":
+    print(f"{'kullanıcı':>10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'eski tam pickle (ms)':>22}")
+    for num_users in USER_COUNTS:
+        p50, p95, legacy = run(num_users)
+        print(f"{num_users:>10} {p50 * 1000:>10.3f} {p95 * 1000:>10.3f} {legacy * 1000:>22.1f}")
@@ -0,0 +1,85 @@
+"""
+Etiket filtresini ölçer: dersin sorularında alt dizgi taraması ile ters indeks.
+
+Bellekte sentetik sorularla bir soru kataloğu kurulur (veritabanı yok).
+Eski yol dersin her sorusunun küçük harfli etiket metninde
+`etiket in q.etiket` arar. Ters indeks etiket listesini bulur ve dersin
+aralığını ikili aramayla keser. Tek etiket, VE ve VEYA sorguları, sonuç
+doğruluğu ve indeks kurma süresi raporlanır.
+
+Kullanım (backend dizininden):
+    python benchmarks/bench_tag_index.py [soru_sayısı]
+"""
+import contextlib
+import os
+import random
+import sys
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+with contextlib.redirect_stdout(open(os.devnull, "w")):
+    from app.services.question_catalog import QuestionCatalog
+    from app.services.question_tags import TagIndex
+
+NUM_QUESTIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+NUM_SUBJECTS = 6
+TAGS = ["TYT", "AYT", "ALES", "DGS", "KPSS", "Geometri", "Olasılık", "Fonksiyonlar", "Türev", "İntegral",
+        "Problemler", "Sayılar", "Çıkmış Soru", "Yeni Nesil", "Deneme", "Grafik", "Mantık", "Kümeler"]
+REPEATS = 200
+
+
+def build_rows(rng):
+    weights = [1.0 / (rank + 1) for rank in range(len(TAGS))]
+    rows = []
+    for soru_id in range(1, NUM_QUESTIONS + 1):
+        tags = set(rng.choices(TAGS, weights, k=rng.randint(1, 4)))
+        rows.append({
+            "soru_id": soru_id, "ders_id": rng.randint(1, NUM_SUBJECTS), "konu_id": 1, "altbaslik_id": 1,
+            "soru_metin": "", "secenekler": "{}", "dogru_cevap": "A", "dogru_cevap_aciklamasi": "",
+            "zorluk": rng.randint(1, 5), "etiket": ", ".join(sorted(tags)),
+        })
+    return rows
+
+
+def old_filter(catalog, etiket_strings, ders_id, etiket):
+    start, end = catalog.subject_range(ders_id)
+    etiket = etiket.lower()
+    return [i for i in range(start, end) if etiket in etiket_strings[i]]
+
+
+def timed(fn, *args):
+    samples = []
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return samples[len(samples) // 2] * 1e6
+
+
+def main():
+    rows = build_rows(random.Random(21))
+    catalog = QuestionCatalog(rows)
+    etiket_strings = [q.payload["etiket"].lower() for q in catalog.questions]
+
+    t0 = time.perf_counter()
+    TagIndex(q.tags for q in catalog.questions)
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    print(f"{NUM_QUESTIONS:,} soru, {NUM_SUBJECTS} ders, {len(catalog.tags)} etiket; indeks kurma {build_ms:.0f} ms")
+    print(f"{'sorgu':>24} | {'sonuç':>6} | {'tarama µs':>10} | {'indeks µs':>10}")
+    for query in ("tyt", "çıkmış soru", "kümeler", "tyt,geometri", "tyt,geometri,türev", "kpss|dgs", "ayt,türev|tyt,integral"):
+        index_us = timed(catalog.positions, 1, query)
+        result = catalog.positions(1, query).tolist()
+        scan = f"{timed(old_filter, catalog, etiket_strings, 1, query):10.1f}" if "," not in query and "|" not in query else f"{'-':>10}"
+        if scan.strip() != "-":
+            assert result == old_filter(catalog, etiket_strings, 1, query)
+        print(f"{query:>24} | {len(result):6d} | {scan} | {index_us:10.1f}")
+    print("Tek etiket sonuçları tarama ile aynı (VE/VEYA taramada yoktu)")
+
+
+if __name__ == "__main__":
+    main()
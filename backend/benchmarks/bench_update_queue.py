@@ -0,0 +1,136 @@
+"""
+/answers/submit yolundaki model güncellemesini ölçer: senkron uygulama ile
+ModelUpdateQueue üzerinden asenkron uygulama.
+
+Aynı cevap akışı iki ayrı ModelRegistry'ye verilir; istek başına süre,
+kuyruk metrikleri (birleştirilen parti boyutu, gecikme, geri basınç) ve
+sonunda iki taraftaki kullanıcı istatistiklerinin aynı olduğu raporlanır.
+Ayrıca her cevaptan hemen sonra tahmin tablosunun o cevabı gördüğü
+(read-your-writes) kontrol edilir.
+
+Kullanım (backend dizininden):
+    python benchmarks/bench_update_queue.py [cevap_sayısı]
+"""
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.services.model_registry import ModelRegistry
+
+NUM_ANSWERS = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+NUM_USERS = 50
+CLIENT_THREADS = 8
+MAX_PENDING = 1_000
+
+
+def answers_stream(rng):
+    stream = []
+    for _ in range(NUM_ANSWERS):
+        user_id = rng.randint(1, NUM_USERS)
+        X = {
+            "ders_id": rng.randint(1, 6),
+            "konu_id": rng.randint(1, 3),
+            "altbaslik_id": 1,
+            "zorluk": rng.randint(1, 5),
+            "user_id": user_id,
+        }
+        stream.append((X, rng.random() < 0.6))
+    return stream
+
+
+def submit_all(registry, stream):
+    """Kullanıcıları istemci iş parçacıklarına dağıt; kullanıcı başına sıra korunur"""
+    latencies = []
+    lock = threading.Lock()
+
+    def client(index):
+        local = []
+        for X, y in stream:
+            if X["user_id"] % CLIENT_THREADS != index:
+                continue
+            t0 = time.perf_counter()
+            registry.record_answer(X, y)
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(CLIENT_THREADS)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - started
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000
+
+
+def check_read_your_writes(registry, rng):
+    """Her cevaptan hemen sonra tahmin tablosu o cevabı içermeli"""
+    user_id = NUM_USERS + 1
+    stale = 0
+    for i in range(200):
+        X = {"ders_id": 1, "konu_id": 1, "altbaslik_id": 1, "zorluk": 3, "user_id": user_id}
+        registry.record_answer(X, rng.random() < 0.5)
+        registry.wait_for_updates(user_id)
+        expected = registry.predictions.compute(user_id)
+        stale += not (registry.predictions.table(user_id) == expected).all()
+        stale += registry.simple._peek_user(user_id).total_questions != i + 1
+    return stale
+
+
+def main():
+    stream = answers_stream(random.Random(3))
+    devnull = open(os.devnull, "w")
+    with tempfile.TemporaryDirectory() as sync_dir, tempfile.TemporaryDirectory() as async_dir, \
+            contextlib.redirect_stdout(devnull):
+        sync_registry = ModelRegistry(storage_dir=sync_dir, async_updates=False)
+        async_registry = ModelRegistry(storage_dir=async_dir, max_pending_updates=MAX_PENDING)
+
+        sync_latencies, sync_seconds = submit_all(sync_registry, stream)
+        async_latencies, async_seconds = submit_all(async_registry, stream)
+        t0 = time.perf_counter()
+        for user_id in range(1, NUM_USERS + 1):
+            async_registry.wait_for_updates(user_id)
+        drain_seconds = time.perf_counter() - t0
+        metrics = async_registry.get_update_metrics()
+
+        mismatched = 0
+        for user_id in range(1, NUM_USERS + 1):
+            a = sync_registry.enhanced._peek_user(user_id)
+            b = async_registry.enhanced._peek_user(user_id)
+            mismatched += (
+                a.total_questions != b.total_questions
+                or a.counts != b.counts
+                or a.recent_performance != b.recent_performance
+                or (sync_registry.predictions.table(user_id) != async_registry.predictions.table(user_id)).any()
+            )
+
+        stale = check_read_your_writes(async_registry, random.Random(9))
+        sync_registry.shutdown()
+        async_registry.shutdown()
+
+    print(f"{NUM_ANSWERS:,} cevap, {NUM_USERS} kullanıcı, {CLIENT_THREADS} istemci iş parçacığı")
+    print(f"{'':>8} | {'p50 ms':>8} | {'p99 ms':>8} | {'toplam sn':>9}")
+    print(f"{'senkron':>8} | {percentile(sync_latencies, 0.5):8.3f} | {percentile(sync_latencies, 0.99):8.3f} | {sync_seconds:9.2f}")
+    print(f"{'kuyruk':>8} | {percentile(async_latencies, 0.5):8.3f} | {percentile(async_latencies, 0.99):8.3f} | "
+          f"{async_seconds:9.2f} (+{drain_seconds:.2f} sn boşaltma)")
+    print(f"Kuyruk: ort. parti {metrics['avg_batch_size']}, en derin {metrics['max_depth']}, "
+          f"en yüksek gecikme {metrics['max_apply_lag_ms']} ms, bekleyen {metrics['blocked']}, caller-runs {metrics['caller_runs']}")
+    print(f"Senkron/kuyruk sonuç farkı olan kullanıcı: {mismatched} / {NUM_USERS}")
+    print(f"Read-your-writes ihlali: {stale}")
+
+
+if __name__ == "__main__":
+    main()
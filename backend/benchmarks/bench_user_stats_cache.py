@@ -0,0 +1,98 @@
+"""
+Tembel (LRU) kullanıcı yüklemesinin bellek etkisini ölçer: kayıtlı kullanıcı
+sayısı artarken sadece aktif kullanıcılar bellekte tutulmalı.
+
+Her senaryoda depoya N kayıtlı kullanıcı yazılır, ardından model açılıp
+ACTIVE_USERS kullanıcı için tahmin + güncelleme yapılır. Eski davranış
+(tüm kullanıcıları açılışta yüklemek) load_all ile karşılaştırılır.
+
+Kullanım (backend dizininden):
+    python benchmarks/bench_user_stats_cache.py
+"""
+import os
+import sys
+import random
+import tempfile
+import time
+import tracemalloc
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.services.simple_ai_model import SimpleAIModel
+
+REGISTERED_USERS = [10_000, 100_000]
+ACTIVE_USERS = 1_000
+# Aktif kullanıcıdan küçük: kirli kayıtların LRU dışına çıkıp sonradan yazılması da denenir
+CACHE_SIZE = 500
+
+
+def make_user(model, rng):
+    user_data = model._create_user_data()
+    for _ in range(50):
+        user_data.record(rng.randint(1, 6), rng.randint(1, 3), rng.randint(1, 5), rng.random() < 0.6)
+    return user_data
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def run(num_users):
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        model = SimpleAIModel(storage_dir=tmp, write_behind=False)
+        template = make_user(model, rng)
+        model.store.save_many((user_id, template) for user_id in range(1, num_users + 1))
+        model.shutdown()
+
+        active = rng.sample(range(1, num_users + 1), ACTIVE_USERS)
+
+        def eager():
+            model = SimpleAIModel(storage_dir=tmp, write_behind=False, cache_size=CACHE_SIZE)
+            return model, model.store.load_all()
+
+        (eager_model, everything), eager_bytes, eager_seconds = measure(eager)
+        eager_model.shutdown()
+        del everything
+
+        def lazy():
+            model = SimpleAIModel(storage_dir=tmp, write_behind=True, cache_size=CACHE_SIZE)
+            for user_id in active:
+                X = {"ders_id": rng.randint(1, 6), "konu_id": rng.randint(1, 3), "zorluk": rng.randint(1, 5), "user_id": user_id}
+                model.predict(X)
+                model.update(X, rng.random() < 0.6)
+            return model
+
+        lazy_model, lazy_bytes, lazy_seconds = measure(lazy)
+        metrics = lazy_model.get_persistence_metrics()["cache"]
+        lazy_model.shutdown()
+
+        # Yazılan güncellemeler depodan geri okunabilmeli
+        check = SimpleAIModel(storage_dir=tmp, write_behind=False)
+        updated = sum(1 for user_id in active if check.user_stats.get(user_id).total_questions == 51)
+        check.shutdown()
+
+    return eager_bytes, eager_seconds, lazy_bytes, lazy_seconds, metrics, updated
+
+
+if __name__ == "__main__":
+    # predict/update DEBUG çıktısını gizle
+    devnull = open(os.devnull, "w")
+    print(f"{'kayıtlı':>9} | {'hepsini yükle':>14} | {'tembel + 1k aktif':>18} | {'bellekteki':>10} | {'güncellenen':>11}")
+    for num_users in REGISTERED_USERS:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            eager_bytes, eager_seconds, lazy_bytes, lazy_seconds, metrics, updated = run(num_users)
+        finally:
+            sys.stdout = stdout
+        print(f"{num_users:>9,} | {eager_bytes / 1e6:>8.1f} MB {eager_seconds:>4.1f}s | "
+              f"{lazy_bytes / 1e6:>11.1f} MB {lazy_seconds:>4.1f}s | {metrics['resident_users']:>10,} | "
+              f"{updated:>5,} / {ACTIVE_USERS:,}")
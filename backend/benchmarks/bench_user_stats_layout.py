@@ -0,0 +1,144 @@
+"""
+Eski iç içe defaultdict kullanıcı düzeni ile kompakt UserStats düzenini karşılaştırır:
+kullanıcı başına bellek / pickle boyutu ve EnhancedPracticeModel.predict gecikmesi.
+
+Kullanım (backend dizininden):
+    python benchmarks/bench_user_stats_layout.py
+"""
+import os
+import sys
+import pickle
+import random
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.services.enhanced_ml_model import EnhancedPracticeModel
+from app.services.learning_curve import LearningCurve
+from app.services.user_stats import UserStats
+
+NUM_USERS = 5_000
+ANSWERS_PER_USER = 200
+PREDICTS = 50_000
+
+
+def perf():
+    return {'total': 0, 'correct': 0}
+
+
+def legacy_user():
+    return {
+        'total_questions': 0,
+        'correct_answers': 0,
+        'subject_performance': defaultdict(perf),
+        'topic_performance': defaultdict(perf),
+        'difficulty_performance': defaultdict(perf),
+        'recent_performance': [],
+        'learning_curve': [],
+        'last_activity': None,
+        'question_history': [],
+        'last_cleanup_at': 0
+    }
+
+
+def legacy_record(user_data, ders_id, konu_id, zorluk, correct):
+    user_data['total_questions'] += 1
+    user_data['correct_answers'] += int(correct)
+    for field, key in (('subject_performance', ders_id), ('topic_performance', (ders_id, konu_id)), ('difficulty_performance', zorluk)):
+        user_data[field][key]['total'] += 1
+        user_data[field][key]['correct'] += int(correct)
+
+
+def legacy_accuracies(user_data, X):
+    accuracies = []
+    for field, key in (('subject_performance', X['ders_id']), ('topic_performance', (X['ders_id'], X['konu_id'])), ('difficulty_performance', X['zorluk'])):
+        data = user_data[field][key]
+        accuracies.append(data['correct'] / data['total'] if data['total'] > 0 else 0.5)
+    return accuracies
+
+
+def legacy_predict(user_stats, X):
+    """Eski EnhancedPracticeModel.predict akışı: extract_features + tekrar eden defaultdict okumaları"""
+    user_data = user_stats[X['user_id']]
+    legacy_accuracies(user_data, X)  # extract_features
+    if user_data['total_questions'] == 0:
+        return 0.5
+    user_accuracy = user_data['correct_answers'] / user_data['total_questions']
+    accuracies = legacy_accuracies(user_data, X)
+    score = user_accuracy * 0.2 + accuracies[0] * 0.3 + accuracies[1] * 0.4 + accuracies[2] * 0.1
+    zorluk = X['zorluk']
+    score += 0.2 if zorluk <= 2 else 0.0 if zorluk <= 4 else -0.2
+    return max(0.0, min(1.0, score))
+
+
+def answers(rng):
+    return [(rng.randint(1, 6), rng.randint(1, 3), rng.randint(1, 5), rng.random() < 0.6) for _ in range(ANSWERS_PER_USER)]
+
+
+def measure_memory(build):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    users = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return users, size / NUM_USERS
+
+
+def time_predicts(fn, queries):
+    start = time.perf_counter()
+    for X in queries:
+        fn(X)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+if __name__ == "__main__":
+    rng = random.Random(7)
+    history = [answers(rng) for _ in range(NUM_USERS)]
+
+    def build_legacy():
+        users = defaultdict(legacy_user)
+        for user_id, rows in enumerate(history, start=1):
+            for row in rows:
+                legacy_record(users[user_id], *row)
+        return users
+
+    def build_compact():
+        users = {}
+        for user_id, rows in enumerate(history, start=1):
+            # Sonsuz yarı ömür = sönümsüz sayaçlar; formül eski düzenle birebir karşılaştırılabilir
+            user_data = UserStats(learning_curve=LearningCurve(), half_life=float('inf'))
+            for row in rows:
+                user_data.record(*row)
+            users[user_id] = user_data
+        return users
+
+    legacy_users, legacy_bytes = measure_memory(build_legacy)
+    compact_users, compact_bytes = measure_memory(build_compact)
+
+    legacy_pickle = len(pickle.dumps(dict(legacy_users[1]) | {k: dict(legacy_users[1][k]) for k in ('subject_performance', 'topic_performance', 'difficulty_performance')}))
+    compact_pickle = len(pickle.dumps(compact_users[1]))
+
+    queries = [
+        {"user_id": rng.randint(1, NUM_USERS), "ders_id": rng.randint(1, 6), "konu_id": rng.randint(1, 3),
+         "altbaslik_id": 1, "zorluk": rng.randint(1, 5)}
+        for _ in range(PREDICTS)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model = EnhancedPracticeModel(storage_dir=tmp)
+        model.user_stats = compact_users
+        compact_us = time_predicts(model.predict, queries)
+        legacy_us = time_predicts(lambda X: legacy_predict(legacy_users, X), queries)
+        mismatches = sum(abs(model.predict(X) - legacy_predict(legacy_users, X)) > 1e-9 for X in queries[:2000])
+        model.shutdown()
+
+    print(f"Kullanıcı başına bellek: eski {legacy_bytes:,.0f} B, kompakt {compact_bytes:,.0f} B ({legacy_bytes / compact_bytes:.1f}x)")
+    print(f"Kullanıcı başına pickle: eski {legacy_pickle:,} B, kompakt {compact_pickle:,} B")
+    print(f"predict gecikmesi: eski {legacy_us:.2f} µs, kompakt {compact_us:.2f} µs")
+    print(f"Formül uyumsuzluğu: {mismatches} / 2000")
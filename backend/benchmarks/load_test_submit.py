@@ -0,0 +1,205 @@
+"""
+Birden çok uvicorn worker'ı ile /answers/submit yük testi.
+
+Backend geçici bir dizine kopyalanır (veritabanları boş), sorular ve test
+kullanıcıları oluşturulur, uygulama `uvicorn --workers N` ile başlatılır ve
+istemci iş parçacıkları rastgele kullanıcılar adına cevap gönderir. Sunucu
+kapatıldıktan sonra (kuyruklar ve kayıtlar boşaltılır) her kullanıcının
+submissions tablosundaki cevap sayısı, iki modelin depodaki total_questions
+değeriyle karşılaştırılır: fark, kaybolan güncelleme sayısıdır.
+
+Test iki kez çalışır: paylaşımlı depo (MODEL_SHARED_STATE=1) ve her worker'ın
+kendi bellek kopyasını yazdığı eski düzen (MODEL_SHARED_STATE=0).
+
+Kullanım (backend dizininden):
+    python benchmarks/load_test_submit.py [istek_sayısı] [worker_sayısı]
+"""
+import json
+import os
+import pickle
+import random
+import shutil
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+NUM_REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+NUM_WORKERS = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+NUM_USERS = 20
+CLIENT_THREADS = 32
+
+# Kopya dizinde çalışır: tablolar, sorular ve kullanıcılar; token ve soru listesini JSON olarak yazar
+SETUP_SCRIPT = """
+import contextlib, io, json, sys
+with contextlib.redirect_stdout(io.StringIO()):
+    from app.core.database import SessionLocal, create_tables
+    from app.core.models import User, Questions
+    from app.services.auth_def import create_access_token
+    from app.utils.ImportQuestions.import_questions import import_questions_from_json
+    create_tables()
+    import_questions_from_json('app/utils/ImportQuestions/400MATSORUSU.json')
+    db = SessionLocal()
+    users = [User(email=f'load{i}@test.local', username=f'load{i}') for i in range(int(sys.argv[1]))]
+    db.add_all(users)
+    db.commit()
+    tokens = {u.id: create_access_token({'sub': str(u.id)}) for u in users}
+    questions = [
+        {'soru_id': q.soru_id, 'ders_id': q.ders_id, 'konu_id': q.konu_id,
+         'altbaslik_id': q.altbaslik_id or 0, 'zorluk': q.zorluk}
+        for q in db.query(Questions).all()
+    ]
+    db.close()
+print(json.dumps({'tokens': tokens, 'questions': questions}))
+"""
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def prepare(workdir):
+    app_dir = os.path.join(workdir, "backend")
+    shutil.copytree(
+        backend_dir, app_dir,
+        ignore=shutil.ignore_patterns("*.db", "*.db-wal", "*.db-shm", "*.pkl", "*.migrated", "__pycache__", "benchmarks")
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", SETUP_SCRIPT, str(NUM_USERS)],
+        cwd=app_dir, check=True, capture_output=True, text=True
+    ).stdout
+    data = json.loads(output.strip().splitlines()[-1])
+    return app_dir, {int(k): v for k, v in data["tokens"].items()}, data["questions"]
+
+
+def start_server(app_dir, port, shared):
+    env = dict(os.environ, MODEL_SHARED_STATE="1" if shared else "0")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--workers", str(NUM_WORKERS),
+         "--port", str(port), "--log-level", "warning"],
+        cwd=app_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/openapi.json", timeout=1).read()
+            return server
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("uvicorn başlatılamadı")
+
+
+def stop_server(server):
+    # SIGINT: worker'lar shutdown hook'unu çalıştırır (kuyruk boşaltma, kayıt)
+    server.send_signal(signal.SIGINT)
+    try:
+        server.wait(timeout=120)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        raise
+
+
+def post_submit(port, token, body):
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/answers/submit",
+        data=json.dumps(body).encode(),
+        headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=60) as response:
+        response.read()
+        return response.status
+
+
+def hammer(port, tokens, questions):
+    rng = random.Random(7)
+    jobs = []
+    for _ in range(NUM_REQUESTS):
+        user_id = rng.choice(list(tokens))
+        question = rng.choice(questions)
+        jobs.append((tokens[user_id], dict(question, selected="A", is_correct=int(rng.random() < 0.6))))
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def send(job):
+        t0 = time.perf_counter()
+        try:
+            status = post_submit(port, *job)
+        except Exception as e:
+            status = str(e)
+        elapsed = time.perf_counter() - t0
+        with lock:
+            latencies.append(elapsed)
+            if status != 200:
+                errors.append(status)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(CLIENT_THREADS) as pool:
+        list(pool.map(send, jobs))
+    return latencies, errors, time.perf_counter() - started
+
+
+def lost_updates(app_dir):
+    """Kullanıcı başına (submissions sayısı - model total_questions) toplamları"""
+    with sqlite3.connect(os.path.join(app_dir, "app", "core", "database.db")) as conn:
+        submitted = dict(conn.execute("SELECT user_id, COUNT(*) FROM submissions GROUP BY user_id"))
+    lost = {}
+    with sqlite3.connect(os.path.join(app_dir, "app", "services", "user_stats.db")) as conn:
+        for table in ("simple_user_stats", "enhanced_user_stats"):
+            stored = {
+                user_id: pickle.loads(data).total_questions
+                for user_id, data in conn.execute(f"SELECT user_id, data FROM {table}")
+            }
+            lost[table] = sum(count - stored.get(user_id, 0) for user_id, count in submitted.items())
+    return sum(submitted.values()), lost
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000
+
+
+def run(shared):
+    with tempfile.TemporaryDirectory() as workdir:
+        app_dir, tokens, questions = prepare(workdir)
+        port = free_port()
+        server = start_server(app_dir, port, shared)
+        try:
+            latencies, errors, seconds = hammer(port, tokens, questions)
+        finally:
+            stop_server(server)
+        submitted, lost = lost_updates(app_dir)
+    return latencies, errors, seconds, submitted, lost
+
+
+def main():
+    print(f"{NUM_REQUESTS:,} istek, {NUM_WORKERS} worker, {NUM_USERS} kullanıcı, {CLIENT_THREADS} istemci iş parçacığı")
+    print(f"{'depo':>10} | {'istek/sn':>8} | {'p50 ms':>8} | {'p99 ms':>8} | {'hata':>4} | {'kayıt':>5} | "
+          f"{'kayıp simple':>12} | {'kayıp enhanced':>14}")
+    for name, shared in (("paylaşımlı", True), ("ayrı", False)):
+        latencies, errors, seconds, submitted, lost = run(shared)
+        print(f"{name:>10} | {len(latencies) / seconds:8.0f} | {percentile(latencies, 0.5):8.2f} | "
+              f"{percentile(latencies, 0.99):8.2f} | {len(errors):4d} | {submitted:5d} | "
+              f"{lost['simple_user_stats']:12d} | {lost['enhanced_user_stats']:14d}")
+        if errors:
+            print(f"  ilk hata: {errors[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -81,6 +81,45 @@ def create_database():
             )
         """)
         
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_submissions_user_question_correct
+            ON submissions (user_id, question_id, is_correct)
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS question_calibration (
+                soru_id INTEGER PRIMARY KEY,
+                difficulty REAL NOT NULL,
+                discrimination REAL NOT NULL,
+                zorluk INTEGER,
+                responses INTEGER NOT NULL,
+                p_correct REAL NOT NULL,
+                calibrated_at DATETIME,
+                FOREIGN KEY (soru_id) REFERENCES questions (soru_id)
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS question_tags (
+                soru_id INTEGER NOT NULL,
+                etiket TEXT NOT NULL,
+                PRIMARY KEY (soru_id, etiket),
+                FOREIGN KEY (soru_id) REFERENCES questions (soru_id)
+            )
+        """)
+        
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_question_tags_etiket
+            ON question_tags (etiket)
+        """)
+        
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS question_search USING fts5(
+                soru_metin, dogru_cevap_aciklamasi, etiket, ders,
+                tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+            )
+        """)
+        
         conn.commit()
         print("✅ Veritabanı tabloları oluşturuldu")
         
@@ -53,6 +53,7 @@ export async function getAnswerPrediction(questionData, token) {
   try {
     const predictionData = {
       user_id: 1,
+      soru_id: questionData.soru_id,
       ders_id: questionData.ders_id,
       konu_id: questionData.konu_id,
       altbaslik_id: questionData.altbaslik_id,
@@ -282,6 +282,7 @@ export default function TestPage({ onLogout }) {
           },
           body: JSON.stringify({
             user_id: q.user_id || 1,
+            soru_id: q.soru_id,
             ders_id: q.ders_id,
             konu_id: q.konu_id,
             altbaslik_id: q.altbaslik_id,